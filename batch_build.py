@@ -0,0 +1,184 @@
+"""
+batch_build.py
+複数プロジェクトの一括結合（generate_pptx.py batch）
+
+slides/ 以下の YYYYMMDD_<project>/slides/*.json を持つプロジェクトを探し、
+outline.json のテンプレート指定に従って全件を Tier 2 結合する。
+
+  python generate_pptx.py batch                       # slides/ 以下の全プロジェクト
+  python generate_pptx.py batch --projects 提案書 --workers 4
+  python generate_pptx.py batch --dry-run             # 対象の一覧だけ表示
+
+プロジェクトはプロセスプールで並行に結合する。各ワーカーは起動時に使うテンプレートを
+テンプレートプールへ読み込み（build_server と同じ初期化）、画像キャッシュ（image_cache.py）は
+プロセス間で共有される。スライド枚数の多いプロジェクトから投入して待ち時間を詰める。
+1件が失敗しても残りは続行し、最後にプロジェクトごとの所要時間・枚数・失敗を表で表示する。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+SLIDES_DIR = Path(__file__).parent / "slides"
+DEFAULT_TEMPLATE_ID = "sx_proposal"
+
+
+# ─── プロジェクトの発見 ───────────────────────────────
+def project_template(project_dir: Path) -> str | None:
+    """outline.json のテンプレートID（なければ None）"""
+    outline_json = Path(project_dir) / "outline.json"
+    if not outline_json.exists():
+        return None
+    try:
+        odata = json.loads(outline_json.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    return odata.get("template") if isinstance(odata, dict) else None
+
+
+def project_name(project_dir: Path) -> str:
+    """YYYYMMDD_<project> フォルダー名からプロジェクト名を取り出す"""
+    date, _, name = Path(project_dir).name.partition("_")
+    return name if date.isdigit() and name else Path(project_dir).name
+
+
+def discover_projects(slides_root: Path = SLIDES_DIR, filters: list[str] | None = None) -> list[dict]:
+    """
+    slides_root 直下の Tier 2 ファイルを持つプロジェクトを返す。
+    同名プロジェクトが複数の日付にある場合は新しい方だけ（--assemble-only と同じ）。
+    filters: 指定時はプロジェクト名にどれかを含むものだけ
+    """
+    latest: dict[str, Path] = {}
+    for project_dir in sorted(Path(slides_root).iterdir()):
+        if not project_dir.is_dir() or not any((project_dir / "slides").glob("*.json")):
+            continue
+        latest[project_name(project_dir)] = project_dir   # 名前順なので後の日付が残る
+    projects = []
+    for name, project_dir in sorted(latest.items()):
+        if filters and not any(f in name for f in filters):
+            continue
+        projects.append({
+            "name": name,
+            "dir": project_dir,
+            "slides_dir": project_dir / "slides",
+            "template_id": project_template(project_dir),
+            "slides": len(list((project_dir / "slides").glob("*.json"))),
+        })
+    return projects
+
+
+# ─── 一括結合 ─────────────────────────────────────────
+def run_batch(projects: list[dict], workers: int | None = None, options: dict | None = None,
+              output_name: str | None = None) -> list[dict]:
+    """
+    projects をプロセスプールで結合する。
+    output_name: 省略時は <YYYYMMDD_HHMM>_<template>_<project>.pptx（--assemble-only と同じ）
+    Returns: プロジェクトごとの {"name", "template_id", "slides", "ok", "path", "seconds", "warnings", "error", "log"}
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from build_server import warm_worker, run_job
+
+    options = dict(options or {}, workers=1)   # 並列はプロジェクト単位で行う
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    workers = max(1, min(workers or os.cpu_count() or 1, len(projects)))
+    templates = sorted({p["template_id"] or DEFAULT_TEMPLATE_ID for p in projects})
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_worker, initargs=(templates,)) as pool:
+        futures = {}
+        # 枚数の多い順に投入すると、最後に大きなプロジェクトだけが残って待つことが減る
+        for project in sorted(projects, key=lambda p: -p["slides"]):
+            tid_label = project["template_id"] or DEFAULT_TEMPLATE_ID
+            output = project["dir"] / (output_name or f"{timestamp}_{tid_label}_{project['name']}.pptx")
+            params = {"slides_dir": str(Path(project["slides_dir"]).resolve()),
+                      "output_path": str(output.resolve()),
+                      "template_id": project["template_id"], "options": options}
+            futures[pool.submit(run_job, "assemble", params)] = project
+        for future in as_completed(futures):
+            project = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # ワーカープロセスが落ちた場合など
+                result = {"ok": False, "error": f"{type(e).__name__}: {e}", "log": "",
+                          "seconds": 0.0, "warnings": []}
+            result.update(name=project["name"], template_id=project["template_id"] or DEFAULT_TEMPLATE_ID,
+                          slides=project["slides"])
+            status = "OK" if result["ok"] else f"失敗: {result['error']}"
+            print(f"  [batch] {project['name']} ({result['seconds']:.1f}s) {status}")
+            results.append(result)
+    order = {p["name"]: i for i, p in enumerate(projects)}
+    return sorted(results, key=lambda r: order[r["name"]])
+
+
+def _cols(text: str) -> int:
+    """表示桁数（全角文字は2桁。プロジェクト名は日本語が多いため）"""
+    import unicodedata
+    return sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+
+
+def _pad(text: str, width: int) -> str:
+    return text + " " * max(0, width - _cols(text))
+
+
+def print_summary(results: list[dict], wall_seconds: float):
+    width = max([12] + [_cols(r["name"]) for r in results])
+    rule = width + 44
+    print(f"\n{'=' * rule}")
+    print(f"{_pad('Project', width)} {'Template':<14} {'Slides':>6} {'Time':>8} {'Warn':>5}  Result")
+    print("-" * rule)
+    for r in results:
+        print(f"{_pad(r['name'], width)} {r['template_id']:<14} {r['slides']:>6} {r['seconds']:>7.1f}s"
+              f" {len(r['warnings']):>5}  {'OK' if r['ok'] else 'FAILED'}")
+    failed = [r for r in results if not r["ok"]]
+    print("-" * rule)
+    print(f"{len(results)}件（成功 {len(results) - len(failed)} / 失敗 {len(failed)}）"
+          f"  スライド {sum(r['slides'] for r in results)}枚"
+          f"  経過 {wall_seconds:.1f}s（各プロジェクトの合計 {sum(r['seconds'] for r in results):.1f}s）")
+    print("=" * rule)
+    for r in failed:
+        print(f"\n[失敗] {r['name']}: {r['error']}")
+        for line in r["log"].strip().splitlines()[-5:]:
+            print(f"    {line}")
+
+
+# ─── CLI ──────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="generate_pptx.py batch",
+                                     description="slides/ 以下の全プロジェクトを一括で Tier 2 結合する")
+    parser.add_argument("--projects", nargs="+", metavar="NAME",
+                        help="プロジェクト名に含まれる文字列で対象を絞る（省略時は全件）")
+    parser.add_argument("--workers", type=int, help="ワーカープロセス数（既定: CPU 数とプロジェクト数の小さい方）")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="ビルドマニフェスト（.build/）を使わず全スライドを再レンダリングする")
+    parser.add_argument("--image-dpi", type=int, default=150,
+                        help="埋め込み画像を配置サイズに縮小するときの解像度（既定: 150）")
+    parser.add_argument("--prune-layouts", action="store_true",
+                        help="使っていないレイアウト・マスターを出力 PPTX から削除する")
+    parser.add_argument("--dry-run", action="store_true", help="対象プロジェクトの一覧だけ表示する")
+    args = parser.parse_args(argv)
+
+    projects = discover_projects(filters=args.projects)
+    if not projects:
+        print(f"エラー: 結合できるプロジェクトがありません: {SLIDES_DIR}")
+        sys.exit(1)
+    print(f"\n一括結合: {len(projects)}プロジェクト")
+    for p in projects:
+        print(f"  {p['name']}  ({p['template_id'] or DEFAULT_TEMPLATE_ID}, {p['slides']}枚)")
+    if args.dry_run:
+        return
+
+    options = {"incremental": not args.full_rebuild, "image_dpi": args.image_dpi,
+               "prune_unused_layouts": args.prune_layouts}
+    t0 = time.perf_counter()
+    results = run_batch(projects, workers=args.workers, options=options)
+    print_summary(results, time.perf_counter() - t0)
+    if any(not r["ok"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
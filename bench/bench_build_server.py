@@ -0,0 +1,84 @@
+"""
+bench/bench_build_server.py
+ビルドサーバーのベンチマーク: 小さな Tier 2 スライドフォルダーを
+毎回新しい Python プロセスで結合した場合（起動・import・テンプレート読み込み込み）と、
+起動済みのビルドサーバーへ転送した場合のレイテンシを比較する。
+
+使い方:
+  python bench/bench_build_server.py
+  python bench/bench_build_server.py --slides 20 --repeat 5 --template jr_east
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import build_server  # noqa: E402
+from bench_template_pool import synthetic_outline  # noqa: E402
+
+COLD_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+from pptx_engine import build_from_slides_dir
+build_from_slides_dir({slides_dir!r}, {output!r}, template_id={template!r}, incremental=False)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build server latency benchmark")
+    parser.add_argument("--slides", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--template", default="sx_proposal")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        slides_dir = tmp / "slides"
+        slides_dir.mkdir()
+        for i, slide in enumerate(synthetic_outline(args.slides)):
+            (slides_dir / f"{i:02d}_{slide['type']}.json").write_text(
+                json.dumps(slide, ensure_ascii=False), encoding="utf-8")
+
+        cold = []
+        for r in range(args.repeat):
+            script = COLD_SCRIPT.format(root=str(ROOT), slides_dir=str(slides_dir),
+                                        output=str(tmp / f"cold{r}.pptx"), template=args.template)
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-c", script], check=True, capture_output=True)
+            cold.append(time.perf_counter() - t0)
+
+        state = tmp / "state.json"
+        server = build_server.BuildServer(port=0, workers=1, state_file=state)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        while not state.exists():
+            time.sleep(0.05)
+        warm = []
+        for r in range(args.repeat):
+            t0 = time.perf_counter()
+            result = build_server.forward("assemble", {
+                "slides_dir": str(slides_dir), "output_path": str(tmp / f"warm{r}.pptx"),
+                "template_id": args.template, "options": {"incremental": False}}, state_file=state)
+            warm.append(time.perf_counter() - t0)
+            assert result["ok"], result
+        server.shutdown()
+        thread.join()
+
+    print(f"\n{'='*60}")
+    print(f"Slides: {args.slides}  Template: {args.template}  Repeat: {args.repeat}")
+    print(f"  new process (cold)   : {min(cold) * 1000:8.1f} ms (min)  {sum(cold) / len(cold) * 1000:8.1f} ms (avg)")
+    print(f"  build server (warm)  : {min(warm) * 1000:8.1f} ms (min)  {sum(warm) / len(warm) * 1000:8.1f} ms (avg)")
+    print(f"  speedup              : {min(cold) / min(warm):8.1f}x")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+bench/bench_compiled_template.py
+コンパイル済みテンプレートのベンチマーク: 元の template.pptx とサンプルスライド除去済み
+パッケージ（.compiled/<sha>.pptx）で open / save 時間とファイルサイズを比較する。
+
+使い方:
+  python bench/bench_compiled_template.py
+  python bench/bench_compiled_template.py --template jr_east --repeat 10
+"""
+
+import io
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pptx import Presentation  # noqa: E402
+
+import pptx_engine  # noqa: E402
+
+
+def time_open_save(path: Path, strip: bool, repeat: int) -> tuple[float, float, int]:
+    """(open 最短秒, save 最短秒, 保存後バイト数) を返す"""
+    opens, saves, size = [], [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        prs = Presentation(str(path))
+        if strip:
+            pptx_engine.remove_all_slides(prs)
+        t1 = time.perf_counter()
+        buf = io.BytesIO()
+        prs.save(buf)
+        t2 = time.perf_counter()
+        opens.append(t1 - t0)
+        saves.append(t2 - t1)
+        size = len(buf.getvalue())
+    return min(opens), min(saves), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled template open/save benchmark")
+    parser.add_argument("--template", default=pptx_engine.DEFAULT_TEMPLATE_ID)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    config = pptx_engine.get_template_config(args.template)
+    compiled = pptx_engine.compile_template(config.template_path)
+
+    rows = [
+        ("original", config.template_path, True),
+        ("compiled", compiled, False),
+    ]
+    print(f"\n{'='*60}")
+    print(f"Template: {args.template}  Repeat: {args.repeat}")
+    print(f"  {'':10s} {'file KB':>9s} {'open ms':>9s} {'save ms':>9s} {'saved KB':>9s}")
+    for label, path, strip in rows:
+        open_s, save_s, size = time_open_save(path, strip, args.repeat)
+        print(f"  {label:10s} {path.stat().st_size / 1024:9.1f} {open_s * 1000:9.1f} "
+              f"{save_s * 1000:9.1f} {size / 1024:9.1f}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+bench/bench_fill_plan.py
+プレースホルダー充填のマイクロベンチマーク: 200枚デッキで
+旧方式（set_placeholder_text ごとにシェイプを走査）と FillPlan（1パス）を比較する。
+
+使い方:
+  python bench/bench_fill_plan.py
+  python bench/bench_fill_plan.py --template jr_east --slides 200 --repeat 5
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pptx_engine  # noqa: E402
+from bench_template_pool import synthetic_outline  # noqa: E402
+
+
+def legacy_fill(slide, slide_data: dict, config, has_objects: bool):
+    """FillPlan 導入前の add_slide と同じ手順"""
+    layout_key = slide_data.get("type", "content")
+    phs = config.placeholders.get(layout_key, {})
+    if slide_data.get("title"):
+        pptx_engine.set_placeholder_text(slide, phs.get("title", 0), slide_data["title"])
+    if slide_data.get("subtitle"):
+        pptx_engine.set_placeholder_text(slide, phs.get("subtitle", 13), slide_data["subtitle"])
+    if phs.get("master_title") is not None:
+        pptx_engine.set_placeholder_text(slide, phs["master_title"], slide_data.get("master_title", ""))
+    if slide_data.get("body"):
+        pptx_engine.set_body_text(slide, slide_data["body"], search_order=config.body_ph_search_order)
+    elif has_objects:
+        for shape in list(slide.shapes):
+            if shape.is_placeholder and shape.placeholder_format.idx in config.body_ph_ids:
+                shape._element.getparent().remove(shape._element)
+                break
+    mapped = config.mapped_placeholders.get(layout_key, frozenset())
+    for shape in slide.shapes:
+        if shape.is_placeholder and shape.has_text_frame and shape.placeholder_format.idx not in mapped:
+            pptx_engine.fill_text_frame(shape.text_frame, "")
+
+
+def plan_fill(slide, slide_data: dict, config, has_objects: bool):
+    config.fill_plan(slide_data.get("type", "content")).apply(slide, slide_data, has_objects)
+
+
+def time_fill(fill, outline: list[dict], config) -> float:
+    """スライド追加は計測外。充填処理だけの合計秒を返す"""
+    prs = pptx_engine.TEMPLATE_POOL.acquire(config)
+    total = 0.0
+    for slide_data in outline:
+        layout_key = slide_data.get("type", "content")
+        layout = prs.slide_layouts[config.layout.get(layout_key, config.layout["content"])]
+        slide = prs.slides.add_slide(layout)
+        has_objects = bool(slide_data.get("objects"))
+        t0 = time.perf_counter()
+        fill(slide, slide_data, config, has_objects)
+        total += time.perf_counter() - t0
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Placeholder fill plan micro-benchmark")
+    parser.add_argument("--template", default=pptx_engine.DEFAULT_TEMPLATE_ID)
+    parser.add_argument("--slides", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    config = pptx_engine.get_template_config(args.template)
+    outline = synthetic_outline(args.slides)
+    legacy = min(time_fill(legacy_fill, outline, config) for _ in range(args.repeat))
+    plan = min(time_fill(plan_fill, outline, config) for _ in range(args.repeat))
+
+    print(f"\n{'='*60}")
+    print(f"Template: {args.template}  Slides: {args.slides}  Repeat: {args.repeat}")
+    print(f"  legacy fill : {legacy * 1000:8.1f} ms ({legacy / args.slides * 1e6:6.1f} us/slide)")
+    print(f"  fill plan   : {plan * 1000:8.1f} ms ({plan / args.slides * 1e6:6.1f} us/slide)")
+    print(f"  speed-up    : {legacy / plan:8.2f} x")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
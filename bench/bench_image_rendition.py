@@ -0,0 +1,99 @@
+"""
+bench/bench_image_rendition.py
+画像レンディションのベンチマーク: 生成画像サイズ（既定 2048x2048）の写真調・図版調の画像を
+載せたデッキを、旧方式（元解像度のまま中央クロップして PNG 再エンコード）と
+配置サイズのレンディション（初回 / キャッシュ済み）で組み立て、ビルド時間と PPTX サイズを比較する。
+
+使い方:
+  python bench/bench_image_rendition.py
+  python bench/bench_image_rendition.py --slides 15 --dpi 150
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pptx_engine  # noqa: E402
+from image_cache import ImageCache  # noqa: E402
+
+
+def make_images(out_dir: Path, n: int, size: int) -> list[str]:
+    """写真調（グラデーション＋ノイズ）と図版調（少色）を交互に n 枚書き出す"""
+    from PIL import Image, ImageDraw
+    names = []
+    for i in range(n):
+        if i % 2 == 0:
+            img = Image.merge("RGB", [Image.linear_gradient("L").resize((size, size)),
+                                      Image.effect_noise((size, size), 40 + i),
+                                      Image.radial_gradient("L").resize((size, size))])
+        else:
+            img = Image.new("RGB", (size, size), (255, 255, 255))
+            draw = ImageDraw.Draw(img)
+            for k in range(6):
+                draw.rectangle((k * size // 14, k * size // 14, size - k * size // 14, size - k * size // 10),
+                               fill=(237, 125 - k * 15, 49 + i))
+        name = f"img{i:02d}.png"
+        img.save(out_dir / name)
+        names.append(name)
+    return names
+
+
+def outline_for(names: list[str]) -> list[dict]:
+    outline = [{"type": "title", "title": "画像レンディション", "subtitle": "ベンチマーク"}]
+    for i, name in enumerate(names):
+        outline.append({"type": "content", "title": f"画像スライド {i}",
+                        "images": [{"file": name, "left": 7.3, "top": 1.5, "width": 5.5, "height": 4.0}]})
+    outline.append({"type": "end"})
+    return outline
+
+
+def legacy_rendition(img_bytes, width_inch, height_inch=None, dpi=None, fmt=None):
+    """レンディション導入前と同じ処理（高さ指定時に元解像度のまま PNG でクロップ）"""
+    if height_inch:
+        return pptx_engine._center_crop_to_ratio(img_bytes, width_inch, height_inch)
+    return img_bytes
+
+
+def timed_build(outline, slides_dir: Path, out: Path, dpi: int) -> float:
+    t0 = time.perf_counter()
+    pptx_engine.build_pptx(outline, out, slides_dir=slides_dir, image_dpi=dpi)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Placement-sized image rendition benchmark")
+    parser.add_argument("--slides", type=int, default=15, help="画像スライドの枚数")
+    parser.add_argument("--size", type=int, default=2048, help="元画像の一辺（px）")
+    parser.add_argument("--dpi", type=int, default=pptx_engine.IMAGE_RENDITION_DPI)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        outline = outline_for(make_images(tmp, args.slides, args.size))
+        pptx_engine.IMAGE_CACHE = ImageCache(tmp / "cache")
+
+        original = pptx_engine.placement_rendition
+        pptx_engine.placement_rendition = legacy_rendition
+        legacy_s = timed_build(outline, tmp, tmp / "legacy.pptx", args.dpi)
+        pptx_engine.placement_rendition = original
+        cold_s = timed_build(outline, tmp, tmp / "cold.pptx", args.dpi)
+        warm_s = timed_build(outline, tmp, tmp / "warm.pptx", args.dpi)
+
+        legacy_b = (tmp / "legacy.pptx").stat().st_size
+        new_b = (tmp / "warm.pptx").stat().st_size
+
+    print(f"\n{'='*60}")
+    print(f"Images: {args.slides} x {args.size}px  DPI: {args.dpi}")
+    print(f"  legacy (full-res PNG)  : {legacy_s * 1000:8.1f} ms  {legacy_b / 1e6:7.2f} MB")
+    print(f"  rendition (cold)       : {cold_s * 1000:8.1f} ms")
+    print(f"  rendition (cached)     : {warm_s * 1000:8.1f} ms  {new_b / 1e6:7.2f} MB")
+    print(f"  bytes saved per deck   : {(legacy_b - new_b) / 1e6:8.2f} MB ({1 - new_b / legacy_b:.0%})")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+bench/bench_incremental_build.py
+インクリメンタル結合のベンチマーク: Tier 2 スライドフォルダー（既定40枚）を
+全再ビルドした場合と、1ファイルだけ編集してマニフェスト付きで再結合した場合を比較する。
+
+使い方:
+  python bench/bench_incremental_build.py
+  python bench/bench_incremental_build.py --template jr_east --slides 40 --repeat 5
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pptx_engine  # noqa: E402
+from bench_template_pool import synthetic_outline  # noqa: E402
+
+
+def write_slides_dir(outline: list[dict], slides_dir: Path):
+    slides_dir.mkdir(parents=True, exist_ok=True)
+    for i, slide_data in enumerate(outline):
+        (slides_dir / f"{i:02d}_{slide_data['type']}.json").write_text(
+            json.dumps(slide_data, ensure_ascii=False), encoding="utf-8")
+
+
+def edit_one_slide(slides_dir: Path, n: int):
+    """content スライドを1枚だけ書き換える（毎回タイトルを変えて必ず dirty にする）"""
+    files = sorted(slides_dir.glob("*_content.json"))
+    path = files[len(files) // 2]
+    slide_data = json.loads(path.read_text(encoding="utf-8"))
+    slide_data["title"] = f"編集 {n}"
+    path.write_text(json.dumps(slide_data, ensure_ascii=False), encoding="utf-8")
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental assembly benchmark")
+    parser.add_argument("--template", default=pptx_engine.DEFAULT_TEMPLATE_ID)
+    parser.add_argument("--slides", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    full, incremental = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        slides_dir = Path(tmp) / "slides"
+        write_slides_dir(synthetic_outline(args.slides), slides_dir)
+        out = Path(tmp) / "deck.pptx"
+        build = pptx_engine.build_from_slides_dir
+        build(slides_dir, out, template_id=args.template)  # マニフェスト作成 + テンプレートプールの暖機
+        for n in range(args.repeat):
+            edit_one_slide(slides_dir, n)
+            full.append(timed(lambda: build(slides_dir, out, template_id=args.template, incremental=False)))
+            edit_one_slide(slides_dir, n + args.repeat)
+            incremental.append(timed(lambda: build(slides_dir, out, template_id=args.template)))
+
+    full_ms = min(full) * 1000
+    inc_ms = min(incremental) * 1000
+    print(f"\n{'='*60}")
+    print(f"Template: {args.template}  Slides: {args.slides}  Repeat: {args.repeat}")
+    print(f"  full rebuild          : {full_ms:8.1f} ms")
+    print(f"  incremental (1 dirty) : {inc_ms:8.1f} ms")
+    print(f"  speed-up              : {full_ms / inc_ms:8.2f} x")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
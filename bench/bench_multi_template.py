@@ -0,0 +1,74 @@
+"""
+bench/bench_multi_template.py
+複数テンプレート同時ビルドのベンチマーク: 同じ合成アウトラインを
+各テンプレートで順番にビルドした場合と、build_pptx_multi で同時にビルドした場合の
+経過時間を比較する（毎回新しいプロセスで計測。import とテンプレート読み込みを含む）。
+
+使い方:
+  python bench/bench_multi_template.py
+  python bench/bench_multi_template.py --slides 60 --repeat 3
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_template_pool import synthetic_outline  # noqa: E402
+
+SCRIPT = """
+import sys, json, time
+sys.path.insert(0, {root!r})
+import pptx_engine
+outline = json.load(open({outline!r}, encoding="utf-8"))
+t0 = time.perf_counter()
+for template_id in {templates!r}:
+    # リストはそのまま渡す（出力名の {{template}} は build_pptx_multi が置き換える）
+    output = {output!r} if isinstance(template_id, list) else {output!r}.replace("{{template}}", template_id)
+    pptx_engine.build_pptx(outline, output, template_id=template_id)
+print(time.perf_counter() - t0)
+"""
+
+
+def run(root: Path, outline: Path, templates, output: str) -> float:
+    script = SCRIPT.format(root=str(root), outline=str(outline), templates=templates, output=output)
+    proc = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True)
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-template build benchmark")
+    parser.add_argument("--slides", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--templates", nargs="+", default=["sx_proposal", "jr_east"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        outline = tmp / "outline.json"
+        outline.write_text(json.dumps(synthetic_outline(args.slides), ensure_ascii=False), encoding="utf-8")
+        single = {tid: min(run(ROOT, outline, [tid], str(tmp / "s_{template}.pptx")) for _ in range(args.repeat))
+                  for tid in args.templates}
+        sequential = min(run(ROOT, outline, args.templates, str(tmp / "q_{template}.pptx"))
+                         for _ in range(args.repeat))
+        # テンプレートIDのリストを1回渡す（build_pptx_multi）
+        multi = min(run(ROOT, outline, [args.templates], str(tmp / "m_{template}.pptx"))
+                    for _ in range(args.repeat))
+
+    print(f"\n{'='*60}")
+    print(f"Slides: {args.slides}  Templates: {', '.join(args.templates)}  Repeat: {args.repeat}")
+    for tid, seconds in single.items():
+        print(f"  single {tid:<15}: {seconds * 1000:8.1f} ms")
+    print(f"  sequential             : {sequential * 1000:8.1f} ms")
+    print(f"  concurrent (multi)     : {multi * 1000:8.1f} ms  ({multi / max(single.values()):.2f}x slowest single)")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+bench/bench_object_renderer.py
+図形描画のベンチマーク: 50オブジェクトのスライドで python-pptx API 描画と
+lxml 高速描画（add_objects_to_slide の renderer="xml"）を比較する。
+
+使い方:
+  python bench/bench_object_renderer.py
+  python bench/bench_object_renderer.py --objects 80 --repeat 20
+"""
+
+import io
+import sys
+import time
+import argparse
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pptx_engine  # noqa: E402
+
+
+def swimlane_objects(n: int) -> list[dict]:
+    """スイムレーン風の box / arrow / text を n 個並べる"""
+    objects = []
+    kinds = ("box", "arrow", "box", "text")
+    for i in range(n):
+        row, col = divmod(i, 8)
+        kind = kinds[i % len(kinds)]
+        base = {"left": 0.5 + col * 1.5, "top": 1.6 + row * 0.8, "width": 1.3, "height": 0.6}
+        if kind == "box":
+            objects.append(dict(base, type="box", text=f"工程{i}\n担当", fill_color="4472C4",
+                                font_color="FFFFFF", font_size=10))
+        elif kind == "arrow":
+            objects.append(dict(base, type="arrow", fill_color="ED7D31"))
+        else:
+            objects.append(dict(base, type="text", text=f"補足 {i}", font_size=9, font_color="404040"))
+    return objects
+
+
+def time_renderer(renderer: str, objects: list[dict], config, repeat: int) -> float:
+    prs = pptx_engine.TEMPLATE_POOL.acquire(config)
+    best = float("inf")
+    for _ in range(repeat):
+        slide = prs.slides.add_slide(prs.slide_layouts[config.layout["content"]])
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # API 描画の [DEBUG] 出力を除外
+            pptx_engine.add_objects_to_slide(slide, objects, renderer=renderer)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Object renderer benchmark")
+    parser.add_argument("--template", default=pptx_engine.DEFAULT_TEMPLATE_ID)
+    parser.add_argument("--objects", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    config = pptx_engine.get_template_config(args.template)
+    objects = swimlane_objects(args.objects)
+    api = time_renderer("api", objects, config, args.repeat)
+    xml = time_renderer("xml", objects, config, args.repeat)
+
+    print(f"\n{'='*60}")
+    print(f"Template: {args.template}  Objects/slide: {args.objects}  Repeat: {args.repeat}")
+    print(f"  api renderer : {api * 1000:8.2f} ms/slide")
+    print(f"  xml renderer : {xml * 1000:8.2f} ms/slide")
+    print(f"  speed-up     : {api / xml:8.2f} x")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
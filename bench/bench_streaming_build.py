@@ -0,0 +1,122 @@
+"""
+bench/bench_streaming_build.py
+ストリーミング結合のベンチマーク: 枚数を変えた Tier 2 スライドフォルダー（各スライドに別々の画像）を
+通常の結合（build_from_slides_dir）とストリーミング結合（streaming=True）で組み立て、
+ピーク RSS と所要時間を比較する。計測ごとに子プロセスを起動するため、ピーク RSS は互いに影響しない。
+
+使い方:
+  python bench/bench_streaming_build.py
+  python bench/bench_streaming_build.py --slides 100 300 600 --template jr_east
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_template_pool import synthetic_outline  # noqa: E402
+
+
+def peak_rss_mb() -> float | None:
+    """このプロセスのピーク RSS（MB）。取得できない環境では None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 1e6  # Windows
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3  # macOS はバイト、Linux は KB
+
+
+def write_slides_dir(slides_dir: Path, n: int):
+    """n 枚のスライドフォルダーを書き出す。各 content スライドに別々の写真調の画像を載せる"""
+    from PIL import Image
+    slides_dir.mkdir(parents=True, exist_ok=True)
+    images = slides_dir / "images"
+    images.mkdir(exist_ok=True)
+    outline = synthetic_outline(n)
+    for i, slide_data in enumerate(outline):
+        if slide_data["type"] == "content":
+            name = f"images/img{i:04d}.png"
+            Image.merge("RGB", [Image.linear_gradient("L").resize((600, 400)),
+                                Image.effect_noise((600, 400), 10 + i % 50),
+                                Image.new("L", (600, 400), i % 256)]).save(slides_dir / name)
+            slide_data["images"] = [{"file": name, "left": 7.3, "top": 1.5, "width": 5.5, "height": 4.0}]
+        (slides_dir / f"{i:04d}_{slide_data['type']}.json").write_text(
+            json.dumps(slide_data, ensure_ascii=False), encoding="utf-8")
+
+
+def child(slides_dir: Path, output: Path, mode: str, template_id: str | None):
+    """子プロセス側: 1回だけ結合して、所要時間とピーク RSS を JSON で標準出力の最終行に出す"""
+    import pptx_engine
+    from image_cache import ImageCache
+    pptx_engine.IMAGE_CACHE = ImageCache(output.parent / f"cache_{mode}")
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    pptx_engine.build_from_slides_dir(slides_dir, output, template_id=template_id,
+                                      incremental=False, streaming=(mode == "stream"))
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_rss_mb(), "base_mb": base}))
+
+
+def run_child(slides_dir: Path, output: Path, mode: str, template_id: str | None) -> dict:
+    cmd = [sys.executable, __file__, "--child", mode, str(slides_dir), str(output)]
+    if template_id:
+        cmd += ["--template", template_id]
+    proc = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8",
+                          env=dict(os.environ, PYTHONIOENCODING="utf-8"))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming assembly benchmark")
+    parser.add_argument("--slides", type=int, nargs="+", default=[100, 300, 600], help="計測する枚数")
+    parser.add_argument("--template", help="テンプレートID（省略時は既定テンプレート）")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "SLIDES_DIR", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, slides_dir, output = args.child
+        child(Path(slides_dir), Path(output), mode, args.template)
+        return
+    if peak_rss_mb() is None:
+        print("ピーク RSS を取得できません（Windows では psutil が必要です）")
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for n in args.slides:
+            slides_dir = tmp / f"slides_{n}"
+            write_slides_dir(slides_dir, n)
+            normal = run_child(slides_dir, tmp / f"normal_{n}.pptx", "normal", args.template)
+            stream = run_child(slides_dir, tmp / f"stream_{n}.pptx", "stream", args.template)
+            rows.append((n, normal, stream))
+
+    print(f"\n{'='*72}")
+    print(f"{'slides':>7}  {'normal peak':>12} {'time':>8}   {'stream peak':>12} {'time':>8}   {'saved':>8}")
+    for n, normal, stream in rows:
+        print(f"{n:>7}  {normal['peak_mb']:>9.1f} MB {normal['seconds']:>7.2f}s"
+              f"   {stream['peak_mb']:>9.1f} MB {stream['seconds']:>7.2f}s"
+              f"   {normal['peak_mb'] - stream['peak_mb']:>5.1f} MB")
+    if len(rows) > 1:
+        (n0, a, b), (n1, c, d) = rows[0], rows[-1]
+        per = 1000 / (n1 - n0)
+        print(f"  peak growth per 1000 slides: normal {(c['peak_mb'] - a['peak_mb']) * per:.1f} MB"
+              f" / stream {(d['peak_mb'] - b['peak_mb']) * per:.1f} MB")
+    print(f"{'='*72}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+bench/bench_suite.py
+組み立てエンジンのベンチマークスイート: 枚数・1枚あたりのオブジェクト数・本文の長さ・画像枚数を
+変えた合成 Tier 2 デッキを sx_proposal / jr_east の両テンプレートで build_pptx し、
+所要時間・1枚あたりの時間・ピークメモリ・出力サイズを JSON に記録する。
+--compare で保存済みのベースラインと比べ、閾値を超えて悪化したケースを REGRESSION として表示する
+（1件でもあれば終了コード 1）。
+
+画像はローカルで生成したフィクスチャ PNG のみを使う（画像生成 API は呼ばない）。
+ピークメモリを独立に測るため、ケース × テンプレートごとに子プロセスで計測する。
+
+使い方:
+  python bench/bench_suite.py                                  # 全ケースを計測して bench/results/ に保存
+  python bench/bench_suite.py --cases small medium --repeat 5
+  python bench/bench_suite.py --output bench/baseline.json     # ベースラインとして保存
+  python bench/bench_suite.py --compare bench/baseline.json    # ベースラインと比較
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+TEMPLATES = ["sx_proposal", "jr_east"]
+# name -> (スライド枚数, 1枚あたりのオブジェクト数, 本文の文字数, 1枚あたりの画像枚数)
+CASES = {
+    "small":     {"slides": 10,  "objects": 3,  "body_chars": 80,  "images": 0},
+    "medium":    {"slides": 40,  "objects": 6,  "body_chars": 200, "images": 1},
+    "large":     {"slides": 120, "objects": 10, "body_chars": 400, "images": 1},
+    "image_heavy": {"slides": 30, "objects": 2, "body_chars": 120, "images": 3},
+}
+FIXTURE_IMAGES = 8           # 使い回すフィクスチャ画像の種類
+TIME_THRESHOLD = 0.10        # これ以上遅くなったら REGRESSION
+TIME_NOISE_FLOOR = 0.020     # 差がこれ（秒）未満なら時間の悪化とみなさない
+MEMORY_THRESHOLD = 0.10
+BYTES_THRESHOLD = 0.02
+
+
+# ─── 合成デッキ ───────────────────────────────────────
+def write_fixture_images(images_dir: Path, n: int = FIXTURE_IMAGES) -> list[str]:
+    """写真調と図版調のフィクスチャ PNG を n 枚書き出す"""
+    from PIL import Image, ImageDraw
+    images_dir.mkdir(parents=True, exist_ok=True)
+    names = []
+    for i in range(n):
+        if i % 2 == 0:
+            img = Image.merge("RGB", [Image.linear_gradient("L").resize((1200, 800)),
+                                      Image.effect_noise((1200, 800), 20 + i),
+                                      Image.new("L", (1200, 800), 40 * i % 256)])
+        else:
+            img = Image.new("RGB", (1200, 800), (255, 255, 255))
+            draw = ImageDraw.Draw(img)
+            for k in range(5):
+                draw.rectangle((80 * k, 60 * k, 1200 - 80 * k, 800 - 60 * k), fill=(237, 125 - 20 * k, 40 + i))
+        name = f"images/fixture_{i:02d}.png"
+        img.save(images_dir.parent / name)
+        names.append(name)
+    return names
+
+
+def synthetic_deck(slides: int, objects: int, body_chars: int, images: int,
+                   image_files: list[str]) -> list[dict]:
+    """パラメーターどおりの Tier 2 スライド dict のリスト（表紙・章扉・本文・終わり）"""
+    line = "・検証用の本文テキストです。"
+    body_lines = [line] * max(1, body_chars // len(line))
+    deck = [{"type": "title", "title": "ベンチマーク用デッキ", "subtitle": "2026年　社内検証"}]
+    img_no = 0
+    for i in range(1, max(slides - 1, 1)):
+        if i % 10 == 1:
+            deck.append({"type": "chapter", "title": f"{i // 10 + 1}. セクション"})
+            continue
+        objs = []
+        for k in range(objects):
+            left = 0.5 + (k % 4) * 3.1
+            top = 4.3 + (k // 4) * 1.0
+            if k % 3 == 1:
+                objs.append({"type": "arrow", "left": left, "top": top + 0.2, "width": 0.6, "height": 0.5,
+                             "fill_color": "ED7D31"})
+            elif k % 3 == 2:
+                objs.append({"type": "text", "text": f"補足 {k}\n詳細テキスト", "left": left, "top": top,
+                             "width": 2.8, "height": 0.9, "font_size": 11})
+            else:
+                objs.append({"type": "box", "text": f"項目 {k}", "left": left, "top": top,
+                             "width": 2.5, "height": 0.9, "fill_color": "4472C4",
+                             "font_color": "FFFFFF", "font_size": 13})
+        imgs = []
+        for k in range(images):
+            imgs.append({"file": image_files[img_no % len(image_files)],
+                         "left": 7.3 + k * 0.4, "top": 1.5 + k * 0.4, "width": 5.0, "height": 3.0})
+            img_no += 1
+        slide = {"type": "content", "title": f"スライド {i}", "subtitle": "キーメッセージ",
+                 "body": "\n".join(body_lines), "objects": objs}
+        if imgs:
+            slide["images"] = imgs
+        deck.append(slide)
+    deck.append({"type": "end"})
+    return deck
+
+
+# ─── 計測 ─────────────────────────────────────────────
+def peak_rss_mb() -> float | None:
+    """このプロセスのピーク RSS（MB）。取得できない環境では None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 1e6  # Windows
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3  # macOS はバイト、Linux は KB
+
+
+def child(case: str, template_id: str, work_dir: Path, repeat: int):
+    """子プロセス側: 1ケースを repeat 回ビルドし、結果を JSON で標準出力の最終行に出す"""
+    import pptx_engine
+    from image_cache import ImageCache
+
+    params = CASES[case]
+    image_files = [f"images/fixture_{i:02d}.png" for i in range(FIXTURE_IMAGES)]
+    deck = synthetic_deck(image_files=image_files, **params)
+    base_mb = peak_rss_mb()
+    times = []
+    out = work_dir / f"{case}_{template_id}.pptx"
+    # 空の画像キャッシュから始める。レンディションは1回目に作られ、最小値は組み立て自体の時間になる
+    # （レンディション作成のコストは bench_image_rendition.py で測る）
+    pptx_engine.IMAGE_CACHE = ImageCache(work_dir / f"cache_{case}_{template_id}")
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            pptx_engine.build_pptx(deck, out, slides_dir=work_dir, template_id=template_id)
+            times.append(time.perf_counter() - t0)
+    wall = min(times)
+    print(json.dumps({
+        "case": case, "template": template_id, "params": params, "slides": len(deck),
+        "wall_s": wall, "per_slide_ms": wall / len(deck) * 1000,
+        "runs_s": times, "peak_rss_mb": peak_rss_mb(), "base_rss_mb": base_mb,
+        "output_bytes": out.stat().st_size,
+    }))
+
+
+def run_child(case: str, template_id: str, work_dir: Path, repeat: int) -> dict:
+    cmd = [sys.executable, __file__, "--child", case, template_id, str(work_dir), "--repeat", str(repeat)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8",
+                          env=dict(os.environ, PYTHONIOENCODING="utf-8"))
+    if proc.returncode != 0:
+        raise RuntimeError(f"{case}/{template_id} の計測に失敗しました:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# ─── 比較 ─────────────────────────────────────────────
+def compare(results: list[dict], baseline: list[dict],
+            time_threshold: float, memory_threshold: float) -> list[str]:
+    """ベースラインと比べて悪化した指標を 'case/template: 指標 ...' の形で返す"""
+    base = {(r["case"], r["template"]): r for r in baseline}
+    regressions = []
+    print(f"\n{'case/template':<26} {'wall':>16} {'peak RSS':>18} {'bytes':>16}")
+    for r in results:
+        b = base.get((r["case"], r["template"]))
+        label = f"{r['case']}/{r['template']}"
+        if b is None:
+            print(f"{label:<26} （ベースラインなし）")
+            continue
+        flags = []
+        dt = r["wall_s"] / b["wall_s"] - 1
+        if dt > time_threshold and r["wall_s"] - b["wall_s"] > TIME_NOISE_FLOOR:
+            flags.append(f"wall {dt:+.0%}")
+        dm = (r["peak_rss_mb"] or 0) / b["peak_rss_mb"] - 1 if b.get("peak_rss_mb") else 0
+        if dm > memory_threshold:
+            flags.append(f"peak RSS {dm:+.0%}")
+        db = r["output_bytes"] / b["output_bytes"] - 1
+        if db > BYTES_THRESHOLD:
+            flags.append(f"bytes {db:+.1%}")
+        print(f"{label:<26} {r['wall_s'] * 1000:>8.0f} ms {dt:>+5.0%}"
+              f" {r['peak_rss_mb'] or 0:>9.1f} MB {dm:>+5.0%}"
+              f" {r['output_bytes'] / 1e6:>8.2f} MB {db:>+5.1%}"
+              + ("   REGRESSION" if flags else ""))
+        if flags:
+            regressions.append(f"{label}: {', '.join(flags)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pptx_engine benchmark suite")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES),
+                        help="計測するケース（既定: 全ケース）")
+    parser.add_argument("--templates", nargs="+", default=TEMPLATES, help="計測するテンプレートID")
+    parser.add_argument("--repeat", type=int, default=3, help="ケースごとのビルド回数（最小値を採用）")
+    parser.add_argument("--output", help="結果 JSON の保存先（既定: bench/results/<日時>.json）")
+    parser.add_argument("--compare", metavar="BASELINE", help="比較するベースライン JSON")
+    parser.add_argument("--threshold", type=float, default=TIME_THRESHOLD,
+                        help="所要時間の悪化を REGRESSION とみなす割合（既定: 0.10）")
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD,
+                        help="ピークメモリの悪化を REGRESSION とみなす割合（既定: 0.10）")
+    parser.add_argument("--child", nargs=3, metavar=("CASE", "TEMPLATE", "WORK_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        case, template_id, work_dir = args.child
+        child(case, template_id, Path(work_dir), args.repeat)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        write_fixture_images(work_dir / "images")
+        for case in args.cases:
+            for template_id in args.templates:
+                r = run_child(case, template_id, work_dir, args.repeat)
+                print(f"  {case}/{template_id}: {r['wall_s'] * 1000:.0f} ms"
+                      f" ({r['per_slide_ms']:.1f} ms/枚), peak {r['peak_rss_mb'] or 0:.1f} MB,"
+                      f" {r['output_bytes'] / 1e6:.2f} MB")
+                results.append(r)
+
+    output = Path(args.output) if args.output else \
+        BENCH_DIR / "results" / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "platform": platform.platform(),
+        "repeat": args.repeat, "results": results,
+    }, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    print(f"\n{'='*72}")
+    print(f"{'case':<12} {'template':<12} {'slides':>6} {'wall':>10} {'ms/slide':>9} {'peak RSS':>10} {'bytes':>10}")
+    for r in results:
+        print(f"{r['case']:<12} {r['template']:<12} {r['slides']:>6} {r['wall_s'] * 1000:>7.0f} ms"
+              f" {r['per_slide_ms']:>9.1f} {r['peak_rss_mb'] or 0:>7.1f} MB {r['output_bytes'] / 1e6:>7.2f} MB")
+    print(f"{'='*72}")
+    print(f"結果: {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        if regressions:
+            print("\nREGRESSION:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nベースラインからの悪化なし")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+bench/bench_template_pool.py
+テンプレートプールのベンチマーク: 30枚デッキの cold / warm ビルド時間を比較する。
+
+使い方:
+  python bench/bench_template_pool.py
+  python bench/bench_template_pool.py --template jr_east --slides 30 --repeat 5
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pptx_engine  # noqa: E402
+
+
+def synthetic_outline(n_slides: int) -> list[dict]:
+    """title / chapter / content を混ぜた n_slides 枚のアウトライン（画像なし）"""
+    outline = [{"type": "title", "title": "ベンチマーク用デッキ", "subtitle": "2026年　社内検証"}]
+    for i in range(1, n_slides - 1):
+        if i % 10 == 1:
+            outline.append({"type": "chapter", "title": f"{i // 10 + 1}. セクション"})
+            continue
+        outline.append({
+            "type": "content",
+            "title": f"スライド {i}",
+            "subtitle": "キーメッセージ",
+            "body": "・項目1\n・項目2\n・項目3",
+            "objects": [
+                {"type": "box", "text": "現状", "left": 0.5, "top": 4.5, "width": 2.5, "height": 0.9,
+                 "fill_color": "404040", "font_color": "FFFFFF", "font_size": 13},
+                {"type": "arrow", "left": 3.1, "top": 4.7, "width": 0.6, "height": 0.5,
+                 "fill_color": "ED7D31"},
+                {"type": "box", "text": "目標", "left": 3.8, "top": 4.5, "width": 2.5, "height": 0.9,
+                 "fill_color": "4472C4", "font_color": "FFFFFF", "font_size": 13},
+            ],
+        })
+    outline.append({"type": "end"})
+    return outline
+
+
+def time_build(outline: list[dict], template_id: str, out_dir: Path) -> float:
+    t0 = time.perf_counter()
+    pptx_engine.build_pptx(outline, out_dir / "bench.pptx", template_id=template_id)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Template pool cold/warm benchmark")
+    parser.add_argument("--template", default=pptx_engine.DEFAULT_TEMPLATE_ID)
+    parser.add_argument("--slides", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    outline = synthetic_outline(args.slides)
+    config = pptx_engine.get_template_config(args.template)
+    cold, warm = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        for _ in range(args.repeat):
+            pptx_engine.TEMPLATE_POOL.invalidate(config)
+            cold.append(time_build(outline, args.template, out_dir))
+            warm.append(time_build(outline, args.template, out_dir))
+
+    cold_ms = min(cold) * 1000
+    warm_ms = min(warm) * 1000
+    print(f"\n{'='*60}")
+    print(f"Template: {args.template}  Slides: {args.slides}  Repeat: {args.repeat}")
+    print(f"  cold build : {cold_ms:8.1f} ms")
+    print(f"  warm build : {warm_ms:8.1f} ms")
+    print(f"  speed-up   : {cold_ms / warm_ms:8.2f} x")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+bench/bench_watch.py
+ウォッチモードのベンチマーク: 合成した Tier 2 フォルダーを ProjectWatcher で監視し、
+スライド JSON を1枚ずつ書き換えたときの「保存から出力更新まで」のレイテンシを計測する
+（ポーリング間隔・デバウンス・インクリメンタル結合・保存を含む）。
+
+使い方:
+  python bench/bench_watch.py
+  python bench/bench_watch.py --slides 20 --edits 10 --template jr_east
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from build_watch import ProjectWatcher  # noqa: E402
+from bench_template_pool import synthetic_outline  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch mode edit-to-output latency benchmark")
+    parser.add_argument("--slides", type=int, default=20)
+    parser.add_argument("--edits", type=int, default=10)
+    parser.add_argument("--template", default="sx_proposal")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        slides_dir = tmp / "slides"
+        slides_dir.mkdir()
+        files = []
+        for i, slide in enumerate(synthetic_outline(args.slides)):
+            path = slides_dir / f"{i:02d}_{slide['type']}.json"
+            path.write_text(json.dumps(slide, ensure_ascii=False), encoding="utf-8")
+            files.append((path, slide))
+
+        watcher = ProjectWatcher(slides_dir, tmp / "deck.pptx", args.template)
+        watcher.build()
+        thread = threading.Thread(target=watcher.run,
+                                  kwargs={"max_rebuilds": args.edits, "initial_build": False}, daemon=True)
+        thread.start()
+        time.sleep(0.3)
+        for n in range(args.edits):
+            path, slide = files[(n * 7 + 1) % len(files)]
+            slide = dict(slide, title=f"{slide.get('title', '')} 修正{n}")
+            path.write_text(json.dumps(slide, ensure_ascii=False), encoding="utf-8")
+            deadline = time.time() + 10
+            while len(watcher.rebuilds) < n + 2 and time.time() < deadline:
+                time.sleep(0.01)
+        thread.join(10)
+
+    latencies = [r["latency_seconds"] for r in watcher.rebuilds[1:]]
+    builds = [r["build_seconds"] for r in watcher.rebuilds[1:]]
+    print(f"\n{'='*60}")
+    print(f"Slides: {args.slides}  Template: {args.template}  Edits: {len(latencies)}")
+    print(f"  initial build          : {watcher.rebuilds[0]['build_seconds'] * 1000:8.1f} ms")
+    print(f"  rebuild (1 slide)      : {min(builds) * 1000:8.1f} ms (min)  {sum(builds) / len(builds) * 1000:8.1f} ms (avg)")
+    print(f"  edit -> updated file   : {min(latencies) * 1000:8.1f} ms (min)  {sum(latencies) / len(latencies) * 1000:8.1f} ms (avg)"
+          f"  {max(latencies) * 1000:8.1f} ms (max)")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+build_manifest.py
+インクリメンタル結合用のビルドマニフェスト
+
+出力 PPTX と同じフォルダーの .build/ に、前回ビルドで各スライドをレンダリングした
+結果（SlidePayload）をスライドキーごとに保存する。スライドキーは
+Tier 2 JSON の内容・テンプレート（pptx と profile.json）のハッシュ・参照画像ファイルの
+ハッシュ・画像 DPI 等のビルドオプションから求めるため、キーが一致するスライドは
+再レンダリングせずに再利用できる。
+
+  .build/
+  ├── manifest.json        # スライドキー・レイアウト・画像/外部リンクの対応表
+  ├── slides/<key>.xml     # レンダリング済み slide XML
+  └── media/<sha1>         # スライドが参照する画像（SHA1 で重複排除）
+"""
+
+import json
+import hashlib
+from pathlib import Path
+
+from cache_store import atomic_write, file_sha256
+from pptx_engine import SlidePayload, TemplateConfig
+
+BUILD_DIR_NAME = ".build"
+# レンダリング結果が変わるエンジン側の変更を入れたら上げる（全スライドが再レンダリングされる）
+MANIFEST_VERSION = 2
+
+
+class BuildManifest:
+    """
+    1つの出力フォルダーに対応するビルドマニフェスト。
+    lookup() で前回ビルドのペイロードを引き、record() で今回ビルドの
+    スライドを順に登録して、最後に save() で書き出す。
+    """
+
+    def __init__(self, output_path: Path, config: TemplateConfig,
+                 slides_dir: Path | None = None, render_options: dict | None = None,
+                 build_dir: Path | None = None):
+        # build_dir: 省略時は出力と同じフォルダーの .build/（複数テンプレートの同時ビルドでは
+        #            テンプレートごとに分けて、互いのパーツを消し合わないようにする）
+        self.build_dir = Path(build_dir) if build_dir else Path(output_path).parent / BUILD_DIR_NAME
+        self.slides_dir = Path(slides_dir) if slides_dir else None
+        self.manifest_path = self.build_dir / "manifest.json"
+
+        previous = {}
+        if self.manifest_path.exists():
+            try:
+                previous = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"  [incremental] マニフェストを読めないため全スライドを再レンダリング: {e}")
+        if previous.get("version") != MANIFEST_VERSION:
+            previous = {}
+
+        # 絶対パス -> [mtime_ns, size, sha256]（変更のないファイルを毎回ハッシュしないため）
+        self._files: dict[str, list] = previous.get("files", {})
+        self._previous = {e["key"]: e for e in previous.get("slides", [])}
+        self._slides: list[dict] = []
+        self._used_files: set[str] = set()
+        self.reused = 0
+        self.rendered = 0
+
+        self.template_key = self._hash_json({
+            "version": MANIFEST_VERSION,
+            "template": config.id,
+            "pptx": self._hash_file(Path(config.template_path)),
+            "profile": self._hash_file(config.profile_dir / "profile.json"),
+            "options": render_options or {},  # 画像 DPI 等、出力に影響するビルドオプション
+        })
+
+    # ── キー計算 ──
+    @staticmethod
+    def _hash_json(data) -> str:
+        raw = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _hash_file(self, path: Path) -> str | None:
+        """ファイルの sha256。mtime/サイズが前回と同じならマニフェストの値を使う。存在しなければ None。"""
+        key = str(path.resolve())
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        self._used_files.add(key)
+        cached = self._files.get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        sha = file_sha256(path)
+        self._files[key] = [st.st_mtime_ns, st.st_size, sha]
+        return sha
+
+    def _image_path(self, file_path: str) -> Path:
+        fp = Path(file_path)
+        if not fp.is_absolute() and self.slides_dir:
+            fp = self.slides_dir / fp
+        return fp
+
+    def slide_key(self, slide_data: dict) -> str:
+        """スライドの Tier 2 JSON・テンプレート・参照画像ファイルから決まるキー"""
+        images = [
+            self._hash_file(self._image_path(spec["file"]))
+            for spec in slide_data.get("images", [])
+            if isinstance(spec, dict) and spec.get("file")
+        ]
+        return self._hash_json({"template": self.template_key, "slide": slide_data, "images": images})
+
+    # ── ペイロードの出し入れ ──
+    def lookup(self, key: str) -> SlidePayload | None:
+        """前回ビルドで同じキーのスライドがあれば、そのペイロードを返す"""
+        entry = self._previous.get(key)
+        if entry is None:
+            return None
+        try:
+            xml = (self.build_dir / "slides" / f"{key}.xml").read_bytes()
+            images = {rId: (self.build_dir / "media" / sha1).read_bytes()
+                      for rId, sha1 in entry["images"].items()}
+        except OSError:
+            return None
+        external = {rId: tuple(v) for rId, v in entry["external"].items()}
+        return SlidePayload(entry["layout_index"], xml, images, external)
+
+    def record(self, key: str, payload: SlidePayload, reused: bool = False):
+        """今回ビルドのスライドを出力順に登録し、未保存のパーツを書き出す"""
+        slides_out = self.build_dir / "slides"
+        media_out = self.build_dir / "media"
+        slides_out.mkdir(parents=True, exist_ok=True)
+        media_out.mkdir(exist_ok=True)
+
+        xml_path = slides_out / f"{key}.xml"
+        if not xml_path.exists():
+            atomic_write(xml_path, payload.xml)
+        images = {}
+        for rId, blob in payload.images.items():
+            sha1 = hashlib.sha1(blob).hexdigest()
+            media_path = media_out / sha1
+            if not media_path.exists():
+                atomic_write(media_path, blob)
+            images[rId] = sha1
+
+        self._slides.append({
+            "key": key,
+            "layout_index": payload.layout_index,
+            "images": images,
+            "external": {rId: list(v) for rId, v in payload.external.items()},
+        })
+        if reused:
+            self.reused += 1
+        else:
+            self.rendered += 1
+
+    def save(self):
+        """マニフェストを書き出し、今回のビルドで参照されなくなったパーツを削除する"""
+        data = {
+            "version": MANIFEST_VERSION,
+            "template": self.template_key,
+            "files": {k: v for k, v in self._files.items() if k in self._used_files},
+            "slides": self._slides,
+        }
+        self.build_dir.mkdir(exist_ok=True)
+        atomic_write(self.manifest_path,
+                      json.dumps(data, ensure_ascii=False, indent=1).encode("utf-8"))
+
+        live_xml = {f"{e['key']}.xml" for e in self._slides}
+        live_media = {sha1 for e in self._slides for sha1 in e["images"].values()}
+        for sub, live in (("slides", live_xml), ("media", live_media)):
+            d = self.build_dir / sub
+            if d.is_dir():
+                for p in d.iterdir():
+                    if p.name not in live:
+                        p.unlink(missing_ok=True)
@@ -0,0 +1,227 @@
+"""
+build_memprofile.py
+ビルドのメモリ計測（tracemalloc をスライド単位・段階単位で集計する）
+
+build_trace.TRACER の区間（slide / add_images / render_image / save 等）の開始・終了ごとに
+tracemalloc の現在量とピークを読み、区間ごとに
+
+  保持量   = 終了時の現在量 - 開始時の現在量（区間が終わっても残ったメモリ）
+  ピーク増分 = 区間中のピーク - 開始時の現在量（一時的に膨らんだ分）
+
+を記録する。スライドの保持量の合計とテンプレート読み込みの保持量が、
+Presentation のオブジェクトモデルが抱えているメモリの目安になる。
+最初のスライドの直前と保存の直前で取ったスナップショットの差分から、
+ビルド中に確保されて残っている割り当て元（ファイル:行）の上位も表示する。
+
+  with MEMORY_PROFILER.session("mem.json"):   # True なら表示のみ、None/False なら何もしない
+      build ...
+
+計測はメインスレッドの区間だけ（プリフェッチのスレッドは対象外）。
+並列ワーカーのメモリは計測できないため、計測中の build_pptx は逐次レンダリングになる。
+"""
+
+import json
+import threading
+import tracemalloc
+from pathlib import Path
+
+import build_trace
+from build_trace import TRACER, _NULL_SPAN
+
+TOP_SITES = 15          # 表示する割り当て元の件数
+TOP_SLIDES = 10         # ピーク増分の大きいスライドを何枚表示するか
+TRACEBACK_FRAMES = 1    # tracemalloc が記録するフレーム数（割り当て元の行だけで十分）
+MB = 1024 * 1024
+
+
+class _Frame:
+    __slots__ = ("name", "args", "start", "peak", "children")
+
+    def __init__(self, name: str, args: dict, start: int):
+        self.name = name
+        self.args = args
+        self.start = start
+        self.peak = start
+        self.children: dict[str, int] = {}   # 子区間の args から拾う件数（objects / images）
+
+
+class MemoryProfiler:
+    """TRACER のリスナーとして区間ごとのメモリを集計する（シングルトン MEMORY_PROFILER を使う）"""
+
+    def __init__(self):
+        self.enabled = False
+        self._reset()
+
+    def _reset(self):
+        self._thread = None
+        self._started_tracemalloc = False
+        self._stack: list[_Frame] = []
+        self.stages: dict[str, dict] = {}
+        self.slides: list[dict] = []
+        self._baseline = None
+        self._before_save = None
+        self.template_bytes = 0
+        self.peak_bytes = 0
+
+    # ── TRACER からの通知 ──
+    def _fold_peak(self) -> int:
+        """前回からのピークを開いている全区間に反映してリセットし、現在量を返す"""
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self._stack:
+            if peak > frame.peak:
+                frame.peak = peak
+        self.peak_bytes = max(self.peak_bytes, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def enter(self, name: str, args: dict):
+        if threading.get_ident() != self._thread:
+            return
+        if name == "slide" and self._baseline is None:
+            self._baseline = tracemalloc.take_snapshot()
+        elif name == "save" and self._before_save is None:
+            self._before_save = tracemalloc.take_snapshot()
+        self._stack.append(_Frame(name, args, self._fold_peak()))
+
+    def exit(self, name: str, args: dict):
+        if threading.get_ident() != self._thread or not self._stack or self._stack[-1].name != name:
+            return
+        current = self._fold_peak()
+        frame = self._stack.pop()
+        retained = current - frame.start
+        peak = frame.peak - frame.start
+
+        stage = self.stages.setdefault(name, {"count": 0, "retained": 0, "max_peak": 0})
+        stage["count"] += 1
+        stage["retained"] += retained
+        stage["max_peak"] = max(stage["max_peak"], peak)
+
+        if name in ("add_objects", "add_images") and self._stack:
+            parent = self._stack[-1]
+            parent.children[name] = parent.children.get(name, 0) + args.get("count", 0)
+        elif name == "template_load":
+            self.template_bytes += retained
+        elif name == "slide":
+            self.slides.append({
+                "index": args.get("index"), "type": args.get("type"),
+                "objects": frame.children.get("add_objects", 0),
+                "images": frame.children.get("add_images", 0),
+                "reused": bool(args.get("reused")),
+                "retained": retained, "peak": peak,
+            })
+
+    # ── 開始・終了 ──
+    def start(self):
+        self._reset()
+        self.enabled = True
+        self._thread = threading.get_ident()
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(TRACEBACK_FRAMES)
+        tracemalloc.reset_peak()
+        TRACER.add_listener(self)
+
+    def stop(self) -> dict:
+        """計測を止めて集計結果を返す"""
+        TRACER.remove_listener(self)
+        self._fold_peak()
+        sites = []
+        if self._baseline is not None:
+            after = self._before_save or tracemalloc.take_snapshot()
+            # 計測自体（トレースイベント・スナップショット）と import の割り当ては除く
+            filters = [tracemalloc.Filter(False, f) for f in
+                       (tracemalloc.__file__, __file__, build_trace.__file__, "<frozen importlib._bootstrap*>")]
+            diff = after.filter_traces(filters).compare_to(self._baseline.filter_traces(filters), "lineno")
+            # compare_to は差の絶対値順なので、増えた割り当て元だけを増加量の順に並べ直す
+            grown = sorted((st for st in diff if st.size_diff > 0), key=lambda st: -st.size_diff)
+            for stat in grown[:TOP_SITES]:
+                frame = stat.traceback[0]
+                sites.append({"site": f"{frame.filename}:{frame.lineno}",
+                              "bytes": stat.size_diff, "count": stat.count_diff})
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        self.enabled = False
+        self._baseline = self._before_save = None
+
+        by_kind: dict[str, dict] = {}
+        for s in self.slides:
+            if s["reused"]:
+                continue
+            kind = f"{s['type']} (objects {s['objects']}, images {s['images']})"
+            k = by_kind.setdefault(kind, {"count": 0, "retained": 0, "peak": 0})
+            k["count"] += 1
+            k["retained"] += s["retained"]
+            k["peak"] = max(k["peak"], s["peak"])
+        return {
+            "peak_bytes": self.peak_bytes,
+            "presentation_bytes": self.template_bytes + sum(s["retained"] for s in self.slides),
+            "template_bytes": self.template_bytes,
+            "stages": self.stages,
+            "slides": self.slides,
+            "by_kind": by_kind,
+            "top_sites": sites,
+        }
+
+    def session(self, output: bool | str | Path | None):
+        """output が真なら計測して、抜けるときにレポートを表示する（パスなら JSON も書き出す）"""
+        if not output or self.enabled:
+            return _NULL_SPAN
+        return _MemorySession(self, None if output is True else Path(output))
+
+
+class _MemorySession:
+    def __init__(self, profiler: MemoryProfiler, path: Path | None):
+        self.profiler = profiler
+        self.path = path
+        self._own_tracer = False
+
+    def __enter__(self):
+        # トレースを書き出さないときも区間の通知を受けるため TRACER を動かす
+        self._own_tracer = not TRACER.enabled
+        if self._own_tracer:
+            TRACER.start()
+        self.profiler.start()
+        return self
+
+    def __exit__(self, *exc):
+        report = self.profiler.stop()
+        if self._own_tracer:
+            TRACER.stop()
+        print_report(report)
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(report, ensure_ascii=False, indent=1), encoding="utf-8")
+            print(f"  [memprofile] レポートを書き出し: {self.path}")
+        return False
+
+
+def print_report(report: dict):
+    print(f"\n  [memprofile] ピーク {report['peak_bytes'] / MB:.1f} MB / "
+          f"Presentation 保持 {report['presentation_bytes'] / MB:.1f} MB"
+          f"（テンプレート {report['template_bytes'] / MB:.1f} MB + スライド"
+          f" {(report['presentation_bytes'] - report['template_bytes']) / MB:.1f} MB）")
+
+    print(f"    {'段階':<20} {'回数':>5} {'保持合計':>10} {'最大ピーク増分':>14}")
+    for name, s in sorted(report["stages"].items(), key=lambda kv: -kv[1]["max_peak"]):
+        print(f"    {name:<20} {s['count']:>5} {s['retained'] / MB:>7.2f} MB {s['max_peak'] / MB:>11.2f} MB")
+
+    if report["by_kind"]:
+        print(f"    {'スライドの種類':<40} {'枚数':>4} {'平均保持':>10} {'最大ピーク増分':>14}")
+        for kind, k in sorted(report["by_kind"].items(), key=lambda kv: -kv[1]["peak"]):
+            print(f"    {kind:<40} {k['count']:>4} {k['retained'] / k['count'] / MB:>7.2f} MB"
+                  f" {k['peak'] / MB:>11.2f} MB")
+
+    slides = sorted(report["slides"], key=lambda s: -s["peak"])[:TOP_SLIDES]
+    if slides:
+        print(f"    ピーク増分の大きいスライド:")
+        for s in slides:
+            print(f"      [{s['index']}] {s['type']:<10} objects {s['objects']:>2} images {s['images']}"
+                  f"  保持 {s['retained'] / MB:6.2f} MB  ピーク増分 {s['peak'] / MB:6.2f} MB")
+
+    if report["top_sites"]:
+        print(f"    ビルド中に確保されて残っている割り当て元:")
+        for site in report["top_sites"]:
+            print(f"      {site['bytes'] / MB:7.2f} MB {site['count']:>7}個  {site['site']}")
+
+
+MEMORY_PROFILER = MemoryProfiler()
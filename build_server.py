@@ -0,0 +1,388 @@
+"""
+build_server.py
+常駐ビルドサーバー（import・テンプレート・スキーマバリデーター・画像キャッシュを温めたまま PPTX を組み立てる）
+
+generate_pptx.py を毎回起動すると、Python の起動・python-pptx / lxml / Pillow の import・
+テンプレートの読み込みだけで1枚目のレンダリング前に時間がかかる。サーバーを起動しておくと、
+generate_pptx.py はビルドをサーバーへ転送し（サーバーがなければ従来どおりプロセス内でビルド）、
+温まったワーカーが即座に組み立てる。
+
+  python build_server.py start [--port 8765] [--workers 2]   # フォアグラウンドで起動（Ctrl+C で停止）
+  python build_server.py status
+  python build_server.py stop
+  python build_server.py preview slides/.../03_content.json [--template jr_east] [--output preview.pptx]
+
+localhost の HTTP（JSON）で次の操作を受け付ける:
+  POST /build     {"outline": [...], "output_path": ..., "template_id": ..., "options": {...}}
+  POST /assemble  {"slides_dir": ..., "output_path": ..., "template_id": ..., "options": {...}}
+  POST /preview   {"slide": {...}, "output_path": ..., "template_id": ...}
+  GET  /status    POST /shutdown
+
+リクエストは HTTP のスレッドで受け、ワーカープロセスのプールで並行に処理する。
+各ワーカーは起動時に全テンプレートをテンプレートプールへ読み込み、スキーマのバリデーターを
+コンパイルしておく。画像キャッシュ（image_cache.py）はプロセス間で共有される。
+起動中のサーバーのアドレスと起動ごとのランダムなトークンは .cache/build_server.json（パーミッション 0600）に書き、
+クライアントはそれを見て転送先を決める。サーバーは X-Build-Token ヘッダーでトークンを送らない要求と、
+Content-Type が application/json でない POST を拒否する（カスタムヘッダーが必要なのでブラウザーからの
+要求は CORS のプリフライトで止まり、同じマシンの他のユーザーや Web ページからはビルドを起動できない）。
+
+このモジュールは標準ライブラリだけで import でき、http.server / urllib も使う関数の中で import する
+（クライアント側の起動を重くしないため）。
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import secrets
+import argparse
+import threading
+import contextlib
+from pathlib import Path
+
+from schema_validators import get_validator
+
+ROOT = Path(__file__).parent
+DEFAULT_PORT = int(os.getenv("PPTX_BUILD_SERVER_PORT", "8765"))
+DEFAULT_WORKERS = 2
+STATE_FILE = ROOT / ".cache" / "build_server.json"
+CONNECT_TIMEOUT = 0.5     # サーバーが応答しなければすぐプロセス内ビルドへフォールバックする
+BUILD_TIMEOUT = float(os.getenv("PPTX_BUILD_SERVER_TIMEOUT", "600"))   # 転送したビルドの応答待ち（秒）
+TOKEN_HEADER = "X-Build-Token"
+
+
+# ─── ワーカープロセス側 ───────────────────────────────
+def _schema_warnings(slides: list[tuple[str, dict]]) -> list[str]:
+    """Tier 2 スキーマに合わないスライドを警告として返す（ビルドは止めない）"""
+    try:
+        validator = get_validator("tier2")
+    except ImportError:
+        return []
+    warnings = []
+    for label, slide_data in slides:
+        for error in validator.iter_errors(slide_data):
+            where = " > ".join(str(p) for p in error.path) or "(root)"
+            warnings.append(f"{label}: {error.message} (at {where})")
+    return warnings
+
+
+def template_ids() -> list[str]:
+    return sorted(p.parent.name for p in (ROOT / "templates").glob("*/profile.json"))
+
+
+def warm_worker(templates: list[str]):
+    """ワーカーの初期化: エンジンを import し、テンプレートとバリデーターを読み込んでおく（batch_build のプールも使う）"""
+    import pptx_engine
+    for tid in templates:
+        try:
+            pptx_engine.TEMPLATE_POOL.acquire(pptx_engine.get_template_config(tid))
+        except Exception as e:  # 壊れたテンプレートがあってもワーカーは起動する
+            print(f"  [server] テンプレートを読み込めません: {tid} ({e})")
+    with contextlib.suppress(ImportError):
+        get_validator("tier2")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def run_job(op: str, params: dict) -> dict:
+    """
+    1件のビルドを実行する（ワーカープロセスで呼ばれる。プロセス内フォールバックでも同じ処理）。
+    Returns: {"ok", "path", "paths", "seconds", "warnings", "log", "error"}
+    """
+    import pptx_engine
+
+    log = io.StringIO()
+    t0 = time.perf_counter()
+    warnings: list[str] = []
+    try:
+        with contextlib.redirect_stdout(log):
+            options = params.get("options") or {}
+            template_id = params.get("template_id")
+            output_path = Path(params["output_path"])
+            slides_dir = Path(params["slides_dir"]) if params.get("slides_dir") else None
+            if op == "build":
+                path = pptx_engine.build_pptx(params["outline"], output_path, slides_dir=slides_dir,
+                                              template_id=template_id, **options)
+            elif op == "assemble":
+                warnings = _schema_warnings([(p.name, json.loads(p.read_text(encoding="utf-8")))
+                                             for p in sorted(slides_dir.glob("*.json"))])
+                path = pptx_engine.build_from_slides_dir(slides_dir, output_path,
+                                                         template_id=template_id, **options)
+            elif op == "preview":
+                slide = params["slide"]
+                warnings = _schema_warnings([("slide", slide)])
+                path = pptx_engine.build_pptx([slide], output_path, slides_dir=slides_dir,
+                                              template_id=template_id, **options)
+            else:
+                raise ValueError(f"不明な操作です: {op}")
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}", "log": log.getvalue(),
+                "seconds": time.perf_counter() - t0, "warnings": warnings}
+    # 複数テンプレートのビルドは出力パスのリストを返す（"path" は先頭）
+    paths = [str(p) for p in path] if isinstance(path, list) else [str(path)]
+    return {"ok": True, "path": paths[0], "paths": paths, "log": log.getvalue(),
+            "seconds": time.perf_counter() - t0, "warnings": warnings}
+
+
+# ─── サーバー ─────────────────────────────────────────
+class BuildServer:
+    """HTTP でビルド要求を受け、温めたワーカープロセスのプールで処理する"""
+
+    def __init__(self, port: int = DEFAULT_PORT, workers: int = DEFAULT_WORKERS,
+                 state_file: Path | None = STATE_FILE, templates: list[str] | None = None):
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.workers = workers
+        self.state_file = state_file
+        self.templates = templates if templates is not None else template_ids()
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=warm_worker,
+                                            initargs=(self.templates,))
+        from http.server import ThreadingHTTPServer
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+        self.port = self.httpd.server_address[1]
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.served = 0
+        self.failed = 0
+        self.active = 0
+        self.token = secrets.token_urlsafe(32)   # 起動ごとに作り直し、状態ファイル経由でクライアントへ渡す
+
+    def warm_up(self):
+        """ワーカーを全部起動して、初期化（テンプレート読み込み）が済むまで待つ"""
+        t0 = time.perf_counter()
+        futures = [self.executor.submit(_ping) for _ in range(self.workers)]
+        pids = {f.result() for f in futures}
+        print(f"  [server] ワーカー {len(pids)}個を起動（{', '.join(self.templates)}）:"
+              f" {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    def submit(self, op: str, params: dict) -> dict:
+        with self._lock:
+            self.active += 1
+        try:
+            result = self.executor.submit(run_job, op, params).result()
+        except Exception as e:  # ワーカーが落ちた等
+            result = {"ok": False, "error": f"{type(e).__name__}: {e}", "log": "", "warnings": []}
+        with self._lock:
+            self.active -= 1
+            self.served += 1
+            self.failed += 0 if result["ok"] else 1
+        status = f"{result.get('seconds', 0) * 1000:.0f} ms" if result["ok"] else result["error"]
+        print(f"  [server] {op}: {Path(params.get('output_path', '')).name} ({status})")
+        return result
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"pid": os.getpid(), "port": self.port, "workers": self.workers,
+                    "templates": self.templates, "uptime": time.time() - self.started,
+                    "served": self.served, "failed": self.failed, "active": self.active}
+
+    def serve_forever(self):
+        self.warm_up()
+        if self.state_file is not None:
+            self._write_state()
+        print(f"  [server] http://127.0.0.1:{self.port} で待機中（Ctrl+C で停止）")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def _write_state(self):
+        """状態ファイルを本人だけが読める 0600 で作ってから置き換える（トークンを他のユーザーに見せない）"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_file.with_name(f"{self.state_file.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"port": self.port, "pid": os.getpid(), "token": self.token}, f)
+        os.replace(tmp, self.state_file)
+
+    def shutdown(self):
+        """別スレッドから serve_forever() を止める"""
+        threading.Thread(target=self.httpd.shutdown, daemon=True).start()
+
+    def close(self):
+        self.httpd.server_close()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.state_file is not None:
+            with contextlib.suppress(OSError):
+                state = json.loads(self.state_file.read_text(encoding="utf-8"))
+                if state.get("pid") == os.getpid():
+                    self.state_file.unlink()
+
+
+def _make_handler(server: BuildServer):
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, data: dict):
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self) -> bool:
+            import hmac
+            token = self.headers.get(TOKEN_HEADER, "")
+            if hmac.compare_digest(token.encode("utf-8"), server.token.encode("utf-8")):
+                return True
+            self._send(403, {"ok": False, "error": "トークンがありません・一致しません"})
+            return False
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path == "/status":
+                self._send(200, server.status())
+            else:
+                self._send(404, {"ok": False, "error": f"not found: {self.path}"})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type != "application/json":
+                self._send(415, {"ok": False, "error": f"Content-Type は application/json のみ受け付けます: {content_type}"})
+                return
+            op = self.path.strip("/")
+            if op == "shutdown":
+                self._send(200, {"ok": True})
+                server.shutdown()
+                return
+            if op not in ("build", "assemble", "preview"):
+                self._send(404, {"ok": False, "error": f"not found: {self.path}"})
+                return
+            try:
+                params = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError as e:
+                self._send(400, {"ok": False, "error": f"JSON を読めません: {e}"})
+                return
+            self._send(200, server.submit(op, params))
+
+        def log_message(self, format, *args):  # リクエストごとのアクセスログは出さない
+            pass
+
+    return Handler
+
+
+# ─── クライアント ─────────────────────────────────────
+def server_state(state_file: Path = STATE_FILE) -> tuple[str, str] | None:
+    """起動中のサーバーの (URL, トークン)（状態ファイルがなければ None）"""
+    try:
+        state = json.loads(state_file.read_text(encoding="utf-8"))
+        return f"http://127.0.0.1:{int(state['port'])}", str(state["token"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def server_url(state_file: Path = STATE_FILE) -> str | None:
+    """起動中のサーバーの URL（状態ファイルがなければ None）"""
+    state = server_state(state_file)
+    return state[0] if state else None
+
+
+def _request(url: str, data: dict | None = None, timeout: float | None = None, token: str = "") -> dict:
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8") if data is not None else None
+    import urllib.request
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json", TOKEN_HEADER: token})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def forward(op: str, params: dict, state_file: Path = STATE_FILE, timeout: float | None = None) -> dict | None:
+    """
+    起動中のサーバーへビルドを転送し、結果（run_job() と同じ形）を返す。
+    サーバーが起動していない・応答しない・要求を受け付けなかった場合は None（呼び出し側はプロセス内でビルドする）。
+    要求を送った後に timeout 秒（省略時は BUILD_TIMEOUT）以内に結果が返らない・接続が切れた場合は
+    {"ok": False, "error": ...} を返す。サーバー側のビルドは続いているので、同じ出力先・マニフェストへ
+    手元で二重にビルドしないよう、呼び出し側はフォールバックせずにエラーで終わる。
+    """
+    import urllib.error
+    state = server_state(state_file)
+    if state is None:
+        return None
+    url, token = state
+    try:
+        _request(f"{url}/status", timeout=CONNECT_TIMEOUT, token=token)
+    except (OSError, ValueError):
+        return None
+    print(f"  [server] ビルドサーバーへ転送: {url}/{op}")
+    try:
+        return _request(f"{url}/{op}", params, timeout=timeout or BUILD_TIMEOUT, token=token)
+    except urllib.error.HTTPError as e:   # 受け付けられなかった（ビルドは始まっていない）
+        print(f"  [server] ビルドサーバーが要求を拒否しました（プロセス内でビルドします）: {e}")
+        return None
+    except urllib.error.URLError as e:
+        if isinstance(e.reason, ConnectionRefusedError):   # 確認後に停止した（ビルドは始まっていない）
+            print(f"  [server] ビルドサーバーに接続できません（プロセス内でビルドします）: {e.reason}")
+            return None
+        error = f"{type(e).__name__}: {e.reason}"
+    except (OSError, ValueError) as e:   # 読み取りのタイムアウト・接続断・壊れた応答
+        error = f"{type(e).__name__}: {e}"
+    return {"ok": False, "error": f"ビルドサーバーから結果を受け取れません（サーバー側のビルドは続いている"
+                                  f"可能性があります。status で確認してください）: {error}",
+            "log": "", "warnings": []}
+
+
+def print_result(result: dict):
+    """サーバー側のビルドログと警告をクライアントの標準出力に流す"""
+    if result.get("log"):
+        print(result["log"], end="")
+    for warning in result.get("warnings", []):
+        print(f"  [schema] {warning}")
+
+
+# ─── CLI ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="PPTX build server")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_start = sub.add_parser("start", help="サーバーを起動する（フォアグラウンド）")
+    p_start.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p_start.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="ワーカープロセス数")
+    sub.add_parser("status", help="起動中のサーバーの状態を表示する")
+    sub.add_parser("stop", help="起動中のサーバーを停止する")
+    p_preview = sub.add_parser("preview", help="Tier 2 スライド1枚だけの PPTX を作る")
+    p_preview.add_argument("slide", help="Tier 2 スライド JSON")
+    p_preview.add_argument("--template", help="テンプレートID")
+    p_preview.add_argument("--output", help="出力先（省略時は <slide>.preview.pptx）")
+    args = parser.parse_args()
+
+    if args.command == "start":
+        BuildServer(port=args.port, workers=args.workers).serve_forever()
+        return
+
+    state = server_state()
+    if args.command in ("status", "stop"):
+        try:
+            url, token = state or (None, "")
+            result = _request(f"{url}/status" if args.command == "status" else f"{url}/shutdown",
+                              {} if args.command == "stop" else None, timeout=CONNECT_TIMEOUT,
+                              token=token) if url else None
+        except (OSError, ValueError):
+            result = None
+        if result is None:
+            print("ビルドサーバーは起動していません")
+            sys.exit(1)
+        print(json.dumps(result, ensure_ascii=False, indent=2) if args.command == "status" else "停止しました")
+        return
+
+    slide_path = Path(args.slide).resolve()
+    params = {"slide": json.loads(slide_path.read_text(encoding="utf-8")),
+              "slides_dir": str(slide_path.parent), "template_id": args.template,
+              "output_path": str(Path(args.output).resolve() if args.output
+                                 else slide_path.with_suffix(".preview.pptx"))}
+    result = forward("preview", params)
+    if result is None:
+        result = run_job("preview", params)
+    print_result(result)
+    if not result["ok"]:
+        print(f"エラー: {result['error']}")
+        sys.exit(1)
+    print(f"完了: {result['path']} ({result['seconds'] * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
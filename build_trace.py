@@ -0,0 +1,148 @@
+"""
+build_trace.py
+ビルドパイプラインの区間計測（Chrome / Perfetto のトレースイベント形式）
+
+  with TRACER.session("trace.json"):          # 計測の開始〜書き出し（None なら何もしない）
+      with TRACER.span("add_slide", index=3, type="content"):
+          ...
+
+計測していないときの span() は共有の空コンテキストマネージャーを返すだけなので、
+ホットパスに残しておいてもコストはほぼゼロ。書き出した JSON は chrome://tracing や
+https://ui.perfetto.dev で開ける。並列ビルドのワーカーは自分のイベントを
+stop() で取り出して親プロセスへ返し、親が merge() でまとめる。
+add_listener() で登録したオブジェクトには各区間の開始・終了が通知される
+（build_memprofile.py のメモリ計測はこれを使う）。
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+
+
+class _NullSpan:
+    """計測していないときの span()（何もしない）"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("events", "listeners", "name", "cat", "args", "t0")
+
+    def __init__(self, events: list, listeners: tuple, name: str, cat: str, args: dict):
+        self.events = events
+        self.listeners = listeners
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        for listener in self.listeners:
+            listener.enter(self.name, self.args)
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        t1 = time.perf_counter_ns()
+        for listener in self.listeners:
+            listener.exit(self.name, self.args)
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        # list.append はスレッドセーフなのでロック不要（プリフェッチのスレッドからも呼ばれる）
+        self.events.append({
+            "name": self.name, "cat": self.cat, "ph": "X",
+            "ts": self.t0 / 1000, "dur": (t1 - self.t0) / 1000,
+            "pid": os.getpid(), "tid": threading.get_native_id(),
+            "args": self.args,
+        })
+        return False
+
+
+class BuildTracer:
+    """プロセス内のトレースイベントを集める（モジュール単位のシングルトン TRACER を使う）"""
+
+    def __init__(self):
+        self._events: list[dict] | None = None
+        self._listeners: tuple = ()
+
+    @property
+    def enabled(self) -> bool:
+        return self._events is not None
+
+    def start(self):
+        self._events = []
+        self._name_process("build" if not self._is_worker() else f"worker {os.getpid()}")
+
+    def stop(self) -> list[dict]:
+        """計測を止めて、集めたイベントを返す"""
+        events, self._events = self._events or [], None
+        return events
+
+    def span(self, name: str, cat: str = "build", **args):
+        """区間を計測するコンテキストマネージャー。args はトレースビューアーに表示される"""
+        if self._events is None:
+            return _NULL_SPAN
+        return _Span(self._events, self._listeners, name, cat, args)
+
+    def add_listener(self, listener):
+        """区間の開始・終了を listener.enter(name, args) / listener.exit(name, args) で通知する"""
+        self._listeners += (listener,)
+
+    def remove_listener(self, listener):
+        self._listeners = tuple(x for x in self._listeners if x is not listener)
+
+    def merge(self, events: list[dict]):
+        """ワーカープロセスから受け取ったイベントを取り込む"""
+        if self._events is not None:
+            self._events.extend(events)
+
+    def write(self, path: str | Path, events: list[dict] | None = None) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"traceEvents": events if events is not None else (self._events or []),
+                "displayTimeUnit": "ms"}
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def session(self, path: str | Path | None):
+        """path を指定したときだけ計測して、抜けるときに書き出す（入れ子の session は外側に任せる）"""
+        if path is None or self.enabled:
+            return _NULL_SPAN
+        return _TraceSession(self, Path(path))
+
+    def _is_worker(self) -> bool:
+        import multiprocessing
+        return multiprocessing.parent_process() is not None
+
+    def _name_process(self, name: str):
+        self._events.append({"name": "process_name", "ph": "M", "pid": os.getpid(),
+                             "tid": 0, "args": {"name": name}})
+
+
+class _TraceSession:
+    def __init__(self, tracer: BuildTracer, path: Path):
+        self.tracer = tracer
+        self.path = path
+
+    def __enter__(self):
+        self.tracer.start()
+        return self
+
+    def __exit__(self, *exc):
+        events = self.tracer.stop()
+        self.tracer.write(self.path, events)
+        spans = sum(1 for e in events if e["ph"] == "X")
+        print(f"  [trace] {spans}区間を書き出し: {self.path}（chrome://tracing / ui.perfetto.dev で表示）")
+        return False
+
+
+TRACER = BuildTracer()
@@ -0,0 +1,154 @@
+"""
+build_watch.py
+ウォッチモード: Tier 2 ファイルの変更を監視して、変わったスライドだけを再ビルドする
+
+  python generate_pptx.py --assemble-only --project X --watch
+
+slides/<project>/slides/*.json・そこから参照される画像ファイル・テンプレート（pptx と profile.json）を
+ポーリングで監視し（追加の依存なし）、変更が落ち着いたら（デバウンス）固定の出力パスへ結合し直す。
+プロセスを起動したままなので import・テンプレートプール・画像キャッシュは温まったままで、
+ビルドマニフェスト（build_manifest.py）により変更のないスライドはレンダリング結果を再利用する。
+テンプレートが変わった場合はマニフェストのキーが変わるため全スライドが再レンダリングされる。
+
+出力は一時ファイルへ保存してから置き換えるので、ビューアーが書きかけのファイルを読むことはない
+（PowerPoint で開いたままだと Windows では置き換えられないため、確認するときは閉じるか別名で開く）。
+再ビルドのたびに「最後の保存から出力更新まで」のレイテンシを表示する。
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+
+POLL_INTERVAL = 0.1    # 秒。stat を取るだけなので 20 枚程度なら負荷は無視できる
+DEBOUNCE = 0.2         # 秒。最後の変更からこの時間、変更がなければ再ビルドする
+
+
+class ProjectWatcher:
+    """1プロジェクトの Tier 2 フォルダーを監視して再ビルドする"""
+
+    def __init__(self, slides_dir: Path, output_path: Path, template_id: str | None = None,
+                 options: dict | None = None, interval: float = POLL_INTERVAL, debounce: float = DEBOUNCE):
+        self.slides_dir = Path(slides_dir)
+        self.output_path = Path(output_path)
+        self.template_id = template_id
+        self.options = dict(options or {})
+        self.options.setdefault("incremental", True)
+        self.interval = interval
+        self.debounce = debounce
+        # スライド JSON -> ((mtime_ns, size), 参照画像のパス)。変わった JSON だけ読み直す
+        self._refs: dict[Path, tuple[tuple[int, int], list[Path]]] = {}
+        self.rebuilds: list[dict] = []
+
+    # ── 監視対象 ──
+    def _template_files(self) -> list[Path]:
+        from pptx_engine import get_template_config
+        try:
+            config = get_template_config(self.template_id)
+        except (FileNotFoundError, ValueError, KeyError):
+            return []
+        return [Path(config.template_path), config.profile_dir / "profile.json"]
+
+    def _image_refs(self, json_path: Path, st: os.stat_result) -> list[Path]:
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._refs.get(json_path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        paths = []
+        try:
+            slide = json.loads(json_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            slide = None  # 保存途中などで読めない JSON は、次の変更で読み直す
+        if isinstance(slide, dict):
+            for spec in slide.get("images", []):
+                if isinstance(spec, dict) and spec.get("file"):
+                    fp = Path(spec["file"])
+                    paths.append(fp if fp.is_absolute() else self.slides_dir / fp)
+        self._refs[json_path] = (stamp, paths)
+        return paths
+
+    def snapshot(self) -> dict[Path, tuple[int, int]]:
+        """監視対象のファイル -> (mtime_ns, size)"""
+        state = {}
+        others = set(self._template_files())
+        for p in self.slides_dir.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            state[p] = (st.st_mtime_ns, st.st_size)
+            others.update(self._image_refs(p, st))
+        for p in self._refs.keys() - state.keys():
+            del self._refs[p]
+        for p in others:
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            state[p] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    @staticmethod
+    def diff(before: dict, after: dict) -> set[Path]:
+        """追加・削除・変更されたファイル"""
+        return {p for p in before.keys() | after.keys() if before.get(p) != after.get(p)}
+
+    # ── ビルド ──
+    def build(self, changed: set[Path] | None = None, edited_at: float | None = None) -> bool:
+        """
+        出力を作り直す。一時ファイルへ保存して置き換える（マニフェストは出力と同じフォルダーの .build/）。
+        edited_at: 最後にファイルが保存された時刻（time.time()）。指定時は保存→出力更新のレイテンシを表示する
+        """
+        from pptx_engine import build_from_slides_dir
+
+        label = ", ".join(sorted(p.name for p in changed)) if changed else "初回"
+        tmp = self.output_path.with_name(f".{self.output_path.stem}.watch.pptx")
+        t0 = time.perf_counter()
+        try:
+            build_from_slides_dir(self.slides_dir, tmp, template_id=self.template_id, **self.options)
+            os.replace(tmp, self.output_path)
+        except PermissionError as e:
+            print(f"  [watch] 出力を置き換えられません（PowerPoint で開いていれば閉じてください）: {e}")
+            return False
+        except Exception as e:  # 編集途中の JSON 等。次の変更を待って再試行する
+            print(f"  [watch] ビルド失敗（{label}）: {type(e).__name__}: {e}")
+            return False
+        finally:
+            tmp.unlink(missing_ok=True)
+        build_seconds = time.perf_counter() - t0
+        record = {"changed": sorted(str(p) for p in changed or ()), "build_seconds": build_seconds}
+        msg = f"  [watch] 更新 {self.output_path.name}（{label}）ビルド {build_seconds * 1000:.0f} ms"
+        if edited_at is not None:
+            record["latency_seconds"] = time.time() - edited_at
+            msg += f" / 保存から更新まで {record['latency_seconds'] * 1000:.0f} ms"
+        self.rebuilds.append(record)
+        print(msg)
+        return True
+
+    def run(self, max_rebuilds: int | None = None, initial_build: bool = True):
+        """Ctrl+C（または max_rebuilds 回の再ビルド）まで監視する"""
+        if initial_build:
+            self.build()
+        state = self.snapshot()
+        print(f"  [watch] 監視中: {self.slides_dir}（{len(state)}ファイル、Ctrl+C で終了）")
+        pending: set[Path] = set()
+        last_change = 0.0
+        rebuilt = 0
+        try:
+            while max_rebuilds is None or rebuilt < max_rebuilds:
+                time.sleep(self.interval)
+                current = self.snapshot()
+                changed = self.diff(state, current)
+                state = current
+                if changed:
+                    pending |= changed
+                    last_change = time.monotonic()
+                    continue
+                if pending and time.monotonic() - last_change >= self.debounce:
+                    mtimes = [state[p][0] / 1e9 for p in pending if p in state]
+                    self.build(pending, edited_at=max(mtimes) if mtimes else None)
+                    pending = set()
+                    rebuilt += 1
+                    # ビルド中の変更は次のポーリングで拾う（スナップショットはビルド前のもの）
+        except KeyboardInterrupt:
+            print("\n  [watch] 終了")
@@ -0,0 +1,96 @@
+"""
+cache_store.py
+ディスクキャッシュの共通部品（プロセス間ロック・index.json のトランザクション・原子的な書き込み・ファイルハッシュ）
+
+image_cache.py（生成画像・レンディション）と response_cache.py（モデル応答）が同じ方式で使う。
+atomic_write と file_sha256 は build_manifest.py（.build/ の保存）と pptx_engine.py（テンプレートのハッシュ）も使う。
+
+  <cache_dir>/
+  ├── index.json          # キャッシュごとの索引（形はキャッシュ側が決める）
+  └── .lock               # プロセス間ロック（index.json の読み書き中だけ存在）
+
+  with IndexTransaction(cache_dir, thread_lock) as index:   # index.json を読んだ dict
+      index["..."] = ...                                     # 例外なく抜けたら書き戻す
+
+index.json の更新はロックファイルで直列化し、一時ファイル経由の os.replace で書き込むため、
+複数のビルドが同時に動いても壊れない。
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+LOCK_STALE_SECONDS = 30.0
+
+
+class IndexTransaction:
+    """
+    with ブロックの間プロセス間ロックを握り、<cache_dir>/index.json を読んで終了時に書き戻す。
+    lock: 同じプロセスのスレッド間で共有する threading.Lock（ロックファイルの前に取る）
+    """
+
+    def __init__(self, cache_dir: Path, lock: threading.Lock):
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / "index.json"
+        self.lock_path = self.cache_dir / ".lock"
+        self.lock = lock
+
+    def __enter__(self) -> dict:
+        self.lock.acquire()
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            acquire_lock_file(self.lock_path)
+        except BaseException:
+            self.lock.release()
+            raise
+        try:
+            self.index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.index = {}
+        return self.index
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                atomic_write(self.index_path, json.dumps(self.index, ensure_ascii=False).encode("utf-8"))
+        finally:
+            self.lock_path.unlink(missing_ok=True)
+            self.lock.release()
+        return False
+
+
+def acquire_lock_file(lock_path: Path):
+    """O_EXCL でロックファイルを作れるまで待つ。古すぎるロックは異常終了の残骸とみなして消す。"""
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            return
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime > LOCK_STALE_SECONDS:
+                    lock_path.unlink(missing_ok=True)
+                    continue
+            except OSError:
+                continue
+            time.sleep(0.005)
+
+
+def atomic_write(path: Path, data: bytes):
+    """一時ファイルに書いてから os.replace で置き換える（読み手は書きかけのファイルを見ない）"""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def file_sha256(path: Path) -> str:
+    """ファイル内容の SHA-256（1 MiB ずつ読む）"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
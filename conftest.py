@@ -0,0 +1,21 @@
+"""
+conftest.py
+pytest 共通フィクスチャ
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_image_cache(tmp_path, monkeypatch):
+    """生成画像の共有キャッシュをテストごとの一時フォルダーに差し替える"""
+    import pptx_engine
+    from image_cache import ImageCache
+    monkeypatch.setattr(pptx_engine, "IMAGE_CACHE", ImageCache(tmp_path / "image_cache"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_response_cache(tmp_path, monkeypatch):
+    """モデル応答のキャッシュをテストごとの一時フォルダーに差し替える"""
+    import response_cache
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE", response_cache.ResponseCache(tmp_path / "response_cache"))
@@ -7,6 +7,8 @@ Claude Code（VSCode）から直接呼び出すPPTX生成CLIツール
   python generate_pptx.py --recipe recipes/dx_manufacturing.json
   python generate_pptx.py --recipe recipes/dx_manufacturing.json --no-image
   python generate_pptx.py --outline outline.json   # 既存JSONから生成
+  python generate_pptx.py batch                    # slides/ 以下の全プロジェクトを一括結合
+  python generate_pptx.py expand --project <名前>  # Tier 2 スタブをモデルで同時に展開
 
 生成されたPPTXは output/ に保存され、git commitされる。
 """
@@ -15,17 +17,19 @@ import os
 import sys
 import json
 import argparse
-import subprocess
 from datetime import datetime
 from pathlib import Path
-from dotenv import load_dotenv
-
-load_dotenv()
 
+# 起動を軽くするため、dotenv・subprocess・pptx_engine 等は使う処理の中で import する
+# （--help や転送のみの結合で python-pptx 等を読み込まない。test_import_budget.py で検証）
 RECIPES_DIR = Path(__file__).parent / "recipes"
 SLIDES_DIR  = Path(__file__).parent / "slides"
-RECIPES_DIR.mkdir(exist_ok=True)
-SLIDES_DIR.mkdir(exist_ok=True)
+
+
+def load_env():
+    """.env の API キー等を環境変数に読み込む"""
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # ─── Claude API でアウトライン生成 ────────────────────
 OUTLINE_SYSTEM_PROMPT = """あなたはプロのコンサルタントです。
@@ -66,30 +70,80 @@ OUTLINE_SYSTEM_PROMPT = """あなたはプロのコンサルタントです。
 - JSON配列のみ返すこと
 """
 
-def generate_outline_with_claude(description: str) -> list[dict]:
-    import anthropic
-    key = os.getenv("ANTHROPIC_API_KEY", "")
-    if not key:
-        raise ValueError("ANTHROPIC_API_KEY が設定されていません")
-    client = anthropic.Anthropic(api_key=key)
-    print(f"Claude にアウトライン生成を依頼中...")
-    response = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=8192,
-        system=OUTLINE_SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": description}],
-    )
-    raw = response.content[0].text.strip()
-    # マークダウンブロック対応
-    if raw.startswith("```"):
-        raw = raw.split("```")[1]
-        if raw.startswith("json"):
-            raw = raw[4:]
-        raw = raw.strip()
-    return json.loads(raw)
+def outline_cache_params(description: str) -> dict:
+    """アウトライン生成の応答キャッシュのキー（プロンプトやモデルを変えれば別エントリになる）"""
+    from outline_stream import OUTLINE_MODEL, OUTLINE_MAX_TOKENS
+    from response_cache import text_sha256
+    return {"description": description, "system_sha256": text_sha256(OUTLINE_SYSTEM_PROMPT),
+            "model": OUTLINE_MODEL, "max_tokens": OUTLINE_MAX_TOKENS}
+
+
+def generate_outline_with_claude(description: str, use_cache: bool = True, refresh: bool = False) -> list[dict]:
+    """
+    Claude にアウトラインを生成させる。同じ説明文・プロンプト・モデルの応答は
+    response_cache に保存したものを返す（use_cache=False: --no-cache / refresh=True: --refresh）。
+    """
+    from response_cache import RESPONSE_CACHE
+    params = outline_cache_params(description)
+
+    def request() -> list[dict]:
+        import anthropic
+        key = os.getenv("ANTHROPIC_API_KEY", "")
+        if not key:
+            raise ValueError("ANTHROPIC_API_KEY が設定されていません")
+        client = anthropic.Anthropic(api_key=key)
+        print(f"Claude にアウトライン生成を依頼中...")
+        response = client.messages.create(
+            model=params["model"],
+            max_tokens=params["max_tokens"],
+            system=OUTLINE_SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": description}],
+        )
+        raw = response.content[0].text.strip()
+        # マークダウンブロック対応
+        if raw.startswith("```"):
+            raw = raw.split("```")[1]
+            if raw.startswith("json"):
+                raw = raw[4:]
+            raw = raw.strip()
+        return json.loads(raw)   # 解析できない応答はキャッシュしない
+
+    return RESPONSE_CACHE.call("outline", params, request, use_cache=use_cache, refresh=refresh)
+
+def stream_outline_build(description: str, args) -> tuple[list[dict], Path]:
+    """
+    Claude の出力を受け取りながらスライドをレンダリングする（--stream-outline）。
+    出力名はアウトラインの1枚目のタイトルから決まるため、一時ファイルへビルドして後で移動する。
+    Returns: (アウトライン, ビルド済みの一時 PPTX)
+    """
+    import tempfile
+    from outline_stream import StreamingOutlineBuild, claude_text_stream, iter_outline_slides
+    from response_cache import RESPONSE_CACHE
+    template_id, _ = template_choice(args.template, None)
+    params = outline_cache_params(description)
+    cached = None if args.no_cache or args.refresh else RESPONSE_CACHE.get("outline", params)
+    received: list[str] = []
+    if cached is not None:
+        print(f"  [response-cache] outline: キャッシュを使用（--refresh で再取得）")
+        chunks = [json.dumps(cached, ensure_ascii=False)]
+    else:
+        print(f"Claude にアウトライン生成を依頼中（ストリーミング）...")
+        chunks = claude_text_stream(description, system=OUTLINE_SYSTEM_PROMPT,
+                                    model=params["model"], max_tokens=params["max_tokens"])
+    build = StreamingOutlineBuild(
+        (received.append(chunk) or chunk for chunk in chunks),
+        Path(tempfile.mkdtemp(prefix="pptx_stream_")) / "stream.pptx", template_id=template_id,
+        image_concurrency=args.image_concurrency, image_timeout=args.image_timeout,
+        image_dpi=args.image_dpi, drop_images=args.no_image)
+    path = build.run()
+    if cached is None and not args.no_cache:
+        # build.outline は検証で飛ばしたスライド・--no-image を反映済みなので、受信した応答そのものを保存する
+        RESPONSE_CACHE.put("outline", params, list(iter_outline_slides(received, validate=False)))
+    return build.outline, path
 
 # ─── git commit helper ───────────────────────────────
 def git_commit(filepath: Path, message: str):
+    import subprocess
     try:
         subprocess.run(["git", "add", str(filepath)], cwd=filepath.parent, check=True, capture_output=True)
         subprocess.run(["git", "commit", "-m", message], cwd=filepath.parent, check=True, capture_output=True)
@@ -98,9 +152,83 @@ def git_commit(filepath: Path, message: str):
     except subprocess.CalledProcessError as e:
         print(f"  [git] 失敗（手動でpushしてください）: {e}")
 
+def open_in_powerpoint(path: Path):
+    import subprocess
+    subprocess.Popen(["powershell", "-Command", f"Start-Process '{path}'"])
+
+# ─── ビルド（ビルドサーバーへの転送 or プロセス内） ─────
+def build_options(args, assemble: bool) -> dict:
+    """CLI 引数から pptx_engine のビルドオプションを作る（サーバーへ送れるよう JSON にできる値だけ）"""
+    options = {
+        "export_png": args.thumbnail,
+        "workers": args.jobs,
+        "image_concurrency": args.image_concurrency,
+        "image_timeout": args.image_timeout,
+        "image_dpi": args.image_dpi,
+        "prune_unused_layouts": args.prune_layouts,
+        "trace_path": str(Path(args.trace).resolve()) if args.trace else None,
+        "memprofile": str(Path(args.memprofile).resolve()) if isinstance(args.memprofile, str) else args.memprofile,
+    }
+    if assemble:
+        options.update(incremental=not args.full_rebuild, streaming=args.stream)
+    return options
+
+
+def run_build(op: str, params: dict, args) -> list[Path]:
+    """
+    ビルドサーバー（build_server.py）が起動していれば転送し、なければプロセス内でビルドする。
+    転送した後の失敗（タイムアウト・接続断を含む）はプロセス内でビルドし直さずにエラーで終了する
+    （サーバー側のビルドと同じ出力先・.build/ に同時に書かないため）。
+    op: "assemble"（Tier 2 フォルダーの結合）/ "build"（アウトラインから生成）
+    Returns: 出力パスのリスト（テンプレートを複数指定したときはテンプレートごと）
+    """
+    if not args.no_server:
+        from build_server import forward, print_result
+        result = forward(op, params)
+        if result is not None:
+            print_result(result)
+            if not result["ok"]:
+                print(f"エラー: {result['error']}")
+                sys.exit(1)
+            return [Path(p) for p in result.get("paths", [result["path"]])]
+    import pptx_engine
+    if op == "assemble":
+        path = pptx_engine.build_from_slides_dir(Path(params["slides_dir"]), Path(params["output_path"]),
+                                                 template_id=params["template_id"], **params["options"])
+    else:
+        path = pptx_engine.build_pptx(params["outline"], Path(params["output_path"]),
+                                      template_id=params["template_id"], **params["options"])
+    return path if isinstance(path, list) else [path]
+
+
+def template_choice(cli_templates: list[str] | None, default: str | None) -> tuple:
+    """
+    --template（複数可）と outline.json の値から (build へ渡す template_id, ファイル名用ラベル) を決める。
+    複数指定時は template_id がリストになり、ラベルは pptx_engine.template_output_path が置き換える {template}
+    """
+    ids = list(dict.fromkeys(cli_templates)) if cli_templates else [default]
+    if len(ids) > 1:
+        return ids, "{template}"
+    return ids[0], ids[0] or "sx_proposal"
+
 # ─── メイン ──────────────────────────────────────────
 def main():
-    parser = argparse.ArgumentParser(description="AI PowerPoint Generator CLI")
+    # ─ batch: slides/ 以下の全プロジェクトを一括結合（batch_build.py） ─
+    if sys.argv[1:2] == ["batch"]:
+        from batch_build import main as batch_main
+        load_env()
+        batch_main(sys.argv[2:])
+        return
+    # ─ expand: Tier 2 スタブを同時に展開（tier2_expander.py） ─
+    if sys.argv[1:2] == ["expand"]:
+        from tier2_expander import main as expand_main
+        load_env()
+        expand_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description="AI PowerPoint Generator CLI",
+                                     epilog="複数プロジェクトの一括結合: python generate_pptx.py batch --help /"
+                                            " Tier 2 スタブの展開: python generate_pptx.py expand --help")
     parser.add_argument("description", nargs="?", help="提案書の説明（例: 'DX推進の提案書、製造業向け'）")
     parser.add_argument("--recipe",   help="レシピJSONファイルのパス（recipes/xxx.json）")
     parser.add_argument("--outline",  help="既存のアウトラインJSONファイル")
@@ -112,8 +240,55 @@ def main():
     parser.add_argument("--git",          action="store_true", help="生成後にgit commit & push")
     parser.add_argument("--assemble-only", action="store_true",
                         help="project_dir/slides/ の既存Tier 2ファイルを結合するだけ（--project 必須）")
-    parser.add_argument("--template",     help="テンプレートID（templates/<id>/）。省略時は outline.json の値 or sx_proposal")
+    # nargs="+" だと位置引数の説明まで飲み込むので、繰り返し指定かカンマ区切りで複数にする
+    parser.add_argument("--template", action="extend", type=lambda v: [t for t in v.split(",") if t],
+                        metavar="ID",
+                        help="テンプレートID（templates/<id>/）。省略時は outline.json の値 or sx_proposal。"
+                             "繰り返すかカンマ区切りで複数指定すると、テンプレートごとのデッキを同時にビルドする"
+                             "（例: --template sx_proposal,jr_east）")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="スライドを N プロセスで並列レンダリングする（既定: 1 = 逐次）")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="ビルドマニフェスト（.build/）を使わず全スライドを再レンダリングする")
+    parser.add_argument("--image-concurrency", type=int, default=4,
+                        help="画像生成 API の同時リクエスト数（既定: 4）")
+    parser.add_argument("--image-timeout", type=float, default=120.0,
+                        help="画像生成1リクエストあたりのタイムアウト秒（既定: 120）")
+    parser.add_argument("--image-dpi", type=int, default=150,
+                        help="埋め込み画像を配置サイズに縮小するときの解像度（既定: 150）")
+    parser.add_argument("--prune-layouts", action="store_true",
+                        help="使っていないレイアウト・マスターを出力 PPTX から削除する（サイズ削減・高速オープン）")
+    parser.add_argument("--stream", action="store_true",
+                        help="Tier 2 結合をストリーミングで行う（数百枚規模のデッキでメモリ使用量を抑える）")
+    parser.add_argument("--stream-outline", action="store_true",
+                        help="説明から生成する場合、Claude の出力を受け取りながらスライドと画像の生成を始める")
+    parser.add_argument("--expand", action="store_true",
+                        help="Tier 1 アウトラインから作ったスタブをモデルで同時に展開してから結合する")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="アウトライン生成の応答キャッシュ（.cache/responses/）を読みも書きもしない")
+    parser.add_argument("--refresh", action="store_true",
+                        help="応答キャッシュを無視して Claude を呼び直し、結果でキャッシュを更新する")
+    parser.add_argument("--trace", metavar="OUT_JSON",
+                        help="ビルドの各段階の所要時間を Chrome トレース形式で書き出す（ui.perfetto.dev で表示）")
+    parser.add_argument("--memprofile", nargs="?", const=True, default=False, metavar="OUT_JSON",
+                        help="スライド・段階ごとのメモリ使用量を tracemalloc で計測して表示する（パス指定で JSON も保存）")
+    parser.add_argument("--no-server", action="store_true",
+                        help="ビルドサーバー（build_server.py）が起動していても使わずにプロセス内でビルドする")
+    parser.add_argument("--watch", action="store_true",
+                        help="--assemble-only と併用。Tier 2 JSON・画像・テンプレートの変更を監視し、変わったスライドだけ再ビルドし続ける")
+    parser.add_argument("--optimize", action="store_true",
+                        help="保存後にパッケージを最適化する（画像の再圧縮・重複統合・サムネイル/customXml 削除）")
     args = parser.parse_args()
+    load_env()
+    if args.stream_outline:
+        # ストリーミングのビルドは逐次・1テンプレートで組み立てるので、これらのオプションは効かない
+        unsupported = [flag for flag, used in (("複数テンプレート", args.template and len(args.template) > 1),
+                                               ("--jobs", args.jobs != 1),
+                                               ("--prune-layouts", args.prune_layouts),
+                                               ("--trace", args.trace),
+                                               ("--memprofile", args.memprofile)) if used]
+        if unsupported:
+            parser.error(f"--stream-outline は {', '.join(unsupported)} と併用できません")
 
     # ─ --assemble-only: 既存 Tier 2 ファイルを結合 ─
     if args.assemble_only:
@@ -131,32 +306,40 @@ def main():
             print(f"エラー: slides/ サブフォルダーがありません: {slides_subdir}")
             sys.exit(1)
         # テンプレートID: CLI指定 > outline.json > デフォルト
-        outline_json = project_dir / "outline.json"
-        project_template = None
-        if outline_json.exists():
-            try:
-                odata = json.loads(outline_json.read_text(encoding="utf-8"))
-                if isinstance(odata, dict):
-                    project_template = odata.get("template")
-            except Exception:
-                pass
-        template_id = args.template or project_template
-        tid_label = template_id or "sx_proposal"
+        from batch_build import project_template
+        template_id, tid_label = template_choice(args.template, project_template(project_dir))
+
+        if args.watch:
+            if isinstance(template_id, list):
+                print("エラー: --watch はテンプレート1つのみ対応しています")
+                sys.exit(1)
+            # 固定の出力パスへ、変更のたびにプロセス内でインクリメンタル結合する（ビルドサーバーは使わない）
+            from build_watch import ProjectWatcher
+            output_path = project_dir / (args.output if args.output else f"{tid_label}_{safe_project}.pptx")
+            print(f"\nウォッチモード: {slides_subdir} → {output_path.name}")
+            ProjectWatcher(slides_subdir.resolve(), output_path.resolve(), template_id,
+                           options=build_options(args, assemble=True)).run()
+            return
 
         timestamp   = datetime.now().strftime("%Y%m%d_%H%M")
         output_path = project_dir / (args.output if args.output else f"{timestamp}_{tid_label}_{safe_project}.pptx")
         print(f"\nTier 2 結合中: {slides_subdir}")
-        from pptx_engine import build_from_slides_dir
-        result_path = build_from_slides_dir(slides_subdir, output_path,
-                                            export_png=args.thumbnail,
-                                            template_id=template_id)
-        print(f"\n完了: {result_path}")
-        subprocess.Popen(["powershell", "-Command", f"Start-Process '{result_path}'"])
-        if args.git:
-            git_commit(result_path, f"Assemble: {args.project}")
+        result_paths = run_build("assemble", {"slides_dir": str(slides_subdir.resolve()),
+                                              "output_path": str(output_path.resolve()),
+                                              "template_id": template_id,
+                                              "options": build_options(args, assemble=True)}, args)
+        for result_path in result_paths:
+            if args.optimize:
+                from package_optimizer import optimize_package
+                optimize_package(result_path)
+            print(f"\n完了: {result_path}")
+            open_in_powerpoint(result_path)
+            if args.git:
+                git_commit(result_path, f"Assemble: {args.project}")
         return
 
     # ─ アウトライン取得 ─
+    prebuilt = None   # --stream-outline でビルド済みの PPTX
     if args.recipe:
         recipe_path = RECIPES_DIR / args.recipe if not Path(args.recipe).is_absolute() else Path(args.recipe)
         print(f"レシピを読み込み: {recipe_path}")
@@ -173,8 +356,12 @@ def main():
                 args.project = raw.get("title", "提案書")[:30]
         else:
             outline = raw
+    elif args.description and args.stream_outline:
+        outline, prebuilt = stream_outline_build(args.description, args)
+        print(f"  → {len(outline)}スライドのアウトライン生成・レンダリング完了")
     elif args.description:
-        outline = generate_outline_with_claude(args.description)
+        outline = generate_outline_with_claude(args.description, use_cache=not args.no_cache,
+                                               refresh=args.refresh)
         print(f"  → {len(outline)}スライドのアウトライン生成完了")
     else:
         parser.print_help()
@@ -187,6 +374,7 @@ def main():
 
     # ─ レシピ保存 ─
     if args.save_recipe:
+        RECIPES_DIR.mkdir(exist_ok=True)
         recipe_path = RECIPES_DIR / args.save_recipe
         recipe_path.write_text(json.dumps(outline, ensure_ascii=False, indent=2), encoding="utf-8")
         print(f"  [recipe] 保存: {recipe_path}")
@@ -202,11 +390,11 @@ def main():
     safe_project = "".join(c for c in project_name if c not in r'\/:*?"<>|')
     # テンプレートID取得（outline.json の template フィールド or CLI引数）
     raw_outline = json.loads(Path(args.outline).read_text(encoding="utf-8")) if args.outline else outline
-    template_id = args.template or (raw_outline.get("template") if isinstance(raw_outline, dict) else None)
-    tid_label = template_id or "sx_proposal"
+    template_id, tid_label = template_choice(
+        args.template, raw_outline.get("template") if isinstance(raw_outline, dict) else None)
 
     project_dir = SLIDES_DIR / f"{date_str}_{safe_project}"
-    project_dir.mkdir(exist_ok=True)
+    project_dir.mkdir(parents=True, exist_ok=True)
     if args.output:
         output_name = args.output if args.output.endswith(".pptx") else args.output + ".pptx"
     else:
@@ -215,7 +403,7 @@ def main():
 
     # outline.json もプロジェクトフォルダーにコピー保存（テンプレート情報を付与）
     if isinstance(raw_outline, dict):
-        raw_outline.setdefault("template", tid_label)
+        raw_outline.setdefault("template", template_id[0] if isinstance(template_id, list) else tid_label)
     (project_dir / "outline.json").write_text(
         json.dumps(raw_outline, ensure_ascii=False, indent=2), encoding="utf-8"
     )
@@ -228,6 +416,7 @@ def main():
     )
     slides_subdir = project_dir / "slides"
     if is_tier1_entries:
+        from tier2_expander import make_stub
         slides_subdir.mkdir(exist_ok=True)
         for s in outline:
             idx  = s.get("index", 0)
@@ -235,30 +424,49 @@ def main():
             fname = f"{idx:02d}_{stype}.json"
             fpath = slides_subdir / fname
             if not fpath.exists():  # 既存の展開済みファイルは上書きしない
-                fpath.write_text(json.dumps(s, ensure_ascii=False, indent=2), encoding="utf-8")
+                fpath.write_text(json.dumps(make_stub(s), ensure_ascii=False, indent=2), encoding="utf-8")
         print(f"  [Tier 2] スタブ作成: {slides_subdir} ({len(outline)}枚)")
-        print(f"  ↑ 各 .json を展開後、--assemble-only --project \"{args.project}\" で結合してください")
+        if args.expand:
+            from tier2_expander import Tier2Expander, print_summary
+            # 複数テンプレート指定時は先頭のテンプレートのデザインガイドで展開する
+            expand_template = template_id[0] if isinstance(template_id, list) else template_id
+            t0 = datetime.now()
+            results = Tier2Expander(slides_subdir, template_id=expand_template,
+                                    use_cache=not args.no_cache, refresh=args.refresh).run()
+            print_summary(results, (datetime.now() - t0).total_seconds())
+        else:
+            print(f"  ↑ 各 .json を展開後、--assemble-only --project \"{args.project}\" で結合してください")
 
     # ─ PPTX生成 ─
     print(f"\nPPTX生成中...")
-    if is_tier1_entries and slides_subdir.exists():
-        from pptx_engine import build_from_slides_dir
-        result_path = build_from_slides_dir(slides_subdir, output_path,
-                                            export_png=args.thumbnail,
-                                            template_id=template_id)
+    if prebuilt:
+        import shutil
+        shutil.move(str(prebuilt), output_path)
+        prebuilt.parent.rmdir()
+        result_paths = [output_path]
+    elif is_tier1_entries and slides_subdir.exists():
+        result_paths = run_build("assemble", {"slides_dir": str(slides_subdir.resolve()),
+                                              "output_path": str(output_path.resolve()),
+                                              "template_id": template_id,
+                                              "options": build_options(args, assemble=True)}, args)
     else:
-        from pptx_engine import build_pptx
-        result_path = build_pptx(outline, output_path, export_png=args.thumbnail,
-                                 template_id=template_id)
-    print(f"\n完了: {result_path}")
-
-    # ─ 自動オープン ─
-    subprocess.Popen(["powershell", "-Command", f"Start-Process '{result_path}'"])
-
-    # ─ git commit ─
-    if args.git:
-        title = outline[0].get("title", "提案書") if outline else "提案書"
-        git_commit(result_path, f"Add slide: {title}")
+        result_paths = run_build("build", {"outline": outline,
+                                           "output_path": str(output_path.resolve()),
+                                           "template_id": template_id,
+                                           "options": build_options(args, assemble=False)}, args)
+    for result_path in result_paths:
+        if args.optimize:
+            from package_optimizer import optimize_package
+            optimize_package(result_path)
+        print(f"\n完了: {result_path}")
+
+        # ─ 自動オープン ─
+        open_in_powerpoint(result_path)
+
+        # ─ git commit ─
+        if args.git:
+            title = outline[0].get("title", "提案書") if outline else "提案書"
+            git_commit(result_path, f"Add slide: {title}")
 
     # アウトラインのJSONも表示（Claude Codeが確認しやすいように）
     print(f"\n--- 生成されたアウトライン ---")
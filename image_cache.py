@@ -0,0 +1,137 @@
+"""
+image_cache.py
+生成画像の共有キャッシュ（コンテンツアドレス方式）
+
+2種類のエントリを同じ領域・同じ LRU で管理する。
+  - 生成画像: キーは (prompt, model) のハッシュ。プロジェクトをまたいで同じプロンプトの画像を再利用する
+  - レンディション: 配置サイズに縮小・クロップ・再エンコードした画像。
+    キーは (元画像のハッシュ, 配置枠サイズ, DPI, 形式指定) のハッシュ
+
+  <cache_dir>/
+  ├── index.json          # key -> {size, last_access, kind, ...}
+  ├── .lock               # プロセス間ロック（index.json の読み書き中だけ存在）
+  └── ab/abcdef...        # 画像本体（キー先頭2文字でシャーディング）
+
+index.json の更新はロックファイルで直列化し、本体・インデックスとも一時ファイル経由の
+os.replace で書き込むため、複数のビルドが同時に動いても壊れない（cache_store.py）。
+合計サイズが max_bytes を超えたら last_access の古い順に削除する（LRU）。
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+from cache_store import IndexTransaction, atomic_write
+
+DEFAULT_CACHE_DIR = Path(os.getenv("IMAGE_CACHE_DIR", Path(__file__).parent / ".cache" / "images"))
+DEFAULT_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 1 << 30))  # 1 GiB
+
+
+class ImageCache:
+    """
+    生成画像のコンテンツアドレス・キャッシュ。
+    get() / put() はスレッドセーフかつプロセス間で安全。hits / misses で利用状況を数える。
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ── キーとパス ──
+    @staticmethod
+    def key(*parts) -> str:
+        raw = json.dumps(parts, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _blob_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    # ── 生成画像 ──
+    def get(self, prompt: str, model: str) -> bytes | None:
+        """キャッシュ済みなら画像バイト列を返し、last_access を更新する"""
+        return self._get(self.key(prompt, model),
+                         {"kind": "generated", "prompt": prompt[:200], "model": model})
+
+    def contains(self, prompt: str, model: str) -> bool:
+        """統計・last_access を変えずに有無だけ調べる"""
+        return self._blob_path(self.key(prompt, model)).exists()
+
+    def put(self, prompt: str, model: str, blob: bytes):
+        """画像を保存し、上限を超えていれば古いものから削除する"""
+        self._put(self.key(prompt, model), blob,
+                  {"kind": "generated", "prompt": prompt[:200], "model": model})
+
+    # ── レンディション ──
+    @staticmethod
+    def rendition_key(source_sha1: str, box: tuple, dpi: int, fmt: str) -> str:
+        return ImageCache.key("rendition", source_sha1, [round(v, 3) for v in box], dpi, fmt)
+
+    def get_rendition(self, source_sha1: str, box: tuple, dpi: int, fmt: str) -> bytes | None:
+        """box: (幅インチ, 高さインチ または None)。fmt: 形式指定（"auto" / "png" / "jpeg"）"""
+        return self._get(self.rendition_key(source_sha1, box, dpi, fmt), {"kind": "rendition"})
+
+    def put_rendition(self, source_sha1: str, box: tuple, dpi: int, fmt: str, blob: bytes):
+        self._put(self.rendition_key(source_sha1, box, dpi, fmt), blob, {"kind": "rendition"})
+
+    # ── 共通 ──
+    def _get(self, key: str, meta: dict) -> bytes | None:
+        try:
+            blob = self._blob_path(key).read_bytes()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._locked() as index:
+            entry = index.get(key)
+            if entry is None:  # 本体だけ残っている（インデックス書き込み前のクラッシュ等）
+                entry = index[key] = dict(meta, size=len(blob))
+            entry["last_access"] = time.time()
+            self.hits += 1
+        return blob
+
+    def _put(self, key: str, blob: bytes, meta: dict):
+        path = self._blob_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, blob)
+        with self._locked() as index:
+            index[key] = dict(meta, size=len(blob), last_access=time.time())
+            self._evict(index, keep=key)
+
+    def total_bytes(self) -> int:
+        with self._locked() as index:
+            return sum(e["size"] for e in index.values())
+
+    def stats(self) -> tuple[int, int, int]:
+        """(hits, misses, evictions) の現在値"""
+        return self.hits, self.misses, self.evictions
+
+    def report(self, since: tuple[int, int, int] = (0, 0, 0)):
+        """ビルド終了時のヒット数表示。since に stats() の値を渡すとそこからの差分を出す"""
+        hits, misses, evictions = (now - before for now, before in zip(self.stats(), since))
+        if hits or misses:
+            print(f"  [image-cache] hit {hits} / miss {misses}"
+                  f"{f' / evict {evictions}' if evictions else ''}")
+
+    # ── 内部処理 ──
+    def _evict(self, index: dict, keep: str):
+        total = sum(e["size"] for e in index.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(index, key=lambda k: index[k].get("last_access", 0)):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._blob_path(key).unlink(missing_ok=True)
+            total -= index.pop(key)["size"]
+            self.evictions += 1
+
+    def _locked(self):
+        return IndexTransaction(self.cache_dir, self._lock)
@@ -0,0 +1,287 @@
+"""
+image_client.py
+画像生成クライアント（プロセスごとに1つ作って使い回す）
+
+generate_image_gemini は画像のたびに genai.Client を作り直し、タイムアウトもリトライもなく、
+一時的なエラーでビルドが止まっていた。ImageClient はバックエンドの前に
+
+  - 1回の呼び出しごとのタイムアウト（バックエンドへ渡す）
+  - 一時的な失敗（429 / 5xx / タイムアウト / 接続断）の指数バックオフ再試行
+  - トークンバケットのレート制限（model_client.RateLimiter）
+  - サーキットブレーカー: 連続で失敗したら一定時間バックエンドを呼ばず、プレースホルダー画像を返す
+
+を挟む。バックエンドは generate(prompt, model, timeout) -> bytes | None を持てばよく、
+  - GeminiBackend: genai.Client を1つ作って使い回す（既定）
+  - HttpImageBackend: POST <url>/generate に {"prompt", "model"} を送り画像を受け取る（IMAGE_BACKEND_URL）。
+    スレッドごとに keep-alive の接続を使い回す。テストではローカルのスタブサーバーを指す
+
+  from image_client import get_image_client
+  blob = get_image_client().generate(prompt, model)
+
+設定（環境変数）: IMAGE_BACKEND_URL / IMAGE_CALL_TIMEOUT（秒）/ IMAGE_RETRY_ATTEMPTS /
+IMAGE_RATE_PER_SECOND（未設定なら制限なし）/ IMAGE_BREAKER_THRESHOLD / IMAGE_BREAKER_RESET（秒）
+
+プレースホルダーは PlaceholderImage（bytes のサブクラス）で返すので、呼び出し側は
+is_placeholder() で見分けて共有キャッシュにもビルドマニフェストにも保存しない
+（プレースホルダーを載せたスライドは次のビルドで組み立て直し、画像を再生成させる）。
+"""
+
+import os
+import io
+import json
+import time
+import threading
+
+from model_client import RateLimiter, call_with_retries
+
+DEFAULT_CALL_TIMEOUT = float(os.getenv("IMAGE_CALL_TIMEOUT", 60))
+DEFAULT_ATTEMPTS = int(os.getenv("IMAGE_RETRY_ATTEMPTS", 3))
+DEFAULT_BREAKER_THRESHOLD = int(os.getenv("IMAGE_BREAKER_THRESHOLD", 5))
+DEFAULT_BREAKER_RESET = float(os.getenv("IMAGE_BREAKER_RESET", 60))
+TRANSIENT_STATUS = (408, 429, 500, 502, 503, 504)
+
+
+class TransientImageError(Exception):
+    """再試行すれば成功する見込みのある失敗（レート制限・サーバーエラー・タイムアウト・接続断）"""
+
+
+class PlaceholderImage(bytes):
+    """生成に失敗したときの代わりの画像（共有キャッシュには保存しない）"""
+
+
+def is_placeholder(blob) -> bool:
+    return isinstance(blob, PlaceholderImage)
+
+
+_PLACEHOLDER: list[PlaceholderImage] = []
+
+
+def placeholder_image() -> PlaceholderImage:
+    """灰色の枠と対角線だけの 16:9 の PNG（配置枠に合わせて縮小・クロップされる）"""
+    if not _PLACEHOLDER:
+        from PIL import Image, ImageDraw
+        w, h = 1600, 900
+        img = Image.new("RGB", (w, h), (217, 217, 217))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle([0, 0, w - 1, h - 1], outline=(166, 166, 166), width=8)
+        draw.line([(0, 0), (w, h)], fill=(191, 191, 191), width=4)
+        draw.line([(0, h), (w, 0)], fill=(191, 191, 191), width=4)
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        _PLACEHOLDER.append(PlaceholderImage(buf.getvalue()))
+    return _PLACEHOLDER[0]
+
+
+# ─── バックエンド ─────────────────────────────────────
+class GeminiBackend:
+    """google-genai の generate_content で画像を生成する（Client はプロセス内で1つ）"""
+
+    def __init__(self, api_key: str | None = None):
+        self.api_key = api_key
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                from google import genai
+                self._client = genai.Client(api_key=self.api_key)
+            return self._client
+
+    def generate(self, prompt: str, model: str, timeout: float) -> bytes | None:
+        from google.genai import errors as genai_errors
+        from google.genai import types as genai_types
+        import httpx
+        if not self.api_key:
+            print(f"  [skip] GEMINI_API_KEY 未設定")
+            return None
+        config = genai_types.GenerateContentConfig(
+            response_modalities=["IMAGE", "TEXT"],
+            http_options=genai_types.HttpOptions(timeout=int(timeout * 1000)))
+        try:
+            response = self._get_client().models.generate_content(model=model, contents=prompt, config=config)
+        except genai_errors.APIError as e:
+            if e.code in TRANSIENT_STATUS:
+                raise TransientImageError(f"{e.code} {e.message}") from e
+            raise
+        except httpx.TransportError as e:   # タイムアウト・接続断
+            raise TransientImageError(f"{type(e).__name__}: {e}") from e
+        for part in response.candidates[0].content.parts:
+            if part.inline_data is not None:
+                return part.inline_data.data
+        return None
+
+
+class HttpImageBackend:
+    """
+    HTTP の画像生成サービス（社内プロキシ・テスト用スタブサーバー）。
+    POST <url>/generate {"prompt", "model"} → 200: 画像 / 204: 画像なし / 429・5xx: 一時的な失敗
+    """
+
+    def __init__(self, url: str):
+        from urllib.parse import urlsplit
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path.rstrip("/") + "/generate"
+        self._local = threading.local()
+
+    def _connection(self, timeout: float):
+        import http.client
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def generate(self, prompt: str, model: str, timeout: float) -> bytes | None:
+        import http.client
+        conn = self._connection(timeout)
+        body = json.dumps({"prompt": prompt, "model": model}).encode("utf-8")
+        try:
+            conn.request("POST", self.path, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:   # タイムアウト・接続断（接続は作り直す）
+            conn.close()
+            self._local.conn = None
+            raise TransientImageError(f"{type(e).__name__}: {e}") from e
+        if response.status == 200:
+            return data
+        if response.status == 204:
+            return None
+        message = f"HTTP {response.status}: {data[:200].decode('utf-8', 'replace')}"
+        if response.status in TRANSIENT_STATUS:
+            raise TransientImageError(message)
+        raise RuntimeError(message)
+
+
+# ─── サーキットブレーカー ─────────────────────────────
+class CircuitBreaker:
+    """
+    連続 threshold 回の失敗で開き（バックエンドを呼ばない）、reset_seconds 後に1回だけ試す（半開）。
+    試した呼び出しが成功すれば閉じ、失敗すればまた reset_seconds 開く。
+    """
+
+    def __init__(self, threshold: int = DEFAULT_BREAKER_THRESHOLD, reset_seconds: float = DEFAULT_BREAKER_RESET):
+        self.threshold = max(1, threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self._trial:
+                return False
+            self._trial = True   # 半開: 1件だけ通す
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> bool:
+        """失敗を記録する。これで開いたら True"""
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.threshold:
+                was_open = self.opened_at is not None
+                self.opened_at = time.monotonic()
+                return not was_open
+            return False
+
+
+# ─── クライアント ─────────────────────────────────────
+class ImageClient:
+    """
+    バックエンドの前にタイムアウト・再試行・レート制限・サーキットブレーカーを挟む。
+    generate() はスレッドセーフ。失敗しても例外は出さず、一時的な失敗ならプレースホルダー、
+    それ以外（リクエスト不正など）は None を返す。
+    """
+
+    def __init__(self, backend, timeout: float = DEFAULT_CALL_TIMEOUT, attempts: int = DEFAULT_ATTEMPTS,
+                 rate: float | None = None, burst: int = 4, base_delay: float = 1.0,
+                 breaker: CircuitBreaker | None = None, placeholder: bool = True):
+        self.backend = backend
+        self.timeout = timeout
+        self.attempts = max(1, attempts)
+        self.limiter = RateLimiter(rate, burst) if rate else None
+        self.base_delay = base_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.placeholder = placeholder
+        self.calls = 0
+        self.failures = 0
+        self.placeholders = 0
+
+    def _fallback(self):
+        self.placeholders += 1
+        return placeholder_image() if self.placeholder else None
+
+    def generate(self, prompt: str, model: str) -> bytes | None:
+        if not self.breaker.allow():
+            return self._fallback()
+        print(f"  [image] 生成中: {prompt[:50]}...")
+
+        def call():
+            self.calls += 1
+            return self.backend.generate(prompt, model, self.timeout)
+
+        def on_retry(attempt, error):
+            print(f"  [image] 再試行 {attempt}/{self.attempts - 1}: {prompt[:30]}... ({error})")
+
+        try:
+            blob = call_with_retries(call, attempts=self.attempts, limiter=self.limiter,
+                                     base_delay=self.base_delay, retry_on=(TransientImageError,),
+                                     on_retry=on_retry)
+        except TransientImageError as e:
+            self.failures += 1
+            if self.breaker.record_failure():
+                print(f"  [image] 生成が連続で失敗しています。{self.breaker.reset_seconds:.0f}秒間は"
+                      f"プレースホルダー画像を使います")
+            print(f"  [image] 生成失敗（プレースホルダーで代用）: {prompt[:50]}... ({e})")
+            return self._fallback()
+        except Exception as e:   # リクエスト自体の問題（バックエンドは応答しているので不調とは数えない）
+            self.breaker.record_success()
+            print(f"  [image] 生成失敗: {prompt[:50]}... ({type(e).__name__}: {e})")
+            return None
+        self.breaker.record_success()
+        if blob:
+            print(f"  [image] 生成完了")
+        return blob
+
+
+def default_backend():
+    url = os.getenv("IMAGE_BACKEND_URL", "")
+    return HttpImageBackend(url) if url else GeminiBackend(os.getenv("GEMINI_API_KEY", ""))
+
+
+# プロセスごとのクライアント（fork 後の子プロセスでは親の接続を使わず作り直す）
+_CLIENTS: dict[int, ImageClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_image_client() -> ImageClient:
+    pid = os.getpid()
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(pid)
+        if client is None:
+            rate = os.getenv("IMAGE_RATE_PER_SECOND")
+            client = _CLIENTS[pid] = ImageClient(default_backend(), rate=float(rate) if rate else None)
+        return client
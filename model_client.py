@@ -0,0 +1,124 @@
+"""
+model_client.py
+モデル呼び出しの共通部品（差し替え可能なクライアント・レート制限・リトライ）
+
+  client = AnthropicTextClient(model="claude-sonnet-4-5-20250929")
+  text = client.complete(system, prompt)
+
+  limiter = RateLimiter(rate=2.0, burst=4)            # 1秒あたり2回、最大4回まで連続
+  value = call_with_retries(lambda: client.complete(...), attempts=3, limiter=limiter)
+
+テキスト生成のクライアントは complete(system: str, prompt: str) -> str を持てばよく、
+テストでは記録済みの応答を返す偽クライアントに差し替える。
+"""
+
+import os
+import time
+import random
+import threading
+
+DEFAULT_TEXT_MODEL = "claude-sonnet-4-5-20250929"
+
+
+class RetryableError(Exception):
+    """リトライすれば成功する見込みのある失敗（応答の形式不正など、API 例外以外）"""
+
+
+def transient_api_errors() -> tuple:
+    """
+    リトライしてよい API・通信の例外（接続断・タイムアウト・レート制限・サーバー側の 5xx / 過負荷）。
+    認証・リクエスト不正などは何度呼んでも同じなので含めない。anthropic がなければ標準の例外だけ
+    """
+    errors = (TimeoutError, ConnectionError)
+    try:
+        import anthropic
+    except ImportError:
+        return errors
+    names = ("APIConnectionError", "RateLimitError", "InternalServerError", "OverloadedError")
+    return errors + tuple(getattr(anthropic, name) for name in names if hasattr(anthropic, name))
+
+
+# ─── テキスト生成クライアント ─────────────────────────
+class AnthropicTextClient:
+    """anthropic.Anthropic の messages.create を complete(system, prompt) で呼ぶ（クライアントは使い回す）"""
+
+    def __init__(self, model: str = DEFAULT_TEXT_MODEL, max_tokens: int = 4096, timeout: float = 120.0):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                import anthropic
+                key = os.getenv("ANTHROPIC_API_KEY", "")
+                if not key:
+                    raise ValueError("ANTHROPIC_API_KEY が設定されていません")
+                # リトライは call_with_retries で行うので SDK 側では繰り返さない
+                self._client = anthropic.Anthropic(api_key=key, timeout=self.timeout, max_retries=0)
+            return self._client
+
+    def complete(self, system: str, prompt: str) -> str:
+        response = self._get_client().messages.create(
+            model=self.model, max_tokens=self.max_tokens, system=system,
+            messages=[{"role": "user", "content": prompt}])
+        return response.content[0].text
+
+
+# ─── レート制限 ───────────────────────────────────────
+class RateLimiter:
+    """
+    トークンバケット。rate 回/秒で補充し、最大 burst 回までは待たずに通す。
+    acquire() はスレッドセーフで、トークンが空なら補充されるまで待つ。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError(f"rate は正の数である必要があります: {rate}")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 先にトークンを引いておき（負になりうる）、足りない分だけ待つ。待ち順は呼び出し順になる
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited_seconds += wait
+        if wait > 0:
+            time.sleep(wait)
+
+
+# ─── リトライ ─────────────────────────────────────────
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """attempt 回目（1始まり）の失敗後の待ち時間。指数バックオフ + フルジッター"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def call_with_retries(fn, attempts: int = 3, limiter: RateLimiter | None = None,
+                      base_delay: float = 1.0, max_delay: float = 30.0, retry_on=(Exception,),
+                      on_retry=None):
+    """
+    fn() を最大 attempts 回呼ぶ。retry_on の例外なら backoff_delay だけ待って再試行し、
+    最後の失敗はそのまま送出する。limiter があれば各試行の前に acquire する。
+    on_retry(attempt, error): 再試行の前に呼ぶ（ログ・プロンプトの修正用）
+    """
+    for attempt in range(1, attempts + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fn()
+        except retry_on as e:
+            if attempt == attempts:
+                raise
+            if on_retry is not None:
+                on_retry(attempt, e)
+            time.sleep(backoff_delay(attempt, base_delay, max_delay))
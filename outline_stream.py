@@ -0,0 +1,262 @@
+"""
+outline_stream.py
+アウトライン生成のストリーミング（LLM の出力を受け取りながらスライドを組み立てる）
+
+generate_outline_with_claude は最後のトークンが届くまで待ってから json.loads するため、
+それまで何も始まらない。ストリーミングモードでは
+
+  1. Claude のテキストをストリーミングで受け取り（claude_text_stream）
+  2. JSON 配列を少しずつ解析して、閉じ括弧が届いたスライドから順に取り出し（JsonArrayParser）
+  3. レンダリングに必要な構造を検証し（validate_slide）、そのスライドの画像生成をすぐに pptx_engine.ImagePrefetcher のワーカーで開始し
+  4. 出力の受信と並行して、届いた順にスライドをレンダリングする（pptx_engine.build_pptx_streaming）
+
+  build = StreamingOutlineBuild(claude_text_stream(description, system=OUTLINE_SYSTEM_PROMPT), "out.pptx")
+  build.run()
+  build.outline           # 受け取ったスライド（レシピ保存等に使う）
+  build.first_slide_seconds  # 開始から1枚目のレンダリング完了まで
+
+client は anthropic.Anthropic 互換（messages.stream(...) が text_stream を持つコンテキストマネージャーを返す）
+であればよく、テストでは記録済みの応答を遅延付きで再生する偽クライアントを使う。
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+from pathlib import Path
+
+OUTLINE_MODEL = "claude-sonnet-4-5-20250929"
+OUTLINE_MAX_TOKENS = 8192
+DEFAULT_IMAGE_MODEL = "gemini-3-pro-image-preview"
+SLIDE_TYPES = ("title", "agenda", "chapter", "content", "end")
+
+
+# ─── JSON 配列の逐次パーサー ──────────────────────────
+class JsonArrayParser:
+    """
+    JSON 配列のテキストを少しずつ受け取り、閉じたトップレベルのオブジェクトを順に返す
+    （配列の要素はスライドのオブジェクトだけで、それ以外の要素は ValueError）。
+    最初の "[" より前（```json のフェンス等）と、配列の "]" より後は読み飛ばす。
+    """
+
+    def __init__(self):
+        self._started = False
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element: list[str] = []
+        self.count = 0
+
+    def feed(self, chunk: str) -> list:
+        """chunk を読み、この時点で閉じた要素のリストを返す"""
+        items = []
+        # chunk 内で現在の要素が始まった位置（1文字ずつ append しないよう、閉じたときにまとめて切り出す）
+        start = 0 if self._depth > 0 else None
+        for pos, ch in enumerate(chunk):
+            if self.done:
+                break
+            if not self._started:
+                self._started = ch == "["
+                continue
+            if self._depth == 0:
+                if ch == "{":   # 要素はスライドのオブジェクトだけ（入れ子の配列は受け付けない）
+                    self._depth = 1
+                    start = pos
+                elif ch == "]":
+                    self.done = True
+                elif not (ch.isspace() or ch == ","):
+                    raise ValueError(f"アウトラインの配列要素はオブジェクトである必要があります: {ch!r}")
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._element.append(chunk[start:pos + 1])
+                    items.append(json.loads("".join(self._element)))
+                    self._element = []
+                    self.count += 1
+                    start = None
+        if start is not None:
+            self._element.append(chunk[start:])
+        return items
+
+    def close(self):
+        """入力の終わり。配列が閉じていなければ ValueError（max_tokens で途切れた場合など）"""
+        if not self._started:
+            raise ValueError("応答に JSON 配列がありません")
+        if not self.done:
+            raise ValueError(f"JSON 配列が途中で終わっています（{self.count}要素まで受信）")
+
+
+# ─── Claude のストリーミング ──────────────────────────
+def claude_text_stream(description: str, system: str, client=None,
+                       model: str = OUTLINE_MODEL, max_tokens: int = OUTLINE_MAX_TOKENS):
+    """Claude の応答テキストを届いた順に返すイテレーター"""
+    if client is None:
+        import anthropic
+        key = os.getenv("ANTHROPIC_API_KEY", "")
+        if not key:
+            raise ValueError("ANTHROPIC_API_KEY が設定されていません")
+        client = anthropic.Anthropic(api_key=key)
+    with client.messages.stream(model=model, max_tokens=max_tokens, system=system,
+                                messages=[{"role": "user", "content": description}]) as stream:
+        yield from stream.text_stream
+
+
+def validate_slide(slide) -> tuple[list[str], bool]:
+    """
+    アウトラインのスライド1枚を検証し、(問題のリスト, レンダリングできるか) を返す。
+    OUTLINE_SYSTEM_PROMPT の出力形式は Tier 2 スキーマ（index 必須・objects と images の併用不可）より
+    緩いので、スキーマではなくレンダリングに必要な構造だけを確認する。
+    """
+    if not isinstance(slide, dict):
+        return [f"スライドがオブジェクトではありません: {type(slide).__name__}"], False
+    problems = []
+    renderable = True
+    if slide.get("type", "content") not in SLIDE_TYPES:
+        problems.append(f"未知の type: {slide.get('type')!r}（content として配置）")
+    for field in ("title", "subtitle", "body"):
+        if field in slide and not isinstance(slide[field], str):
+            problems.append(f"{field} が文字列ではありません")
+    for field in ("objects", "images"):
+        items = slide.get(field, [])
+        if not isinstance(items, list) or not all(isinstance(x, dict) for x in items):
+            problems.append(f"{field} がオブジェクトの配列ではありません")
+            renderable = False
+    if renderable and any(not (spec.get("prompt") or spec.get("file")) for spec in slide.get("images", [])):
+        problems.append("prompt も file もない画像があります（無視される）")
+    return problems, renderable
+
+
+def iter_outline_slides(chunks, validate: bool = True):
+    """
+    テキストのチャンクからスライド dict を閉じた順に返す。
+    validate: 検証して問題を表示する（objects/images が壊れたスライドは飛ばす）
+    オブジェクトでない要素があれば JsonArrayParser が ValueError を送出する
+    """
+    parser = JsonArrayParser()
+    number = 0
+    for chunk in chunks:
+        for slide in parser.feed(chunk):
+            number += 1
+            if validate:
+                problems, renderable = validate_slide(slide)
+                for problem in problems:
+                    print(f"  [outline] スライド {number}: {problem}")
+                if not renderable:
+                    print(f"  [outline] スライド {number} をスキップします")
+                    continue
+            yield slide
+    parser.close()
+
+
+# ─── 受信しながらのビルド ─────────────────────────────
+_END = object()
+
+
+class StreamingOutlineBuild:
+    """
+    ストリームから届いたスライドを、画像生成を先行させながら順にレンダリングする。
+    受信と解析は別スレッドで行い、メインスレッドのレンダリング（画像待ちを含む）が
+    受信を止めないようにする。
+    """
+
+    def __init__(self, chunks, output_path: str | Path, template_id: str | None = None,
+                 slides_dir: Path | None = None, image_generator=None,
+                 image_concurrency: int = 4, image_timeout: float = 120.0,
+                 image_dpi: int | None = None, drop_images: bool = False, validate: bool = True):
+        self.chunks = chunks
+        self.output_path = Path(output_path)
+        self.template_id = template_id
+        self.slides_dir = slides_dir
+        self.image_generator = image_generator
+        self.image_concurrency = image_concurrency
+        self.image_timeout = image_timeout
+        self.image_dpi = image_dpi
+        self.drop_images = drop_images
+        self.validate = validate
+
+        self.outline: list[dict] = []
+        self.prefetched: dict[tuple[str, str], bytes | None] = {}
+        self._queue: queue.Queue = queue.Queue()
+        self.t0 = 0.0
+        self.parsed_at: list[float] = []     # 各スライドを受信し終えた時刻（開始からの秒）
+        self.rendered_at: list[float] = []   # 各スライドのレンダリングが終わった時刻
+        self.stream_seconds: float | None = None
+
+    @property
+    def first_slide_seconds(self) -> float | None:
+        return self.rendered_at[0] if self.rendered_at else None
+
+    # ── 受信スレッド ──
+    def _read(self, config, images):
+        import pptx_engine
+        try:
+            for slide in iter_outline_slides(self.chunks, validate=self.validate):
+                if self.drop_images:
+                    slide.pop("images", None)
+                self.parsed_at.append(time.perf_counter() - self.t0)
+                keys = []
+                if config.supports_image.get(slide.get("type", "content"), True):
+                    for spec in slide.get("images", []):
+                        if isinstance(spec, dict) and pptx_engine.image_spec_needs_generation(spec, self.slides_dir):
+                            key = (spec["prompt"], spec.get("model", DEFAULT_IMAGE_MODEL))
+                            images.submit(key)
+                            keys.append(key)
+                self._queue.put((slide, keys))
+            self.stream_seconds = time.perf_counter() - self.t0
+            self._queue.put(_END)
+        except BaseException as e:  # 受信・解析の失敗はメインスレッドで送出する
+            self._queue.put(e)
+
+    # ── レンダリング側 ──
+    def _slides(self, images):
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            slide, keys = item
+            for key in keys:
+                self.prefetched[key] = images.result(key)
+            self.outline.append(slide)
+            yield slide
+            # ここに戻った時点で、直前のスライドはレンダリング・書き出し済み
+            self.rendered_at.append(time.perf_counter() - self.t0)
+            if len(self.rendered_at) == 1:
+                print(f"  [stream] 1枚目のレンダリング完了: {self.rendered_at[0]:.2f}s")
+
+    def run(self) -> Path:
+        import pptx_engine
+
+        self.t0 = time.perf_counter()
+        config = pptx_engine.get_template_config(self.template_id)
+        # 画像生成は prefetch_images と同じ daemon ワーカー（応答しない呼び出しがあっても終了できる）
+        images = pptx_engine.ImagePrefetcher(self.image_generator, concurrency=self.image_concurrency,
+                                             timeout=self.image_timeout)
+        reader = threading.Thread(target=self._read, args=(config, images), daemon=True)
+        reader.start()
+        try:
+            path = pptx_engine.build_pptx_streaming(
+                self._slides(images), self.output_path, slides_dir=self.slides_dir, template_id=self.template_id,
+                image_dpi=self.image_dpi or pptx_engine.IMAGE_RENDITION_DPI, prefetched=self.prefetched)
+        finally:
+            images.close()
+        reader.join()
+        total = time.perf_counter() - self.t0
+        print(f"  [stream] {len(self.outline)}枚: 1枚目 {self.first_slide_seconds or 0:.2f}s"
+              f" / 受信完了 {self.stream_seconds or 0:.2f}s / 保存まで {total:.2f}s")
+        return path
@@ -0,0 +1,251 @@
+"""
+package_optimizer.py
+保存済み PPTX パッケージの最適化（pptx_engine.optimize_package として公開）
+
+python-pptx で開き直さず、ZIP のパーツ単位で読み書きする。メモリに載るのは
+[Content_Types].xml と .rels（小さい XML）と、処理中の1パーツだけ。
+
+  1. サムネイル（docProps/thumbnail.*）と customXml を関係ごと削除
+  2. 内容が同一のメディアを1つにまとめ、参照元の .rels を付け替える
+  3. どの関係からも到達できなくなったパーツを削除
+  4. 大きすぎる画像を縮小・再圧縮（小さくなった場合だけ置き換え）
+  5. パーツの種類ごとに ZIP 圧縮方式を選んで書き出す（deflate が効かない圧縮済みメディアは無圧縮格納）
+
+使い方:
+  python package_optimizer.py deck.pptx [--output out.pptx] [--max-px 2400]
+"""
+
+import os
+import io
+import zlib
+import hashlib
+import zipfile
+import argparse
+import posixpath
+from pathlib import Path
+
+from lxml import etree
+
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+RT_THUMBNAIL = "http://schemas.openxmlformats.org/package/2006/relationships/metadata/thumbnail"
+RT_CUSTOM_XML = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/customXml"
+
+MAX_MEDIA_PX = 2400          # 長辺がこれを超える画像は縮小する
+JPEG_QUALITY = 85
+# 既に圧縮済みの形式。deflate で STORE_THRESHOLD 以上縮まなければ無圧縮で格納する
+# （書き出し・展開が速くなる）
+STORED_EXTENSIONS = {".jpeg", ".jpg", ".png", ".gif", ".mp3", ".mp4", ".m4a", ".m4v",
+                     ".wdp", ".jxr", ".webp", ".zip"}
+STORE_THRESHOLD = 0.97
+DEFLATE_LEVEL = 9
+
+
+class OptimizeResult:
+    """optimize_package() の結果（サイズと各処理の件数）"""
+
+    def __init__(self, path: Path, before_bytes: int, after_bytes: int,
+                 recompressed: int, deduplicated: int, removed: int):
+        self.path = path
+        self.before_bytes = before_bytes
+        self.after_bytes = after_bytes
+        self.recompressed = recompressed
+        self.deduplicated = deduplicated
+        self.removed = removed
+
+    def summary(self) -> str:
+        delta = self.after_bytes / self.before_bytes - 1 if self.before_bytes else 0
+        return (f"{self.before_bytes / 1e6:.2f} MB → {self.after_bytes / 1e6:.2f} MB ({delta:+.0%}): "
+                f"再圧縮 {self.recompressed} / 重複統合 {self.deduplicated} / 削除 {self.removed}")
+
+
+# ─── パス・関係ユーティリティ ─────────────────────────
+def _rels_name(part: str) -> str:
+    """パーツ名に対応する .rels のパーツ名（"" はパッケージ自身）"""
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _source_of_rels(rels: str) -> str:
+    """.rels のパーツ名から、その関係の参照元パーツ名を求める"""
+    directory, name = posixpath.split(rels)
+    return posixpath.join(posixpath.dirname(directory), name[:-len(".rels")])
+
+
+def _resolve(source: str, target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def _relative(source: str, part: str) -> str:
+    return posixpath.relpath(part, posixpath.dirname(source) or ".")
+
+
+def _compress_type(ext: str, blob: bytes) -> int:
+    """パーツの種類ごとの ZIP 圧縮方式。圧縮済みメディアは deflate の効果を見て決める"""
+    if ext not in STORED_EXTENSIONS:
+        return zipfile.ZIP_DEFLATED
+    compressor = zlib.compressobj(1, zlib.DEFLATED, -15)
+    size = len(compressor.compress(blob)) + len(compressor.flush())
+    return zipfile.ZIP_DEFLATED if size < len(blob) * STORE_THRESHOLD else zipfile.ZIP_STORED
+
+
+def _sha1_of_member(zf: zipfile.ZipFile, name: str) -> str:
+    h = hashlib.sha1()
+    with zf.open(name) as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ─── 画像の再圧縮 ─────────────────────────────────────
+def _recompress_image(blob: bytes, ext: str, max_px: int) -> bytes | None:
+    """長辺が max_px を超える PNG/JPEG を縮小して同じ形式で再エンコードする。小さくならなければ None"""
+    if ext not in (".png", ".jpeg", ".jpg"):
+        return None
+    from PIL import Image
+    try:
+        img = Image.open(io.BytesIO(blob))
+        if max(img.size) <= max_px:
+            return None
+        img.thumbnail((max_px, max_px), Image.LANCZOS)
+        buf = io.BytesIO()
+        if ext == ".png":
+            img.save(buf, format="PNG", optimize=True)
+        else:
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            img.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    except (OSError, ValueError) as e:
+        print(f"  [optimize] 画像を再圧縮できません（そのまま残します）: {e}")
+        return None
+    out = buf.getvalue()
+    return out if len(out) < len(blob) else None
+
+
+# ─── 本体 ─────────────────────────────────────────────
+def optimize_package(path: str | Path, output_path: str | Path | None = None,
+                     max_px: int = MAX_MEDIA_PX,
+                     strip_thumbnail: bool = True,
+                     strip_custom_xml: bool = True) -> OptimizeResult:
+    """
+    保存済み PPTX を最適化して書き直す。
+    output_path: 省略時は path を上書きする（一時ファイル経由で置き換える）
+    Returns: OptimizeResult
+    """
+    path = Path(path)
+    output_path = Path(output_path) if output_path else path
+    before_bytes = path.stat().st_size
+
+    with zipfile.ZipFile(path) as src:
+        names = [info.filename for info in src.infolist() if not info.is_dir()]
+        content_types = etree.fromstring(src.read("[Content_Types].xml"))
+        rels = {name: etree.fromstring(src.read(name)) for name in names if name.endswith(".rels")}
+
+        # 1. サムネイル・customXml への関係を外す
+        strip_types = set()
+        if strip_thumbnail:
+            strip_types.add(RT_THUMBNAIL)
+        if strip_custom_xml:
+            strip_types.add(RT_CUSTOM_XML)
+        for rels_xml in rels.values():
+            for rel in list(rels_xml):
+                if rel.get("Type") in strip_types:
+                    rels_xml.remove(rel)
+
+        # 2. 内容が同一のメディアを統合（最初に現れたパーツ名を残す）
+        canonical: dict[str, str] = {}
+        by_hash: dict[tuple[str, int], str] = {}
+        for name in names:
+            if name.startswith("ppt/media/"):
+                info = src.getinfo(name)
+                key = (_sha1_of_member(src, name), info.file_size)
+                if key in by_hash:
+                    canonical[name] = by_hash[key]
+                else:
+                    by_hash[key] = name
+        if canonical:
+            for rels_name, rels_xml in rels.items():
+                source = _source_of_rels(rels_name)
+                for rel in rels_xml:
+                    if rel.get("TargetMode") == "External":
+                        continue
+                    target = _resolve(source, rel.get("Target"))
+                    if target in canonical:
+                        rel.set("Target", _relative(source, canonical[target]))
+
+        # 3. パッケージの関係から到達できるパーツだけを残す
+        reachable = {"[Content_Types].xml"}
+        stack = [""]
+        while stack:
+            source = stack.pop()
+            rels_name = _rels_name(source) if source else "_rels/.rels"
+            rels_xml = rels.get(rels_name)
+            if rels_xml is None:
+                continue
+            reachable.add(rels_name)
+            for rel in rels_xml:
+                if rel.get("TargetMode") == "External":
+                    continue
+                target = _resolve(source, rel.get("Target"))
+                if target not in reachable and target in src.NameToInfo:
+                    reachable.add(target)
+                    stack.append(target)
+        removed = [name for name in names if name not in reachable]
+        for override in list(content_types):
+            if override.tag == f"{{{CT_NS}}}Override" and \
+                    override.get("PartName").lstrip("/") not in reachable:
+                content_types.remove(override)
+
+        # 4-5. パーツ単位で書き出し
+        tmp = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+        recompressed = 0
+        try:
+            with zipfile.ZipFile(tmp, "w") as dst:
+                ordered = ["[Content_Types].xml"] + [n for n in names if n != "[Content_Types].xml"]
+                for name in ordered:
+                    if name not in reachable:
+                        continue
+                    ext = posixpath.splitext(name)[1].lower()
+                    if name == "[Content_Types].xml":
+                        blob = etree.tostring(content_types, xml_declaration=True,
+                                              encoding="UTF-8", standalone=True)
+                    elif name in rels:
+                        blob = etree.tostring(rels[name], xml_declaration=True,
+                                              encoding="UTF-8", standalone=True)
+                    else:
+                        blob = src.read(name)
+                        if name.startswith("ppt/media/"):
+                            smaller = _recompress_image(blob, ext, max_px)
+                            if smaller is not None:
+                                blob = smaller
+                                recompressed += 1
+                    info = zipfile.ZipInfo(name, date_time=src.getinfo(name).date_time)
+                    info.compress_type = _compress_type(ext, blob)
+                    dst.writestr(info, blob, compresslevel=DEFLATE_LEVEL)
+            os.replace(tmp, output_path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    result = OptimizeResult(output_path, before_bytes, output_path.stat().st_size,
+                            recompressed, len(canonical), len(removed))
+    print(f"  [optimize] {result.summary()}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PPTX package optimizer")
+    parser.add_argument("path", help="最適化する PPTX")
+    parser.add_argument("--output", help="出力先（省略時は上書き）")
+    parser.add_argument("--max-px", type=int, default=MAX_MEDIA_PX, help="画像の長辺の上限（px）")
+    parser.add_argument("--keep-thumbnail", action="store_true", help="docProps のサムネイルを残す")
+    parser.add_argument("--keep-custom-xml", action="store_true", help="customXml を残す")
+    args = parser.parse_args()
+    optimize_package(args.path, args.output, max_px=args.max_px,
+                     strip_thumbnail=not args.keep_thumbnail,
+                     strip_custom_xml=not args.keep_custom_xml)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ import os
 import io
 import json
 import ast
+import hashlib
+import threading
 from pathlib import Path
 
 from pptx import Presentation
@@ -19,6 +21,12 @@ from pptx.enum.text import PP_ALIGN
 from pptx.enum.shapes import MSO_AUTO_SHAPE_TYPE
 from pptx.enum.text import MSO_ANCHOR
 
+from image_cache import ImageCache
+from cache_store import file_sha256
+from build_trace import TRACER
+from build_memprofile import MEMORY_PROFILER
+from package_optimizer import optimize_package, OptimizeResult  # noqa: F401  (pptx_engine.optimize_package として公開)
+
 # ─── テンプレート設定 ─────────────────────────────────
 TEMPLATES_DIR = Path(__file__).parent / "templates"
 DEFAULT_TEMPLATE_ID = "sx_proposal"
@@ -54,20 +62,98 @@ class TemplateConfig:
         self.body_ph_search_order = data.get("body_placeholder_search_order", [10, 14, 1, 2])
         self.colors = data.get("colors", {})
 
+        # ── 逆引きマップ（シェイプごとの dict-of-dict 参照を避けるため事前計算） ──
+        # layout_index -> type_key（同じレイアウトを共有する場合は profile.json で先に出た方）
+        self.layout_type_by_index: dict[int, str] = {}
+        for k, idx in self.layout.items():
+            self.layout_type_by_index.setdefault(idx, k)
+
+        # type_key -> {ph_idx: role}
+        self.roles_by_ph = {
+            k: {ph_idx: role for role, ph_idx in phs.items()}
+            for k, phs in self.placeholders.items()
+        }
+
+        # type_key -> マッピング済み ph_idx の集合
+        self.mapped_placeholders = {k: frozenset(phs.values()) for k, phs in self.placeholders.items()}
+
+        self.body_ph_ids = frozenset(self.body_ph_search_order or [10, 14, 1, 2])
+
+        # type_key -> FillPlan（add_slide がシェイプツリー1パスで適用する）
+        self.fill_plans = {
+            k: FillPlan(phs, self.body_ph_search_order) for k, phs in self.placeholders.items()
+        }
+        self._default_fill_plan = FillPlan({}, self.body_ph_search_order)
+
+    def fill_plan(self, layout_key: str) -> "FillPlan":
+        """type_key の充填プラン。profile.json に無い type はデフォルト配置で充填する。"""
+        return self.fill_plans.get(layout_key, self._default_fill_plan)
+
+
+class TemplateConfigRegistry:
+    """
+    プロセス全体で共有する TemplateConfig のレジストリ。
+    テンプレートIDごとに1つだけ保持し、profile.json の mtime が変わったら読み直す。
+    返した TemplateConfig は共有されるため、呼び出し側で書き換えないこと。
+    """
+
+    def __init__(self, templates_dir: Path = TEMPLATES_DIR):
+        self.templates_dir = templates_dir
+        self._configs: dict[str, tuple[int, TemplateConfig]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template_id: str | None = None) -> TemplateConfig:
+        tid = template_id or DEFAULT_TEMPLATE_ID
+        profile_path = self.templates_dir / tid / "profile.json"
+        try:
+            mtime_ns = profile_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Template not found: {tid} (expected {profile_path})") from None
+        with self._lock:
+            cached = self._configs.get(tid)
+            if cached is not None and cached[0] == mtime_ns:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            config = TemplateConfig(profile_path)
+            self._configs[tid] = (mtime_ns, config)
+            return config
+
+    def invalidate(self, template_id: str | None = None):
+        """指定テンプレート（省略時は全件）を破棄する"""
+        with self._lock:
+            if template_id is None:
+                self._configs.clear()
+            else:
+                self._configs.pop(template_id, None)
+
+
+TEMPLATE_CONFIGS = TemplateConfigRegistry()
+
 
 def get_template_config(template_id: str | None = None) -> TemplateConfig:
     """テンプレートIDからTemplateConfigを取得。未指定時はデフォルト。"""
-    tid = template_id or DEFAULT_TEMPLATE_ID
-    profile_path = TEMPLATES_DIR / tid / "profile.json"
-    if not profile_path.exists():
-        raise FileNotFoundError(f"Template not found: {tid} (expected {profile_path})")
-    return TemplateConfig(profile_path)
+    return TEMPLATE_CONFIGS.get(template_id)
 
 # ─── テンプレート操作 ─────────────────────────────────
+COMPILED_DIR_NAME = ".compiled"
+
+
 def load_template(config: TemplateConfig | None = None) -> Presentation:
+    """
+    テンプレートを開く。コンパイル済み（サンプルスライド除去済み）パッケージがあれば
+    それを優先し、なければ初回にここで書き出す。書き出せない場合は元ファイルを開く。
+    """
     if config is None:
         config = get_template_config()
-    return Presentation(str(config.template_path))
+    try:
+        path = compile_template(config.template_path)
+    except OSError as e:
+        print(f"  [template] コンパイル済みテンプレートを書き出せません: {e}")
+        path = config.template_path
+    return Presentation(str(path))
 
 def remove_all_slides(prs: Presentation):
     r_ns = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
@@ -78,6 +164,124 @@ def remove_all_slides(prs: Presentation):
             prs.part.rels.pop(rId)
         slide_id_list.remove(sld_id)
 
+def _strip_section_slide_ids(prs: Presentation):
+    """セクション定義（p14:sectionLst）に残った削除済みスライドへの参照を除去する"""
+    p14_ns = 'http://schemas.microsoft.com/office/powerpoint/2010/main'
+    for sld_id in list(prs.part._element.iter(f'{{{p14_ns}}}sldId')):
+        sld_id.getparent().remove(sld_id)
+
+# ─── コンパイル済みテンプレート ───────────────────────
+def compile_template(template_path: Path, sha256: str | None = None) -> Path:
+    """
+    template.pptx からサンプルスライド・その画像・孤立した rels を除去したパッケージを
+    <template_dir>/.compiled/<sha256>.pptx に書き出し、そのパスを返す。
+    同じハッシュの成果物が既にあれば何もしない。古いハッシュの成果物は削除する。
+    """
+    template_path = Path(template_path)
+    sha256 = sha256 or file_sha256(template_path)
+    compiled_dir = template_path.parent / COMPILED_DIR_NAME
+    out = compiled_dir / f"{sha256}.pptx"
+    if out.exists():
+        return out
+
+    prs = Presentation(str(template_path))
+    remove_all_slides(prs)
+    _strip_section_slide_ids(prs)
+    compiled_dir.mkdir(exist_ok=True)
+    # 並行ビルドが同時に書き出しても壊れないよう、一時ファイル経由で置き換える
+    tmp = compiled_dir / f"{sha256}.{os.getpid()}.{threading.get_ident()}.tmp"
+    prs.save(str(tmp))  # 到達不能になったサンプルスライドのパーツはここで落ちる
+    os.replace(tmp, out)
+    for stale in compiled_dir.glob("*.pptx"):
+        if stale != out:
+            stale.unlink(missing_ok=True)
+    print(f"  [template] コンパイル済み: {out.relative_to(template_path.parent.parent)}")
+    return out
+
+# ─── テンプレートプール ───────────────────────────────
+
+
+class _PoolEntry:
+    """プール内の1テンプレート分（スライドを除去したマスターパッケージのバイト列）"""
+
+    def __init__(self, path: Path, blob: bytes, mtime_ns: int, size: int, sha256: str):
+        self.path = path
+        self.blob = blob
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+
+    def is_fresh(self, st: os.stat_result) -> bool:
+        """mtime/サイズが一致すれば有効。mtime だけ変わった場合はハッシュで再確認する。"""
+        if st.st_mtime_ns == self.mtime_ns and st.st_size == self.size:
+            return True
+        if file_sha256(self.path) != self.sha256:
+            return False
+        # 内容は同一（touch 等）→ mtime だけ更新して再利用
+        self.mtime_ns, self.size = st.st_mtime_ns, st.st_size
+        return True
+
+
+class TemplatePool:
+    """
+    テンプレートをプロセス内で1回だけ読み込み、ビルドごとに安価なクローンを払い出す。
+
+    初回にコンパイル済みテンプレート（compile_template）のバイト列を読み込んで
+    保持する。acquire() はそのバイト列から Presentation を開き直すだけなので、
+    元テンプレートのサンプルスライド・画像を毎回パースしない。
+    テンプレートファイルの mtime またはハッシュが変わったらエントリを破棄する。
+    """
+
+    def __init__(self):
+        self._entries: dict[Path, _PoolEntry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, config: TemplateConfig | None = None) -> Presentation:
+        """スライドなしのテンプレートのクローンを返す（呼び出し側で自由に編集してよい）"""
+        entry = self._entry(config or get_template_config())
+        return Presentation(io.BytesIO(entry.blob))
+
+    def _entry(self, config: TemplateConfig) -> _PoolEntry:
+        path = Path(config.template_path).resolve()
+        st = path.stat()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.is_fresh(st):
+                self.hits += 1
+                return entry
+            self.misses += 1
+            entry = self._load(path, st)
+            self._entries[path] = entry
+            return entry
+
+    @staticmethod
+    def _load(path: Path, st: os.stat_result) -> _PoolEntry:
+        sha256 = file_sha256(path)
+        try:
+            blob = compile_template(path, sha256).read_bytes()
+        except OSError as e:
+            print(f"  [template] コンパイル済みテンプレートを書き出せません: {e}")
+            prs = Presentation(str(path))
+            remove_all_slides(prs)
+            _strip_section_slide_ids(prs)
+            buf = io.BytesIO()
+            prs.save(buf)
+            blob = buf.getvalue()
+        return _PoolEntry(path, blob, st.st_mtime_ns, st.st_size, sha256)
+
+    def invalidate(self, config: TemplateConfig | None = None):
+        """指定テンプレート（省略時は全件）をプールから破棄する"""
+        with self._lock:
+            if config is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(Path(config.template_path).resolve(), None)
+
+
+TEMPLATE_POOL = TemplatePool()
+
 # ─── テキスト設定 ─────────────────────────────────────
 def fill_text_frame(tf, text: str):
     """
@@ -85,6 +289,10 @@ def fill_text_frame(tf, text: str):
     tf.clear() を使わず XML レベルで操作することで、テンプレートの
     フォント・色・サイズ等のスタイル継承（<a:pPr> / lstStyle）を保持する。
     """
+    _fill_txBody(tf._txBody, text)
+
+def _fill_txBody(txBody, text: str):
+    """fill_text_frame の本体。<p:txBody> 要素を直接受け取る。"""
     from pptx.oxml.ns import qn
     from lxml import etree
 
@@ -92,7 +300,6 @@ def fill_text_frame(tf, text: str):
     if not lines:
         return
 
-    txBody = tf._txBody
     paras  = txBody.findall(qn('a:p'))
 
     # ── 最初の段落を再利用（<a:pPr> を保持してスタイルを守る） ──
@@ -129,6 +336,74 @@ def set_body_text(slide, text: str, search_order: list[int] | None = None):
         if set_placeholder_text(slide, idx, text):
             return
 
+# ─── プレースホルダー充填プラン ───────────────────────
+class FillPlan:
+    """
+    1つの type_key（レイアウト）に対するプレースホルダー充填プラン。
+    TemplateConfig.placeholders と body_placeholder_search_order からテンプレートごとに
+    1回だけコンパイルし、どの ph_idx にどのフィールドを入れるか・どれをクリアするか・
+    どれを削除するかを保持する。apply() はシェイプツリーを1回走査するだけで済む。
+    """
+
+    def __init__(self, placeholders: dict, body_search_order: list[int] | None):
+        self.title_ph = placeholders.get("title", 0)
+        self.subtitle_ph = placeholders.get("subtitle", 13)
+        self.master_title_ph = placeholders.get("master_title")
+        # 本文: 探索順で最初に存在するプレースホルダーに入れる
+        self.body_search_order = tuple(body_search_order or [10, 14, 1, 2])
+        # objects のみのスライドで削除する本文候補（シェイプツリー順で最初の1つ）
+        self.removable_phs = frozenset(self.body_search_order)
+        # マッピングされていないプレースホルダーはクリア対象
+        self.mapped_phs = frozenset(placeholders.values())
+
+    def fields(self, slide_data: dict) -> list[tuple[int, str]]:
+        """本文以外の (ph_idx, テキスト) を書き込み順に返す"""
+        fields = []
+        title = slide_data.get("title", "")
+        if title:
+            fields.append((self.title_ph, title))
+        subtitle = slide_data.get("subtitle", "")
+        if subtitle:
+            fields.append((self.subtitle_ph, subtitle))
+        if self.master_title_ph is not None:
+            fields.append((self.master_title_ph, slide_data.get("master_title", "")))
+        return fields
+
+    def apply(self, slide, slide_data: dict, has_objects: bool):
+        """シェイプツリーを1回走査してプレースホルダーを充填・クリア・削除する"""
+        ph_elms = {}
+        removable = None
+        for elm in slide.shapes._spTree.iter_ph_elms():
+            idx = elm.ph_idx
+            ph_elms.setdefault(idx, elm)
+            if removable is None and idx in self.removable_phs:
+                removable = elm
+
+        for idx, text in self.fields(slide_data):
+            elm = ph_elms.get(idx)
+            if elm is not None:
+                _fill_txBody(elm.txBody, text)
+
+        # 本文は探索順で最初に見つかったプレースホルダーへ（サブタイトル等と重なれば上書き）
+        body = slide_data.get("body", "")
+        if body:
+            idx = next((i for i in self.body_search_order if i in ph_elms), None)
+            if idx is not None:
+                _fill_txBody(ph_elms[idx].txBody, body)
+
+        # body が空で objects がある場合、body プレースホルダを削除
+        # （空プレースホルダの点線枠が画面表示で目立つため）
+        elif has_objects and removable is not None:
+            removable.getparent().remove(removable)
+            ph_elms = {i: e for i, e in ph_elms.items() if e is not removable}
+
+        # マッピングされていないプレースホルダーのデフォルトテキストをクリア
+        # （テンプレートのレイアウトから継承された「マスタータイトル」等が残るのを防ぐ）
+        for idx, elm in ph_elms.items():
+            txBody = getattr(elm, "txBody", None)
+            if idx not in self.mapped_phs and txBody is not None:
+                _fill_txBody(txBody, "")
+
 # ─── オブジェクト設定 ─────────────────────────────────
 def parse_objects(objects) -> list[dict]:
     if not objects:
@@ -146,138 +421,377 @@ def parse_objects(objects) -> list[dict]:
                 return []
     return []
 
-def add_objects_to_slide(slide, objects: list[dict]):
+# 図形の描画方式: "xml"（lxml で <p:sp> を直接生成、既定）/ "api"（python-pptx の高レベルAPI）
+OBJECT_RENDERER = "xml"
+
+
+def add_objects_to_slide(slide, objects: list[dict], renderer: str | None = None):
+    """
+    box / arrow / text オブジェクトをスライドに追加する。
+    renderer 未指定時は OBJECT_RENDERER。両方式の出力 XML は同一（test_pptx_engine.py で検証）。
+    """
+    if (renderer or OBJECT_RENDERER) == "xml":
+        _add_objects_xml(slide, objects)
+    else:
+        _add_objects_api(slide, objects)
+
+
+def _add_objects_api(slide, objects: list[dict]):
     for obj in parse_objects(objects):
-        obj_type = obj.get("type", "box")
-        left   = Inches(obj.get("left",   1.0))
-        top    = Inches(obj.get("top",    2.0))
-        width  = Inches(obj.get("width",  2.0))
-        height = Inches(obj.get("height", 0.8))
-
-        if obj_type in ("box", "rect"):
-            shape = slide.shapes.add_shape(MSO_AUTO_SHAPE_TYPE.RECTANGLE, left, top, width, height)
-            shape.fill.solid()
-            shape.fill.fore_color.rgb = RGBColor.from_string(obj.get("fill_color", "4472C4"))
-            shape.line.fill.background()
-            text = obj.get("text", "")
-            tf = shape.text_frame
-            tf.word_wrap = True
-            tf.auto_size = None
-            v_align = obj.get("v_align", "middle")
-            if v_align == "top":
-                tf.paragraphs[0].space_before = Pt(0)
-            else:
-                shape.text_frame._txBody.bodyPr.set("anchor", "ctr" if v_align == "middle" else "b")
-            if text:
-                tf.clear()
-                # 改行で段落を分割し、各行に統一されたフォントサイズを適用
-                lines = text.split("\n")
-                font_size = Pt(obj.get("font_size", 12))
-                font_color = RGBColor.from_string(obj.get("font_color", "FFFFFF"))
-                font_bold = obj.get("bold", True)
-                
-                for line_idx, line in enumerate(lines):
-                    if line_idx == 0:
-                        p = tf.paragraphs[0]
-                    else:
-                        p = tf.add_paragraph()
-                    p.text = line
-                    p.alignment = PP_ALIGN.CENTER
-                    
-                    # この段落内の全 run にフォントサイズを適用
-                    for run in p.runs:
-                        run.font.size = font_size
-                        run.font.color.rgb = font_color
-                        run.font.bold = font_bold
-
-        elif obj_type == "arrow":
-            print(f"[DEBUG] Creating arrow at ({left.inches:.2f}\", {top.inches:.2f}\") size {width.inches:.2f}\"x{height.inches:.2f}\"")
-            shape = slide.shapes.add_shape(MSO_AUTO_SHAPE_TYPE.RIGHT_ARROW, left, top, width, height)
-            shape.fill.solid()
-            shape.fill.fore_color.rgb = RGBColor.from_string(obj.get("fill_color", "ED7D31"))
-            shape.line.fill.background()
-            print(f"[DEBUG] Arrow shape created: {shape.name}")
-
-        elif obj_type == "text":
-            txBox = slide.shapes.add_textbox(left, top, width, height)
-            tf = txBox.text_frame
-            tf.word_wrap = True
-            v_align = obj.get("v_align", "top")
-            if v_align == "middle":
-                tf._txBody.bodyPr.set("anchor", "ctr")
-            elif v_align == "bottom":
-                tf._txBody.bodyPr.set("anchor", "b")
+        _add_object_api(slide, obj)
+
+
+def _add_object_api(slide, obj: dict):
+    obj_type = obj.get("type", "box")
+    left   = Inches(obj.get("left",   1.0))
+    top    = Inches(obj.get("top",    2.0))
+    width  = Inches(obj.get("width",  2.0))
+    height = Inches(obj.get("height", 0.8))
+
+    if obj_type in ("box", "rect"):
+        shape = slide.shapes.add_shape(MSO_AUTO_SHAPE_TYPE.RECTANGLE, left, top, width, height)
+        shape.fill.solid()
+        shape.fill.fore_color.rgb = RGBColor.from_string(obj.get("fill_color", "4472C4"))
+        shape.line.fill.background()
+        text = obj.get("text", "")
+        tf = shape.text_frame
+        tf.word_wrap = True
+        tf.auto_size = None
+        v_align = obj.get("v_align", "middle")
+        if v_align == "top":
+            tf.paragraphs[0].space_before = Pt(0)
+        else:
+            shape.text_frame._txBody.bodyPr.set("anchor", "ctr" if v_align == "middle" else "b")
+        if text:
             tf.clear()
-            font_sz = Pt(obj.get("font_size", 11))
-            font_clr = RGBColor.from_string(obj.get("font_color", "404040"))
-            font_bold = obj.get("bold", False)
-            lines = obj.get("text", "").split("\n")
-            for i, line in enumerate(lines):
-                p = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
+            # 改行で段落を分割し、各行に統一されたフォントサイズを適用
+            lines = text.split("\n")
+            font_size = Pt(obj.get("font_size", 12))
+            font_color = RGBColor.from_string(obj.get("font_color", "FFFFFF"))
+            font_bold = obj.get("bold", True)
+            
+            for line_idx, line in enumerate(lines):
+                if line_idx == 0:
+                    p = tf.paragraphs[0]
+                else:
+                    p = tf.add_paragraph()
                 p.text = line
-                p.alignment = PP_ALIGN.LEFT
+                p.alignment = PP_ALIGN.CENTER
+                
                 # この段落内の全 run にフォントサイズを適用
                 for run in p.runs:
-                    run.font.size  = font_sz
-                    run.font.color.rgb = font_clr
+                    run.font.size = font_size
+                    run.font.color.rgb = font_color
                     run.font.bold = font_bold
 
+    elif obj_type == "arrow":
+        print(f"[DEBUG] Creating arrow at ({left.inches:.2f}\", {top.inches:.2f}\") size {width.inches:.2f}\"x{height.inches:.2f}\"")
+        shape = slide.shapes.add_shape(MSO_AUTO_SHAPE_TYPE.RIGHT_ARROW, left, top, width, height)
+        shape.fill.solid()
+        shape.fill.fore_color.rgb = RGBColor.from_string(obj.get("fill_color", "ED7D31"))
+        shape.line.fill.background()
+        print(f"[DEBUG] Arrow shape created: {shape.name}")
+
+    elif obj_type == "text":
+        txBox = slide.shapes.add_textbox(left, top, width, height)
+        tf = txBox.text_frame
+        tf.word_wrap = True
+        v_align = obj.get("v_align", "top")
+        if v_align == "middle":
+            tf._txBody.bodyPr.set("anchor", "ctr")
+        elif v_align == "bottom":
+            tf._txBody.bodyPr.set("anchor", "b")
+        tf.clear()
+        font_sz = Pt(obj.get("font_size", 11))
+        font_clr = RGBColor.from_string(obj.get("font_color", "404040"))
+        font_bold = obj.get("bold", False)
+        lines = obj.get("text", "").split("\n")
+        for i, line in enumerate(lines):
+            p = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
+            p.text = line
+            p.alignment = PP_ALIGN.LEFT
+            # この段落内の全 run にフォントサイズを適用
+            for run in p.runs:
+                run.font.size  = font_sz
+                run.font.color.rgb = font_clr
+                run.font.bold = font_bold
+
+# ─── 図形の高速描画（lxml）──────────────────────────────
+# python-pptx の add_shape / fill / text_frame API が生成するのと同一の <p:sp> を
+# 文字列テンプレートから直接組み立て、spTree に差し込む。
+_SP_NSDECLS = ('xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+               'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"')
+
+_AUTOSHAPE_SP = (
+    '<p:sp ' + _SP_NSDECLS + '>'
+    '<p:nvSpPr><p:cNvPr id="%d" name="%s %d"/><p:cNvSpPr/><p:nvPr/></p:nvSpPr>'
+    '<p:spPr><a:xfrm><a:off x="%d" y="%d"/><a:ext cx="%d" cy="%d"/></a:xfrm>'
+    '<a:prstGeom prst="%s"><a:avLst/></a:prstGeom>'
+    '<a:solidFill><a:srgbClr val="%s"/></a:solidFill><a:ln><a:noFill/></a:ln></p:spPr>'
+    '<p:style><a:lnRef idx="1"><a:schemeClr val="accent1"/></a:lnRef>'
+    '<a:fillRef idx="3"><a:schemeClr val="accent1"/></a:fillRef>'
+    '<a:effectRef idx="2"><a:schemeClr val="accent1"/></a:effectRef>'
+    '<a:fontRef idx="minor"><a:schemeClr val="lt1"/></a:fontRef></p:style>'
+    '<p:txBody><a:bodyPr %s/><a:lstStyle/>%s</p:txBody></p:sp>'
+)
+
+_TEXTBOX_SP = (
+    '<p:sp ' + _SP_NSDECLS + '>'
+    '<p:nvSpPr><p:cNvPr id="%d" name="TextBox %d"/><p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+    '<p:spPr><a:xfrm><a:off x="%d" y="%d"/><a:ext cx="%d" cy="%d"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+    '<p:txBody><a:bodyPr wrap="square"%s><a:spAutoFit/></a:bodyPr><a:lstStyle/>%s</p:txBody></p:sp>'
+)
+
+_RUN = ('<a:r><a:rPr sz="%d"%s><a:solidFill><a:srgbClr val="%s"/></a:solidFill></a:rPr>'
+        '<a:t>%s</a:t></a:r>')
+
+_BOX_SPC_BEF = '<a:spcBef><a:spcPts val="0"/></a:spcBef>'
+
+_xml_parser = None
+
+
+def _sp_parser():
+    """python-pptx のカスタム要素クラスを使う（空白テキストは保持する）パーサー"""
+    global _xml_parser
+    if _xml_parser is None:
+        from lxml import etree
+        from pptx.oxml import element_class_lookup
+        _xml_parser = etree.XMLParser(resolve_entities=False)
+        _xml_parser.set_element_class_lookup(element_class_lookup)
+    return _xml_parser
+
+
+def _paragraphs_xml(lines: list[str], algn: str, size: int, bold, color: str,
+                    first_ppr_extra: str = "") -> str:
+    """_Paragraph.text / font 設定と同じ <a:p> 列を返す（垂直タブは <a:br/>、空の run は作らない）"""
+    from xml.sax.saxutils import escape
+    from pptx.oxml.text import CT_RegularTextRun
+
+    b_attr = "" if bold is None else (' b="1"' if bold else ' b="0"')
+    parts = []
+    for i, line in enumerate(lines):
+        extra = first_ppr_extra if i == 0 else ""
+        parts.append(f'<a:p><a:pPr algn="{algn}">{extra}</a:pPr>' if extra
+                     else f'<a:p><a:pPr algn="{algn}"/>')
+        for j, seg in enumerate(line.replace("\v", "\n").split("\n")):
+            if j:
+                parts.append('<a:br/>')
+            if seg:
+                parts.append(_RUN % (size, b_attr, color,
+                                     escape(CT_RegularTextRun._escape_ctrl_chars(seg))))
+        parts.append('</a:p>')
+    return "".join(parts)
+
+
+def _object_xml(obj: dict, shape_id: int) -> str | None:
+    """
+    オブジェクト1件分の <p:sp> XML を返す。未対応の type は空文字（何も描画しない）。
+    高速描画で扱えない入力（数値でない座標・文字列でないテキスト等）は None を返し、
+    API 描画に回す。
+    """
+    obj_type = obj.get("type", "box")
+    if obj_type not in ("box", "rect", "arrow", "text"):
+        return ""
+    geom = [obj.get("left", 1.0), obj.get("top", 2.0), obj.get("width", 2.0), obj.get("height", 0.8)]
+    if not all(isinstance(v, (int, float)) for v in geom):
+        return None
+    x, y, cx, cy = (int(Inches(v)) for v in geom)
+
+    if obj_type == "arrow":
+        fill = str(RGBColor.from_string(obj.get("fill_color", "ED7D31")))
+        return _AUTOSHAPE_SP % (shape_id, "Right Arrow", shape_id - 1, x, y, cx, cy, "rightArrow", fill,
+                                'rtlCol="0" anchor="ctr"', '<a:p><a:pPr algn="ctr"/></a:p>')
+
+    if obj_type == "text":
+        text = obj.get("text", "")
+        bold = obj.get("bold", False)
+        size = obj.get("font_size", 11)
+        if not isinstance(text, str) or bold not in (True, False, None) or not isinstance(size, (int, float)):
+            return None
+        v_align = obj.get("v_align", "top")
+        anchor = ' anchor="ctr"' if v_align == "middle" else ' anchor="b"' if v_align == "bottom" else ""
+        color = str(RGBColor.from_string(obj.get("font_color", "404040")))
+        paras = _paragraphs_xml(text.split("\n"), "l", Pt(size).centipoints, bold, color)
+        return _TEXTBOX_SP % (shape_id, shape_id - 1, x, y, cx, cy, anchor, paras)
+
+    # box / rect
+    fill = str(RGBColor.from_string(obj.get("fill_color", "4472C4")))
+    text = obj.get("text", "")
+    v_align = obj.get("v_align", "middle")
+    # v_align=top は段落の spcBef=0 のみ設定し、anchor はテンプレート既定の ctr のまま
+    anchor = "b" if v_align not in ("top", "middle") else "ctr"
+    spc_bef = _BOX_SPC_BEF if v_align == "top" else ""
+    if text:
+        bold = obj.get("bold", True)
+        size = obj.get("font_size", 12)
+        if not isinstance(text, str) or bold not in (True, False, None) or not isinstance(size, (int, float)):
+            return None
+        color = str(RGBColor.from_string(obj.get("font_color", "FFFFFF")))
+        paras = _paragraphs_xml(text.split("\n"), "ctr", Pt(size).centipoints, bold, color, spc_bef)
+    else:
+        paras = _paragraphs_xml([""], "ctr", 0, None, "", spc_bef)
+    return _AUTOSHAPE_SP % (shape_id, "Rectangle", shape_id - 1, x, y, cx, cy, "rect", fill,
+                            f'rtlCol="0" anchor="{anchor}" wrap="square"', paras)
+
+
+def _add_objects_xml(slide, objects: list[dict]):
+    """add_objects_to_slide の高速版。shape id は最大値を1回だけ求めて連番で振る。"""
+    from lxml import etree
+    from pptx.oxml.ns import qn
+
+    spTree = slide.shapes._spTree
+    ext_lst = spTree.find(qn("p:extLst"))
+    parser = _sp_parser()
+    next_id = spTree.max_shape_id + 1
+    for obj in parse_objects(objects):
+        xml = _object_xml(obj, next_id)
+        if xml is None:
+            # 想定外の入力は従来の API 描画に任せる（エラー内容も従来どおり）
+            _add_object_api(slide, obj)
+            next_id = spTree.max_shape_id + 1
+            continue
+        if not xml:
+            continue
+        sp = etree.fromstring(xml, parser)
+        if ext_lst is None:
+            spTree.append(sp)
+        else:
+            ext_lst.addprevious(sp)
+        next_id += 1
+
 # ─── 画像生成 (Gemini) ───────────────────────────────
+# 生成画像の共有キャッシュ（プロジェクト横断。IMAGE_CACHE_DIR / IMAGE_CACHE_MAX_BYTES で変更可）
+IMAGE_CACHE = ImageCache()
+
+
 def generate_image_gemini(prompt: str, model: str = "gemini-3-pro-image-preview") -> bytes | None:
-    from google import genai
-    from google.genai import types as genai_types
-    key = os.getenv("GEMINI_API_KEY", "")
-    if not key:
-        print(f"  [skip] GEMINI_API_KEY 未設定")
-        return None
-    print(f"  [image] 生成中: {prompt[:50]}...")
-    client = genai.Client(api_key=key)
-    response = client.models.generate_content(
-        model=model,
-        contents=prompt,
-        config=genai_types.GenerateContentConfig(response_modalities=["IMAGE", "TEXT"]),
-    )
-    for part in response.candidates[0].content.parts:
-        if part.inline_data is not None:
-            print(f"  [image] 生成完了")
-            return part.inline_data.data
-    return None
+    """
+    プロセス共通の画像生成クライアント（image_client.py）で生成する。
+    タイムアウト・再試行・レート制限つきで、バックエンドの不調時はプレースホルダー画像を返す（例外は出さない）
+    """
+    from image_client import get_image_client
+    return get_image_client().generate(prompt, model)
+
+
+def store_generated_image(prompt: str, model: str, blob: bytes | None):
+    """生成画像を共有キャッシュへ保存する（プレースホルダーは保存せず、次のビルドで再生成させる）"""
+    from image_client import is_placeholder
+    if blob and not is_placeholder(blob):
+        IMAGE_CACHE.put(prompt, model, blob)
 
 def _center_crop_to_ratio(img_bytes: bytes, target_w: float, target_h: float) -> bytes:
-    """画像を target_w:target_h のアスペクト比で中央クロップする。"""
+    """画像を target_w:target_h のアスペクト比で中央クロップする（元解像度の PNG で返す）。"""
     from PIL import Image
-    img = Image.open(io.BytesIO(img_bytes))
+    with TRACER.span("center_crop", cat="image"):
+        img = Image.open(io.BytesIO(img_bytes))
+        cropped = _crop_image_to_ratio(img, target_w, target_h)
+        if cropped is img:
+            return img_bytes  # ほぼ同じ比率ならクロップ不要
+
+        buf = io.BytesIO()
+        cropped.save(buf, format="PNG")
+        return buf.getvalue()
+
+
+def _crop_image_to_ratio(img, target_w: float, target_h: float):
+    """PIL 画像を中央クロップする。比率がほぼ同じなら img をそのまま返す。"""
     src_w, src_h = img.size
     target_ratio = target_w / target_h
     src_ratio = src_w / src_h
 
     if abs(src_ratio - target_ratio) < 0.01:
-        return img_bytes  # ほぼ同じ比率ならクロップ不要
+        return img
 
     if src_ratio > target_ratio:
         # 元画像が横に広い → 左右をクロップ
         new_w = int(src_h * target_ratio)
         left = (src_w - new_w) // 2
-        img = img.crop((left, 0, left + new_w, src_h))
-    else:
-        # 元画像が縦に長い → 上下をクロップ
-        new_h = int(src_w / target_ratio)
-        top = (src_h - new_h) // 2
-        img = img.crop((0, top, src_w, top + new_h))
+        return img.crop((left, 0, left + new_w, src_h))
+    # 元画像が縦に長い → 上下をクロップ
+    new_h = int(src_w / target_ratio)
+    top = (src_h - new_h) // 2
+    return img.crop((0, top, src_w, top + new_h))
+
+# ─── 配置サイズのレンディション ───────────────────────
+IMAGE_RENDITION_DPI = 150
+IMAGE_RENDITION_FORMAT = "auto"  # "auto"（内容で PNG/JPEG を選ぶ）/ "png" / "jpeg"
+JPEG_QUALITY = 85
+
+
+def _choose_image_format(img) -> str:
+    """透過あり、または色数の少ない図版・イラストは PNG、写真調の画像は JPEG"""
+    from PIL import Image
+    if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+        if img.convert("RGBA").getchannel("A").getextrema()[0] < 255:
+            return "PNG"
+    # 縮小時の補間で色が増えないよう最近傍で間引いて色数を数える
+    sample = img.convert("RGB").resize((min(img.width, 256), min(img.height, 256)), Image.NEAREST)
+    return "PNG" if sample.getcolors(maxcolors=1024) is not None else "JPEG"
+
+
+def render_image(img_bytes: bytes, width_inch: float, height_inch: float | None = None,
+                 dpi: int = IMAGE_RENDITION_DPI, fmt: str = IMAGE_RENDITION_FORMAT) -> bytes:
+    """
+    配置枠用のレンディションを作る。
+    高さ指定時は枠の比率に中央クロップし、幅 width_inch * dpi ピクセルまで縮小（拡大はしない）、
+    fmt に従って PNG / JPEG で再エンコードする。手を加える必要がなければ元のバイト列を返す。
+    """
+    from PIL import Image
+    img = Image.open(io.BytesIO(img_bytes))
+    src_format = img.format
+    with TRACER.span("crop_resize", cat="image", src=f"{img.width}x{img.height}"):
+        out = _crop_image_to_ratio(img, width_inch, height_inch) if height_inch else img
+
+        target_w = max(1, round(width_inch * dpi))
+        if out.width > target_w:
+            target_h = max(1, round(out.height * target_w / out.width))
+            out = out.resize((target_w, target_h), Image.LANCZOS)
+
+    out_format = fmt.upper() if fmt != "auto" else _choose_image_format(out)
+    if out_format == "JPG":
+        out_format = "JPEG"
+    if out is img and out_format == src_format:
+        return img_bytes
 
     buf = io.BytesIO()
-    img.save(buf, format="PNG")
+    with TRACER.span("encode", cat="image", format=out_format, size=f"{out.width}x{out.height}"):
+        if out_format == "JPEG":
+            if out.mode not in ("RGB", "L"):
+                out = out.convert("RGB")
+            out.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        else:
+            out.save(buf, format="PNG")
     return buf.getvalue()
 
 
+def placement_rendition(img_bytes: bytes, width_inch: float, height_inch: float | None = None,
+                        dpi: int = IMAGE_RENDITION_DPI, fmt: str = IMAGE_RENDITION_FORMAT) -> bytes:
+    """render_image() の結果を (元画像ハッシュ, 枠サイズ, DPI, 形式) で IMAGE_CACHE にメモ化する"""
+    source_sha1 = hashlib.sha1(img_bytes).hexdigest()
+    box = (width_inch, height_inch or 0)
+    rendition = IMAGE_CACHE.get_rendition(source_sha1, box, dpi, fmt)
+    if rendition is None:
+        with TRACER.span("render_image", cat="image", dpi=dpi):
+            rendition = render_image(img_bytes, width_inch, height_inch, dpi=dpi, fmt=fmt)
+        IMAGE_CACHE.put_rendition(source_sha1, box, dpi, fmt, rendition)
+    return rendition
+
+
+
 def add_images_to_slide(slide, images: list[dict], layout_index: int = -1,
                         config: TemplateConfig | None = None,
-                        slides_dir: Path | None = None):
+                        slides_dir: Path | None = None,
+                        prefetched: dict[tuple[str, str], bytes | None] | None = None,
+                        dpi: int | None = None):
     """
     images: JSON の images フィールド
     layout_index: テンプレートの「画像挿入位置」座標を参照するためのレイアウトインデックス
     config: テンプレート設定（image_areas等を参照）
-    slides_dir: 画像キャッシュの保存先（指定時、生成画像を保存＆次回再利用）
+    slides_dir: "file" の相対パスの基準フォルダー
+    prefetched: prefetch_images() の結果。(prompt, model) があればその場で生成せずに使う
+    dpi: 埋め込む画像の解像度（省略時は IMAGE_RENDITION_DPI）
+    生成画像と配置サイズのレンディションは共有キャッシュ IMAGE_CACHE に保存し、次回以降再利用する。
     """
     if config is None:
         config = get_template_config()
@@ -303,18 +817,16 @@ def add_images_to_slide(slide, images: list[dict], layout_index: int = -1,
             continue
         model = img_spec.get("model", "gemini-3-pro-image-preview")
 
-        # キャッシュにない場合は Gemini 生成
+        # ファイルがない場合は プリフェッチ結果 → 共有キャッシュ → Gemini 生成 の順
         if not img_bytes:
-            img_bytes = generate_image_gemini(prompt, model=model)
-            # 生成成功時、slides_dir があれば自動保存
-            if img_bytes and slides_dir:
-                cache_dir = slides_dir / "images"
-                cache_dir.mkdir(exist_ok=True)
-                # ファイル名: prompt先頭20文字をサニタイズ
-                safe_name = "".join(c if c.isalnum() or c in "-_ " else "" for c in prompt[:30]).strip()
-                cache_path = cache_dir / f"{safe_name}.png"
-                cache_path.write_bytes(img_bytes)
-                print(f"  [image] 保存: {cache_path.name}")
+            if prefetched is not None and (prompt, model) in prefetched:
+                img_bytes = prefetched[(prompt, model)]
+            else:
+                img_bytes = IMAGE_CACHE.get(prompt, model)
+                if img_bytes is None:
+                    with TRACER.span("image_generate", cat="image", prompt=prompt[:40], model=model):
+                        img_bytes = generate_image_gemini(prompt, model=model)
+                    store_generated_image(prompt, model, img_bytes)
 
         if not img_bytes:
             continue
@@ -334,9 +846,11 @@ def add_images_to_slide(slide, images: list[dict], layout_index: int = -1,
             width_inch  = img_spec.get("width",  5.5)
             height_inch = img_spec.get("height", None)
 
-        # 配置先の幅・高さが両方分かる場合は中央クロップしてアスペクト比を合わせる
+        # 配置枠に合わせた解像度・形式のレンディションを埋め込む
+        # （幅・高さが両方分かる場合は中央クロップしてアスペクト比も合わせる）
+        img_bytes = placement_rendition(img_bytes, width_inch, height_inch,
+                                        dpi=dpi or IMAGE_RENDITION_DPI)
         if height_inch:
-            img_bytes = _center_crop_to_ratio(img_bytes, width_inch, height_inch)
             slide.shapes.add_picture(
                 io.BytesIO(img_bytes),
                 Inches(left_inch), Inches(top_inch),
@@ -348,6 +862,215 @@ def add_images_to_slide(slide, images: list[dict], layout_index: int = -1,
                 Inches(left_inch), Inches(top_inch), Inches(width_inch)
             )
 
+# ─── 画像プリフェッチ ─────────────────────────────────
+IMAGE_PREFETCH_CONCURRENCY = 4
+IMAGE_PREFETCH_TIMEOUT = 120.0  # 秒（1リクエストあたり）
+
+
+def image_spec_needs_generation(img_spec: dict, slides_dir: Path | None) -> bool:
+    """
+    add_images_to_slide が生成 API を呼ぶことになる画像指定か（"file" が実在するか共有キャッシュにあれば不要）。
+    prefetch_images と outline_stream（受信しながらの画像生成）が使う
+    """
+    prompt = img_spec.get("prompt")
+    if not prompt:
+        return False
+    file_path = img_spec.get("file", "")
+    if file_path:
+        fp = Path(file_path)
+        if not fp.is_absolute() and slides_dir:
+            fp = slides_dir / fp
+        if fp.exists():
+            return False
+    return not IMAGE_CACHE.contains(prompt, img_spec.get("model", "gemini-3-pro-image-preview"))
+
+
+class ImagePrefetcher:
+    """
+    画像生成を concurrency 本の daemon ワーカースレッドで並行実行する
+    （prefetch_images と outline_stream.StreamingOutlineBuild が使う）。
+
+      pool = ImagePrefetcher(generator, concurrency=4, timeout=120)
+      pool.submit(key)          # 同じ (prompt, model) は1回だけ生成する
+      blob = pool.result(key)   # 生成完了か、生成開始から timeout 秒まで待つ
+      pool.close()
+
+    ThreadPoolExecutor のスレッドはインタープリター終了時に join されるため、応答しない呼び出しが1つ
+    あるだけでプロセスが終了できなくなる。ここでは timeout を過ぎた呼び出しは結果を None として放置し
+    （daemon なので終了を妨げない）、同時数を保つために代わりのワーカーを起動する。
+    後から届いた画像は共有キャッシュにだけ保存する。
+    generator: (prompt, model) -> bytes | None。省略時は generate_image_gemini
+               （ImageClient が1回の API 呼び出しを IMAGE_CALL_TIMEOUT で打ち切る）
+    """
+
+    def __init__(self, generator=None, concurrency: int = IMAGE_PREFETCH_CONCURRENCY,
+                 timeout: float = IMAGE_PREFETCH_TIMEOUT):
+        import threading
+        from collections import deque
+        self.generator = generator or (lambda prompt, model: generate_image_gemini(prompt, model=model))
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._todo: deque = deque()
+        self._submitted: set[tuple[str, str]] = set()
+        self._started: dict[tuple[str, str], float] = {}
+        self._results: dict[tuple[str, str], bytes | None] = {}
+        self._abandoned: set[tuple[str, str]] = set()
+        self._workers = 0
+        self._closed = False
+
+    def submit(self, key: tuple[str, str]):
+        with self._cond:
+            if key in self._submitted:
+                return
+            self._submitted.add(key)
+            self._todo.append(key)
+            if self._workers < self.concurrency:
+                self._spawn()
+            self._cond.notify_all()
+
+    def result(self, key: tuple[str, str]) -> bytes | None:
+        """key の画像。失敗・タイムアウトは None。待っている間に期限を過ぎた他の呼び出しも打ち切る"""
+        import time
+        with self._cond:
+            if key not in self._submitted:
+                raise KeyError(key)
+            while key not in self._results:
+                self._expire()
+                if key in self._results:
+                    break
+                # 実行中の呼び出しのうち最も早く期限が来るものまで待つ
+                deadlines = [t + self.timeout for k, t in self._started.items() if k not in self._results]
+                self._cond.wait(max(0.0, min(deadlines) - time.monotonic()) if deadlines else None)
+            return self._results[key]
+
+    def close(self):
+        """未着手の依頼を捨ててワーカーを止める（実行中の呼び出しは待たない）"""
+        with self._cond:
+            self._closed = True
+            self._todo.clear()
+            self._cond.notify_all()
+
+    # ── 内部処理 ──
+    def _spawn(self):
+        import threading
+        self._workers += 1
+        threading.Thread(target=self._worker, name="image-prefetch", daemon=True).start()
+
+    def _expire(self):
+        import time
+        now = time.monotonic()
+        for key, t in list(self._started.items()):
+            if key not in self._results and now - t >= self.timeout:
+                print(f"  [image] タイムアウト: {key[0][:50]}...")
+                self._results[key] = None
+                self._abandoned.add(key)
+                self._workers -= 1
+                self._spawn()
+
+    def _worker(self):
+        import time
+        while True:
+            with self._cond:
+                while not self._todo and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    self._workers -= 1
+                    return
+                key = self._todo.popleft()
+                self._started[key] = time.monotonic()
+                self._cond.notify_all()   # result() で待っている側に期限を知らせる
+            blob = self._generate(key)
+            with self._cond:
+                if key in self._abandoned:   # 代わりのワーカーが起動済みなので、このスレッドは終わる
+                    return
+                self._results[key] = blob
+                self._cond.notify_all()
+
+    def _generate(self, key: tuple[str, str]) -> bytes | None:
+        try:
+            with TRACER.span("image_generate", cat="image", prompt=key[0][:40], model=key[1]):
+                blob = self.generator(*key)
+        except Exception as e:
+            print(f"  [image] 生成失敗: {key[0][:50]}... ({e})")
+            return None
+        store_generated_image(*key, blob)   # タイムアウト後に届いた画像も次のビルドのためにキャッシュする
+        return blob
+
+
+def prefetch_images(outline: list[dict], config: TemplateConfig | None = None,
+                    slides_dir: Path | None = None,
+                    concurrency: int = IMAGE_PREFETCH_CONCURRENCY,
+                    timeout: float = IMAGE_PREFETCH_TIMEOUT,
+                    generator=None) -> dict[tuple[str, str], bytes | None]:
+    """
+    アウトライン全体から生成が必要な画像を集め、ImagePrefetcher で並行生成する。
+    同じ (prompt, model) は1回だけ生成する。
+    generator: (prompt, model) -> bytes | None。省略時は generate_image_gemini
+    timeout: 1リクエストの待ち時間の上限。超えた呼び出しは待たずに放置する（プロセスの終了も妨げない）
+    Returns: (prompt, model) -> 画像バイト列。失敗・タイムアウトは None
+             （スライド組み立て時にその画像はスキップされ、そのスライドは次のビルドで作り直す）
+    """
+    if config is None:
+        config = get_template_config()
+
+    requests: list[tuple[str, str]] = []
+    for slide_data in outline:
+        if not isinstance(slide_data, dict):
+            continue
+        if not config.supports_image.get(slide_data.get("type", "content"), True):
+            continue
+        for img_spec in slide_data.get("images", []):
+            if image_spec_needs_generation(img_spec, slides_dir):
+                key = (img_spec["prompt"], img_spec.get("model", "gemini-3-pro-image-preview"))
+                if key not in requests:
+                    requests.append(key)
+    if not requests:
+        return {}
+
+    concurrency = max(1, min(concurrency, len(requests)))
+    print(f"  [image] プリフェッチ: {len(requests)}枚 / 同時 {concurrency} / タイムアウト {timeout:.0f}s")
+    pool = ImagePrefetcher(generator, concurrency=concurrency, timeout=timeout)
+    for key in requests:
+        pool.submit(key)
+    try:
+        return {key: pool.result(key) for key in requests}
+    finally:
+        pool.close()
+
+
+def _images_complete(slide_data: dict, config: TemplateConfig, slides_dir: Path | None,
+                    prefetched: dict[tuple[str, str], bytes | None] | None) -> bool:
+    """
+    組み立て済みのスライドに、生成画像がすべて載ったか。
+    生成に失敗・タイムアウトした画像があるスライドは、マニフェストに記録せず次のビルドで作り直す
+    （記録すると画像の欠けたスライドがキー一致で使い回され続ける）。
+    プレースホルダー画像で代用したスライドも同じく記録しない。
+    """
+    from image_client import is_placeholder
+    if not config.supports_image.get(slide_data.get("type", "content"), True):
+        return True
+    for img_spec in slide_data.get("images", []):
+        prompt = img_spec.get("prompt")
+        if not prompt:
+            continue
+        file_path = img_spec.get("file", "")
+        if file_path:
+            fp = Path(file_path)
+            if not fp.is_absolute() and slides_dir:
+                fp = slides_dir / fp
+            if fp.exists():
+                continue
+        key = (prompt, img_spec.get("model", "gemini-3-pro-image-preview"))
+        if prefetched is not None and key in prefetched:
+            ok = bool(prefetched[key]) and not is_placeholder(prefetched[key])
+        else:
+            ok = IMAGE_CACHE.contains(*key)
+        if not ok:
+            print(f"  [incremental] 画像が欠けているため記録しません: {slide_data.get('title', '')[:30]}")
+            return False
+    return True
+
 # ─── PNG サムネイル生成 ───────────────────────────────
 def export_thumbnails(pptx_path: Path) -> list[Path]:
     """
@@ -403,116 +1126,759 @@ try {{
 # ─── スライド追加 ─────────────────────────────────────
 def add_slide(prs: Presentation, slide_data: dict,
               config: TemplateConfig | None = None,
-              slides_dir: Path | None = None):
+              slides_dir: Path | None = None,
+              prefetched: dict[tuple[str, str], bytes | None] | None = None,
+              image_dpi: int | None = None):
     if config is None:
         config = get_template_config()
 
     layout_key   = slide_data.get("type", "content")
-    title        = slide_data.get("title",    "")
-    subtitle     = slide_data.get("subtitle", "")
-    body         = slide_data.get("body",     "")
     objects      = parse_objects(slide_data.get("objects", []))
     images       = slide_data.get("images",   [])
 
     layout_index = config.layout.get(layout_key, config.layout["content"])
     layout = prs.slide_layouts[layout_index]
-    slide  = prs.slides.add_slide(layout)
-
-    # タイトル
-    title_ph = config.placeholders.get(layout_key, {}).get("title", 0)
-    if title:
-        set_placeholder_text(slide, title_ph, title)
-
-    # サブタイトル（プレースホルダーはレイアウトにより異なる）
-    if subtitle:
-        subtitle_ph = config.placeholders.get(layout_key, {}).get("subtitle", 13)
-        set_placeholder_text(slide, subtitle_ph, subtitle)
-
-    # マスタータイトル（セクション名・章タイトル等、テンプレート依存）
-    master_title_ph = config.placeholders.get(layout_key, {}).get("master_title")
-    if master_title_ph is not None:
-        master_title = slide_data.get("master_title", "")
-        set_placeholder_text(slide, master_title_ph, master_title)
-
-    if body:
-        set_body_text(slide, body, search_order=config.body_ph_search_order)
-    elif objects:
-        # body が空で objects がある場合、body プレースホルダを削除
-        # （空プレースホルダの点線枠が画面表示で目立つため）
-        body_ph_ids = set(config.body_ph_search_order or [10, 14, 1, 2])
-        for shape in list(slide.shapes):
-            if shape.is_placeholder and shape.placeholder_format.idx in body_ph_ids:
-                sp = shape._element
-                sp.getparent().remove(sp)
-                break
+    with TRACER.span("new_slide"):
+        slide = prs.slides.add_slide(layout)
+
+    # タイトル・サブタイトル・マスタータイトル・本文の充填（シェイプツリー1パス）
+    with TRACER.span("fill_placeholders"):
+        config.fill_plan(layout_key).apply(slide, slide_data, has_objects=bool(objects))
+
     if objects:
-        add_objects_to_slide(slide, objects)
+        with TRACER.span("add_objects", count=len(objects)):
+            add_objects_to_slide(slide, objects)
     if images and config.supports_image.get(layout_key, True):
-        add_images_to_slide(slide, images, layout_index=layout_index,
-                            config=config, slides_dir=slides_dir)
+        with TRACER.span("add_images", count=len(images)):
+            add_images_to_slide(slide, images, layout_index=layout_index,
+                                config=config, slides_dir=slides_dir, prefetched=prefetched,
+                                dpi=image_dpi)
     elif images:
         print(f"  [image] skip: {layout_key} layout does not support images")
 
-    # マッピングされていないプレースホルダーのデフォルトテキストをクリア
-    # （テンプレートのレイアウトから継承された「マスタータイトル」等が残るのを防ぐ）
-    mapped_phs = set(config.placeholders.get(layout_key, {}).values())
-    for shape in slide.shapes:
-        if shape.is_placeholder and shape.has_text_frame:
-            ph_idx = shape.placeholder_format.idx
-            if ph_idx not in mapped_phs:
-                fill_text_frame(shape.text_frame, "")
+    return slide
 
+# ─── スライドペイロード（並列ビルドの受け渡し単位） ─────────
+_R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+
+class SlidePayload:
+    """
+    レンダリング済みスライド1枚分。別プロセス・別パッケージへ受け渡せるよう、
+    slide XML と、その rels が参照する画像・外部リンクだけをバイト列で持つ。
+    レイアウトへの rel は受け取り側で layout_index から張り直す。
+    """
+
+    def __init__(self, layout_index: int, xml: bytes,
+                 images: dict[str, bytes], external: dict[str, tuple[str, str]]):
+        self.layout_index = layout_index
+        self.xml = xml
+        self.images = images          # rId -> 画像バイト列
+        self.external = external      # rId -> (reltype, URL)
+
+
+def slide_to_payload(slide, layout_index: int) -> SlidePayload:
+    """スライドを SlidePayload にシリアライズする"""
+    from lxml import etree
+    from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+    images, external = {}, {}
+    for rId, rel in slide.part.rels.items():
+        if rel.is_external:
+            external[rId] = (rel.reltype, rel.target_ref)
+        elif rel.reltype == RT.IMAGE:
+            images[rId] = rel.target_part.blob
+        elif rel.reltype != RT.SLIDE_LAYOUT:
+            raise ValueError(f"SlidePayload が扱えない関係です: {rel.reltype}")
+    return SlidePayload(layout_index, etree.tostring(slide.part._element), images, external)
+
+
+def add_slide_payload(prs: Presentation, payload: SlidePayload):
+    """
+    SlidePayload を prs の末尾にスライドとして追加する。
+    画像はパッケージ内で SHA1 により重複排除され、rId は追加先の採番に付け替える。
+    """
+    from pptx.oxml import parse_xml
+
+    # slides.add_slide() はレイアウトのプレースホルダーを複製するが、中身はすぐ
+    # ペイロードで置き換えるので、スライドパーツの追加と sldId 登録だけを行う
+    rId, slide = prs.part.add_slide(prs.slide_layouts[payload.layout_index])
+    prs.slides._sldIdLst.add_sldId(rId)
+    part = slide.part
+    rid_map = {}
+    for old_rId, blob in payload.images.items():
+        _, rid_map[old_rId] = part.get_or_add_image_part(io.BytesIO(blob))
+    for old_rId, (reltype, url) in payload.external.items():
+        rid_map[old_rId] = part.relate_to(url, reltype, is_external=True)
+
+    sld = parse_xml(payload.xml)
+    if rid_map:
+        r_prefix = f'{{{_R_NS}}}'
+        for el in sld.iter():
+            for key, value in el.attrib.items():
+                if key.startswith(r_prefix) and value in rid_map:
+                    el.set(key, rid_map[value])
+
+    # 新しいスライドパーツの空の <p:sld> の中身をペイロードの内容で置き換える
+    target = part._element
+    for child in list(target):
+        target.remove(child)
+    target.attrib.update(sld.attrib)
+    for child in list(sld):
+        target.append(child)
     return slide
 
+
+# ─── 並列ビルド ───────────────────────────────────────
+def _use_image_cache(cache_dir: Path | None):
+    """ワーカープロセス側: 親と同じ画像キャッシュを使う（spawn したワーカーは既定のキャッシュで起動するため）"""
+    global IMAGE_CACHE
+    if cache_dir is not None and IMAGE_CACHE.cache_dir != cache_dir:
+        IMAGE_CACHE = ImageCache(cache_dir, IMAGE_CACHE.max_bytes)
+
+
+def _render_slides_worker(template_id: str | None, slides: list[tuple[int, dict]],
+                          total: int, slides_dir: Path | None,
+                          prefetched: dict | None = None,
+                          image_dpi: int | None = None,
+                          trace: bool = False,
+                          cache_dir: Path | None = None) -> tuple[list[tuple[int, SlidePayload]], list[dict]]:
+    """
+    ワーカープロセス側: 割り当てられたスライドを自前のテンプレートプールで
+    レンダリングし、(元のインデックス, SlidePayload) のリストを返す。
+    trace: True の場合はワーカー内でも区間を計測し、イベントを2つ目の戻り値で返す
+    cache_dir: 親プロセスの画像キャッシュ（生成画像・縮小版をここから読み書きする）
+    """
+    _use_image_cache(cache_dir)
+    if trace:
+        TRACER.start()
+    config = get_template_config(template_id)
+    with TRACER.span("template_load"):
+        prs = TEMPLATE_POOL.acquire(config)
+    results = []
+    for i, slide_data in slides:
+        slide_type = slide_data.get("type", "content")
+        print(f"  [{i+1}/{total}] {slide_type}: {slide_data.get('title', '')[:30]}")
+        with TRACER.span("slide", index=i + 1, type=slide_type):
+            slide = add_slide(prs, slide_data, config=config, slides_dir=slides_dir,
+                              prefetched=prefetched, image_dpi=image_dpi)
+            layout_index = config.layout.get(slide_type, config.layout["content"])
+            with TRACER.span("to_payload"):
+                results.append((i, slide_to_payload(slide, layout_index)))
+    return results, (TRACER.stop() if trace else [])
+
+
+def render_slides_parallel(outline: list[dict], template_id: str | None,
+                           slides_dir: Path | None, workers: int,
+                           only: list[int] | None = None,
+                           prefetched: dict | None = None,
+                           image_dpi: int | None = None) -> list[SlidePayload]:
+    """
+    outline のスライドを workers 個のプロセスで分担してレンダリングし、
+    元の順序どおりの SlidePayload リストを返す（dict 以外の要素は除外）。
+    only: 指定時はそのインデックスのスライドだけをレンダリングする
+    prefetched: prefetch_images() の結果（各ワーカーへ渡す）
+    image_dpi: 埋め込み画像の解像度（add_slide へ渡す）
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    indexed = [(i, s) for i, s in enumerate(outline)
+               if isinstance(s, dict) and (only is None or i in only)]
+    workers = max(1, min(workers, len(indexed)))
+    # 画像付きスライド等の偏りを均すため、連続区間ではなく間引きで割り当てる
+    chunks = [indexed[k::workers] for k in range(workers)]
+    payloads: dict[int, SlidePayload] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_render_slides_worker, template_id, chunk, len(outline),
+                                   slides_dir, prefetched, image_dpi, TRACER.enabled, IMAGE_CACHE.cache_dir)
+                   for chunk in chunks]
+        for future in futures:
+            results, events = future.result()
+            payloads.update(results)
+            TRACER.merge(events)
+    return [payloads[i] for i in sorted(payloads)]
+
+
+# ─── 複数テンプレートの同時ビルド ─────────────────────
+def template_ids_arg(template_id) -> list[str] | None:
+    """template_id が2つ以上のテンプレートIDのリストならそのリスト、単一指定なら None"""
+    if isinstance(template_id, (list, tuple)):
+        ids = list(dict.fromkeys(template_id))
+        if len(ids) > 1:
+            return ids
+    return None
+
+
+def single_template_id(template_id) -> str | None:
+    """要素1つのリストで指定された template_id を文字列に戻す"""
+    if isinstance(template_id, (list, tuple)):
+        return template_id[0] if template_id else None
+    return template_id
+
+
+def template_output_path(output_path: str | Path, template_id: str) -> Path:
+    """
+    複数テンプレートビルドのテンプレートごとの出力先。
+    ファイル名に {template} があれば置き換え、なければ <stem>_<template_id>.pptx
+    """
+    output_path = Path(output_path)
+    if "{template}" in output_path.name:
+        return output_path.with_name(output_path.name.replace("{template}", template_id))
+    return output_path.with_name(f"{output_path.stem}_{template_id}{output_path.suffix}")
+
+
+def _manifest_for(output_path: Path, template_id: str | None, slides_dir: Path | None,
+                  image_dpi: int, build_dir: Path | None = None):
+    from build_manifest import BuildManifest
+    return BuildManifest(output_path, get_template_config(template_id), slides_dir,
+                         render_options={"image_dpi": image_dpi, "image_format": IMAGE_RENDITION_FORMAT},
+                         build_dir=build_dir)
+
+
+class _PrefetchedOnly:
+    """
+    テンプレートごとのワーカーの画像生成器。生成はしない（親プロセスでプリフェッチ済みで、共有キャッシュにある）。
+    親でプレースホルダーになった画像だけはプレースホルダーを返し、単一テンプレートのビルドと同じ見た目にする。
+    """
+
+    def __init__(self, placeholders: set[tuple[str, str]]):
+        self.placeholders = placeholders
+
+    def __call__(self, prompt: str, model: str) -> bytes | None:
+        if (prompt, model) in self.placeholders:
+            from image_client import placeholder_image
+            return placeholder_image()
+        return None
+
+
+def _build_template_worker(outline: list[dict], output_path: Path, template_id: str,
+                           slides_dir: Path | None, incremental: bool, trace: bool,
+                           cache_dir: Path, placeholders: set[tuple[str, str]],
+                           options: dict) -> tuple[Path, float, str, list[dict]]:
+    """ワーカープロセス側: 1テンプレート分のデッキをビルドし、(出力, 秒, ログ, トレースイベント) を返す"""
+    import time
+    import contextlib
+
+    _use_image_cache(cache_dir)
+    if trace:
+        TRACER.start()
+    log = io.StringIO()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        manifest = None
+        if incremental:
+            from build_manifest import BUILD_DIR_NAME
+            manifest = _manifest_for(output_path, template_id, slides_dir, options["image_dpi"],
+                                     build_dir=output_path.parent / BUILD_DIR_NAME / template_id)
+        build_pptx(outline, output_path, slides_dir=slides_dir, template_id=template_id,
+                   manifest=manifest, image_generator=_PrefetchedOnly(placeholders), **options)
+    return output_path, time.perf_counter() - t0, log.getvalue(), (TRACER.stop() if trace else [])
+
+
+def build_pptx_multi(outline: list[dict], output_path: str | Path, template_ids: list[str],
+                     export_png: bool = False,
+                     slides_dir: Path | None = None,
+                     incremental: bool = False,
+                     image_concurrency: int = IMAGE_PREFETCH_CONCURRENCY,
+                     image_timeout: float = IMAGE_PREFETCH_TIMEOUT,
+                     image_generator=None,
+                     image_dpi: int = IMAGE_RENDITION_DPI,
+                     prune_unused_layouts: bool = False,
+                     trace_path: str | Path | None = None,
+                     workers: int | None = None) -> list[Path]:
+    """
+    同じアウトラインを複数のテンプレートでビルドする（テンプレートごとに1プロセスで同時に。
+    CPU が1コアのときはプロセスを起動せずに順にビルドする）。
+    画像生成は先に親プロセスで1回だけ行い、共有の画像キャッシュ（IMAGE_CACHE）経由で
+    各ワーカーが使う。配置サイズのレンディションもキャッシュで共有される。
+    出力先は template_output_path(output_path, template_id)。
+    incremental: True の場合、テンプレートごとのビルドマニフェスト（.build/<template_id>/）を使う
+    workers: 同時に走らせるプロセス数（省略時はテンプレート数と CPU 数の小さい方）
+    その他の引数は build_pptx と同じ。1つでも失敗したら、残りのテンプレートの完了を待ってから例外を送出する
+    Returns: template_ids の順の出力パス
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    slides_dir = Path(slides_dir) if slides_dir else None
+    outputs = {tid: template_output_path(output_path, tid) for tid in template_ids}
+    with TRACER.session(trace_path), \
+            TRACER.span("build_pptx_multi", slides=len(outline), templates=",".join(template_ids)):
+        # テンプレートによって画像を置けるスライドの種類が違うため、テンプレートごとに集める。
+        # 2つ目以降は生成済みの画像がキャッシュにあるので、失敗した画像だけを再試行しないようにする
+        # （プレースホルダーはキャッシュされないので結果を覚えておき、同じものを返す）
+        from image_client import is_placeholder
+        generate = image_generator or (lambda prompt, model: generate_image_gemini(prompt, model=model))
+        failed: dict[tuple[str, str], bytes | None] = {}
+
+        def generate_once(prompt, model):
+            if (prompt, model) in failed:
+                return failed[(prompt, model)]
+            blob = None
+            try:
+                blob = generate(prompt, model)
+            finally:
+                if not blob or is_placeholder(blob):
+                    failed[(prompt, model)] = blob
+            return blob
+
+        with TRACER.span("prefetch_images", cat="image"):
+            for tid in template_ids:
+                prefetch_images(outline, config=get_template_config(tid), slides_dir=slides_dir,
+                                concurrency=image_concurrency, timeout=image_timeout, generator=generate_once)
+
+        # プレースホルダーになった画像は、各テンプレートのデッキにもプレースホルダーとして載せる
+        placeholders = {key for key, blob in failed.items() if is_placeholder(blob)}
+        workers = max(1, min(len(template_ids), workers or os.cpu_count() or 1))
+        print(f"  [multi-template] {len(template_ids)}テンプレートを{'並行' if workers > 1 else '順に'}ビルド: "
+              f"{', '.join(template_ids)}")
+        options = {"export_png": export_png, "image_dpi": image_dpi, "prune_unused_layouts": prune_unused_layouts}
+        errors: dict[str, Exception] = {}
+
+        def finish(tid, get_result):
+            try:
+                path, seconds, log, events = get_result()
+            except Exception as e:
+                errors[tid] = e
+                print(f"  [multi-template] {tid}: 失敗 {type(e).__name__}: {e}")
+                return
+            TRACER.merge(events)
+            print(log, end="")
+            print(f"  [multi-template] {tid}: {seconds:.2f}s → {path.name}")
+
+        if workers == 1:
+            # 1コアでは同時に走らせても速くならないので、ワーカーを起動せずこのプロセスで順にビルドする
+            for tid in template_ids:
+                finish(tid, lambda tid=tid: _build_template_worker(
+                    outline, outputs[tid], tid, slides_dir, incremental, False, IMAGE_CACHE.cache_dir,
+                    placeholders, options))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_build_template_worker, outline, outputs[tid], tid, slides_dir,
+                                           incremental, TRACER.enabled, IMAGE_CACHE.cache_dir,
+                                           placeholders, options): tid
+                           for tid in template_ids}
+                for future in as_completed(futures):
+                    finish(futures[future], future.result)
+        if errors:
+            raise next(iter(errors.values()))
+    return [outputs[tid] for tid in template_ids]
+
+
+# ─── ストリーミング結合（大規模デッキ用） ─────────────────
+_SLIDE_CT = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+_CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+_PR_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+def iter_slides_dir(slides_dir: Path):
+    """slides_dir 内の NN_*.json を番号順に1枚ずつ読み込んで返す（全件をリストにしない）"""
+    for f in sorted(Path(slides_dir).glob("*.json"), key=lambda p: p.name):
+        slide_data = json.loads(f.read_text(encoding="utf-8"))
+        if isinstance(slide_data, dict):
+            yield slide_data
+
+
+class _SlideSpool:
+    """
+    レンダリング済みスライドの XML・rels・メディアを一時フォルダーへ書き出して保持する。
+    メディアは SHA1 で重複排除し、最終パッケージでのパーツ名をここで決める。
+    """
+
+    def __init__(self, spool_dir: Path, first_media_no: int):
+        self.dir = spool_dir
+        self.count = 0
+        self._media: dict[str, str] = {}          # sha1 -> パーツ名（/ppt/media/imageN.ext）
+        self.media_types: dict[str, str] = {}     # 拡張子 -> content type
+        self._next_media_no = first_media_no
+
+    def add(self, slide):
+        """スライドを slideN.xml / slideN.xml.rels として書き出す"""
+        from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+        from pptx.opc.oxml import CT_Relationships
+
+        self.count += 1
+        rels = CT_Relationships.new()
+        # 通常保存と同じく rId の番号順に並べる
+        for rId, rel in sorted(slide.part.rels.items(),
+                               key=lambda kv: int(kv[0][3:]) if kv[0][3:].isdigit() else 0):
+            if rel.is_external:
+                rels.add_rel(rId, rel.reltype, rel.target_ref, True)
+            elif rel.reltype == RT.SLIDE_LAYOUT:
+                rels.add_rel(rId, rel.reltype, "../slideLayouts/" + rel.target_part.partname.filename, False)
+            elif rel.reltype == RT.IMAGE:
+                rels.add_rel(rId, rel.reltype, "../media/" + self._add_media(rel.target_part), False)
+            else:
+                raise ValueError(f"ストリーミング結合が扱えない関係です: {rel.reltype}")
+        (self.dir / f"slide{self.count}.xml").write_bytes(slide.part.blob)
+        (self.dir / f"slide{self.count}.xml.rels").write_bytes(rels.xml_file_bytes)
+
+    def _add_media(self, image_part) -> str:
+        sha1 = image_part.sha1
+        name = self._media.get(sha1)
+        if name is None:
+            ext = image_part.partname.ext
+            name = f"image{self._next_media_no}.{ext}"
+            self._next_media_no += 1
+            (self.dir / name).write_bytes(image_part.blob)
+            self._media[sha1] = name
+            self.media_types.setdefault(ext.lower(), image_part.content_type)
+        return name
+
+    @property
+    def media_names(self) -> list[str]:
+        return list(self._media.values())
+
+
+def build_pptx_streaming(slides, output_path: str | Path,
+                         slides_dir: Path | None = None,
+                         template_id: str | None = None,
+                         image_dpi: int = IMAGE_RENDITION_DPI,
+                         trace_path: str | Path | None = None,
+                         memprofile: bool | str | Path = False,
+                         prefetched: dict[tuple[str, str], bytes | None] | None = None) -> Path:
+    """
+    スライドをイテレーターから1枚ずつ受け取り、レンダリングしたらすぐ一時フォルダーへ
+    書き出してオブジェクトツリーを破棄する。最後にテンプレートの各パーツと書き出した
+    スライド・メディアから ZIP を組み立てるため、メモリ使用量はスライド枚数にほぼ依存しない。
+    500枚を超える付録デッキ等向け。インクリメンタル・並列・画像プリフェッチは使わない。
+    slides: dict を返すイテレーター（iter_slides_dir() 等）
+    trace_path: 指定時は各段階の所要時間を Chrome トレース形式の JSON に書き出す
+    memprofile: True / JSON パスの場合、スライド・段階ごとのメモリを計測して表示する
+    prefetched: (prompt, model) -> 画像バイト列。イテレーターが各スライドを返す前に書き足してよい
+                （outline_stream.py が LLM の出力と並行して生成した画像を渡す）
+    Returns: 保存したファイルのPath
+    """
+    import re
+    import shutil
+    import tempfile
+    import zipfile
+    from lxml import etree
+    from pptx.oxml import parse_xml
+    from pptx.opc.oxml import serialize_part_xml
+    from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+    with TRACER.session(trace_path), MEMORY_PROFILER.session(memprofile), \
+            TRACER.span("build_pptx_streaming", template=template_id or ""):
+        config = get_template_config(template_id)
+        print(f"  Template: {config.name}")
+        with TRACER.span("template_load"):
+            prs = TEMPLATE_POOL.acquire(config)
+        cache_stats = IMAGE_CACHE.stats()
+        output_path = Path(output_path)
+
+        with tempfile.TemporaryDirectory(prefix="pptx_stream_") as tmp:
+            spool_dir = Path(tmp)
+            base_path = spool_dir / "base.pptx"
+            with zipfile.ZipFile(io.BytesIO(TEMPLATE_POOL._entry(config).blob)) as zf:
+                used = [int(m.group(1)) for n in zf.namelist()
+                        if (m := re.match(r"ppt/media/image(\d+)\.", n))]
+            spool = _SlideSpool(spool_dir, max(used, default=0) + 1)
+
+            sld_id_lst = prs.slides._sldIdLst
+            for slide_data in slides:
+                if not isinstance(slide_data, dict):
+                    continue
+                slide_type = slide_data.get("type", "content")
+                print(f"  [{spool.count + 1}] {slide_type}: {slide_data.get('title', '')[:30]}")
+                with TRACER.span("slide", index=spool.count + 1, type=slide_type):
+                    slide = add_slide(prs, slide_data, config=config, slides_dir=slides_dir,
+                                      prefetched=prefetched, image_dpi=image_dpi)
+                    with TRACER.span("spool"):
+                        spool.add(slide)
+                # 書き出したスライドは Presentation から外して、ツリーと画像パーツを解放する
+                sld_id = sld_id_lst[-1]
+                sld_id_lst.remove(sld_id)
+                prs.part.drop_rel(sld_id.rId)
+                del slide
+            with TRACER.span("save"):
+                prs.save(str(base_path))
+            del prs
+
+            with TRACER.span("write_package"), zipfile.ZipFile(base_path) as base, \
+                    zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as out:
+                # presentation.xml: sldIdLst にスライドを登録
+                pres = parse_xml(base.read("ppt/presentation.xml"))
+                pres_rels = etree.fromstring(base.read("ppt/_rels/presentation.xml.rels"))
+                next_rid = 1 + max(int(r.get("Id")[3:]) for r in pres_rels
+                                   if r.get("Id")[3:].isdigit())
+                sld_id_lst = pres.get_or_add_sldIdLst()
+                for n in range(1, spool.count + 1):
+                    rId = f"rId{next_rid}"
+                    next_rid += 1
+                    etree.SubElement(pres_rels, f"{{{_PR_NS}}}Relationship",
+                                     Id=rId, Type=RT.SLIDE, Target=f"slides/slide{n}.xml")
+                    sld_id_lst.add_sldId(rId)
+
+                content_types = etree.fromstring(base.read("[Content_Types].xml"))
+                defaults = {d.get("Extension").lower() for d in content_types
+                            if d.tag == f"{{{_CT_NS}}}Default"}
+                for ext, ct in spool.media_types.items():
+                    if ext not in defaults:
+                        content_types.insert(0, etree.Element(f"{{{_CT_NS}}}Default",
+                                                              Extension=ext, ContentType=ct))
+                for n in range(1, spool.count + 1):
+                    etree.SubElement(content_types, f"{{{_CT_NS}}}Override",
+                                     PartName=f"/ppt/slides/slide{n}.xml", ContentType=_SLIDE_CT)
+
+                replaced = {
+                    "[Content_Types].xml": serialize_part_xml(content_types),
+                    "ppt/presentation.xml": serialize_part_xml(pres),
+                    "ppt/_rels/presentation.xml.rels": serialize_part_xml(pres_rels),
+                }
+                out.writestr("[Content_Types].xml", replaced["[Content_Types].xml"])
+                for info in base.infolist():
+                    if info.filename == "[Content_Types].xml":
+                        continue
+                    if info.filename in replaced:
+                        out.writestr(info.filename, replaced[info.filename])
+                        continue
+                    with base.open(info) as src, out.open(info.filename, "w") as dst:
+                        shutil.copyfileobj(src, dst)
+                for n in range(1, spool.count + 1):
+                    out.write(spool_dir / f"slide{n}.xml", f"ppt/slides/slide{n}.xml")
+                    out.write(spool_dir / f"slide{n}.xml.rels", f"ppt/slides/_rels/slide{n}.xml.rels")
+                for name in spool.media_names:
+                    out.write(spool_dir / name, f"ppt/media/{name}")
+
+        print(f"  [stream] {spool.count}枚を結合: {output_path.name}")
+        IMAGE_CACHE.report(since=cache_stats)
+
+    return output_path
+
+
+# ─── 未使用レイアウト・マスターの削除 ───────────────────
+def prune_layouts(prs: Presentation) -> tuple[int, int]:
+    """
+    どのスライドも使っていないレイアウトを削除し、レイアウトが1つも残らない
+    マスターも削除する。参照されなくなった画像・テーマ等のパーツは保存時に落ちる。
+    Returns: (削除したレイアウト数, 削除したマスター数)
+    """
+    used = {slide.slide_layout.part for slide in prs.slides}
+    removed_layouts = removed_masters = 0
+    master_id_lst = prs.part._element.sldMasterIdLst
+    for master in list(prs.slide_masters):
+        for layout in list(master.slide_layouts):
+            if layout.part not in used:
+                master.slide_layouts.remove(layout)
+                removed_layouts += 1
+        if len(master.slide_layouts) == 0 and len(master_id_lst) > 1:
+            for sld_master_id in list(master_id_lst):
+                if prs.part.related_part(sld_master_id.rId) is master.part:
+                    master_id_lst.remove(sld_master_id)
+                    prs.part.drop_rel(sld_master_id.rId)
+                    removed_masters += 1
+                    break
+    return removed_layouts, removed_masters
+
+
+def _save_pruned(prs: Presentation, output_path: Path):
+    """prune_layouts() を適用して保存し、削減前とのサイズ・読み込み時間の差を表示する"""
+    import time
+
+    before = io.BytesIO()
+    prs.save(before)
+    removed_layouts, removed_masters = prune_layouts(prs)
+    prs.save(str(output_path))
+
+    def open_ms(src) -> float:
+        # PowerPoint での読み込みの目安として python-pptx でのパース時間を測る（1回ずつ）
+        t0 = time.perf_counter()
+        Presentation(src)
+        return (time.perf_counter() - t0) * 1000
+
+    before_bytes = before.getbuffer().nbytes
+    after_bytes = output_path.stat().st_size
+    before.seek(0)
+    before_ms = open_ms(before)
+    after_ms = open_ms(str(output_path))
+    print(f"  [prune] レイアウト -{removed_layouts} / マスター -{removed_masters}: "
+          f"{before_bytes / 1e6:.2f} MB → {after_bytes / 1e6:.2f} MB "
+          f"(-{1 - after_bytes / before_bytes:.0%}), "
+          f"open {before_ms:.0f} ms → {after_ms:.0f} ms ({before_ms / max(after_ms, 1e-3):.1f}x)")
+
+
 # ─── スライドディレクトリから結合 ──────────────────────
 def build_from_slides_dir(slides_dir: Path, output_path: Path,
                           export_png: bool = False,
-                          template_id: str | None = None) -> Path:
+                          template_id: str | list[str] | None = None,
+                          workers: int = 1,
+                          incremental: bool = True,
+                          image_concurrency: int = IMAGE_PREFETCH_CONCURRENCY,
+                          image_timeout: float = IMAGE_PREFETCH_TIMEOUT,
+                          image_dpi: int = IMAGE_RENDITION_DPI,
+                          prune_unused_layouts: bool = False,
+                          streaming: bool = False,
+                          trace_path: str | Path | None = None,
+                          memprofile: bool | str | Path = False) -> Path | list[Path]:
     """
     slides_dir 内の NN_*.json を番号順に読み込んで PPTX を組み立てる（Tier 2 結合）。
     ファイル名の先頭数字でソートするため、00_title.json → 01_agenda.json の順が保証される。
+    template_id: テンプレートIDのリストを渡すと、テンプレートごとのデッキを同時にビルドして
+                 出力パスのリストを返す（build_pptx_multi。並列・ストリーミング・メモリ計測は使わない）
+    incremental: True の場合、出力先の .build/ マニフェストを使い、
+                 前回から変わっていないスライドはレンダリング結果を再利用する
+    image_concurrency / image_timeout: 画像プリフェッチの同時実行数と1リクエストのタイムアウト秒
+    image_dpi: 埋め込み画像を配置サイズに縮小するときの解像度
+    prune_unused_layouts: True の場合、使っていないレイアウト・マスターを出力から削除する
+    streaming: True の場合、スライドを1枚ずつ読み込み・書き出すストリーミング結合にする
+               （build_pptx_streaming。インクリメンタル・並列・プリフェッチ・prune は使わない）
+    trace_path: 指定時は各段階の所要時間を Chrome トレース形式の JSON に書き出す
+    memprofile: True / JSON パスの場合、スライド・段階ごとのメモリを計測して表示する
     Returns: 保存したファイルのPath
     """
     slides_dir = Path(slides_dir)
     json_files = sorted(slides_dir.glob("*.json"), key=lambda p: p.name)
     if not json_files:
         raise FileNotFoundError(f"スライドファイルが見つかりません: {slides_dir}")
+    multi = template_ids_arg(template_id)
+    template_id = single_template_id(template_id)
+    if multi and streaming:
+        raise ValueError("ストリーミング結合は複数テンプレートの同時ビルドに対応していません")
+    if streaming:
+        print(f"  {len(json_files)}個のスライドファイルをストリーミング結合: {slides_dir}")
+        return build_pptx_streaming(iter_slides_dir(slides_dir), output_path,
+                                    slides_dir=slides_dir, template_id=template_id,
+                                    image_dpi=image_dpi, trace_path=trace_path,
+                                    memprofile=memprofile)
     outline = []
     for f in json_files:
         slide_data = json.loads(f.read_text(encoding="utf-8"))
         if isinstance(slide_data, dict):
             outline.append(slide_data)
     print(f"  {len(outline)}枚のスライドを読み込み: {slides_dir}")
+    if multi:
+        if memprofile:
+            print("  [memprofile] 複数テンプレートの同時ビルドは計測できないため省略します")
+        return build_pptx_multi(outline, output_path, multi, export_png=export_png,
+                                slides_dir=slides_dir, incremental=incremental,
+                                image_concurrency=image_concurrency, image_timeout=image_timeout,
+                                image_dpi=image_dpi, prune_unused_layouts=prune_unused_layouts,
+                                trace_path=trace_path)
+    manifest = None
+    if incremental:
+        manifest = _manifest_for(output_path, template_id, slides_dir, image_dpi)
     return build_pptx(outline, output_path, export_png=export_png,
-                      slides_dir=slides_dir, template_id=template_id)
+                      slides_dir=slides_dir, template_id=template_id,
+                      workers=workers, manifest=manifest,
+                      image_concurrency=image_concurrency, image_timeout=image_timeout,
+                      image_dpi=image_dpi, prune_unused_layouts=prune_unused_layouts,
+                      trace_path=trace_path, memprofile=memprofile)
 
 # ─── メイン生成関数 ───────────────────────────────────
 def build_pptx(outline: list[dict], output_path: str | Path,
                export_png: bool = False,
                slides_dir: Path | None = None,
-               template_id: str | None = None) -> Path:
+               template_id: str | list[str] | None = None,
+               workers: int = 1,
+               manifest=None,
+               image_concurrency: int = IMAGE_PREFETCH_CONCURRENCY,
+               image_timeout: float = IMAGE_PREFETCH_TIMEOUT,
+               image_generator=None,
+               image_dpi: int = IMAGE_RENDITION_DPI,
+               prune_unused_layouts: bool = False,
+               trace_path: str | Path | None = None,
+               memprofile: bool | str | Path = False) -> Path | list[Path]:
     """
     outline: 中間言語JSONリスト
     output_path: 出力先パス
     export_png: True の場合 PowerPoint COM で PNG サムネイルも生成
     slides_dir: 画像キャッシュの保存/参照先
-    template_id: テンプレートID（templates/<id>/profile.json）
+    template_id: テンプレートID（templates/<id>/profile.json）。
+                 IDのリストを渡すとテンプレートごとのデッキを同時にビルドし、出力パスのリストを返す
+                 （build_pptx_multi。出力先は template_output_path()）
+    workers: 2以上でスライドを複数プロセスで並列レンダリングし、最後に1つのパッケージへ結合
+    manifest: build_manifest.BuildManifest。指定時はキーが前回と同じスライドを再利用する
+    image_concurrency / image_timeout: 画像プリフェッチの同時実行数と1リクエストのタイムアウト秒
+    image_generator: (prompt, model) -> bytes | None。省略時は Gemini
+    image_dpi: 埋め込み画像を配置サイズに縮小するときの解像度
+    prune_unused_layouts: True の場合、使っていないレイアウト・マスターを出力から削除する
+                          （削減前とのサイズ・読み込み時間の差を表示する）
+    trace_path: 指定時は各段階の所要時間を Chrome トレース形式の JSON に書き出す（build_trace.py）
+    memprofile: True / JSON パスの場合、スライド・段階ごとのメモリを tracemalloc で計測して表示する
+                （build_memprofile.py。計測中は逐次レンダリング）
     Returns: 保存したファイルのPath
     """
-    config = get_template_config(template_id)
-    print(f"  Template: {config.name}")
-    prs = load_template(config)
-    remove_all_slides(prs)
-    for i, slide_data in enumerate(outline):
-        if not isinstance(slide_data, dict):
-            continue
-        slide_type = slide_data.get("type", "content")
-        print(f"  [{i+1}/{len(outline)}] {slide_type}: {slide_data.get('title', '')[:30]}")
-        add_slide(prs, slide_data, config=config, slides_dir=slides_dir)
-    output_path = Path(output_path)
-    prs.save(str(output_path))
+    multi = template_ids_arg(template_id)
+    if multi:
+        if manifest is not None:
+            raise ValueError("複数テンプレートのビルドにはマニフェストを渡せません（build_pptx_multi の incremental を使う）")
+        return build_pptx_multi(outline, output_path, multi, export_png=export_png, slides_dir=slides_dir,
+                                image_concurrency=image_concurrency, image_timeout=image_timeout,
+                                image_generator=image_generator, image_dpi=image_dpi,
+                                prune_unused_layouts=prune_unused_layouts, trace_path=trace_path)
+    template_id = single_template_id(template_id)
+    if memprofile and workers > 1:
+        print("  [memprofile] ワーカープロセスは計測できないため逐次レンダリングします")
+        workers = 1
+    with TRACER.session(trace_path), MEMORY_PROFILER.session(memprofile), \
+            TRACER.span("build_pptx", slides=len(outline), template=template_id or "", workers=workers):
+        config = get_template_config(template_id)
+        print(f"  Template: {config.name}")
+        with TRACER.span("template_load"):
+            prs = TEMPLATE_POOL.acquire(config)
+        cache_stats = IMAGE_CACHE.stats()
+
+        indexed = [(i, s) for i, s in enumerate(outline) if isinstance(s, dict)]
+        keys: dict[int, str] = {}
+        cached: dict[int, SlidePayload] = {}
+        if manifest is not None:
+            with TRACER.span("manifest_lookup"):
+                for i, slide_data in indexed:
+                    keys[i] = manifest.slide_key(slide_data)
+                    payload = manifest.lookup(keys[i])
+                    if payload is not None:
+                        cached[i] = payload
+            print(f"  [incremental] 再利用 {len(cached)}枚 / 再レンダリング {len(indexed) - len(cached)}枚")
+        dirty = [i for i, _ in indexed if i not in cached]
+
+        # 組み立て前に、再レンダリングするスライドの画像生成をまとめて並行実行する
+        with TRACER.span("prefetch_images", cat="image"):
+            prefetched = prefetch_images([outline[i] for i in dirty], config=config, slides_dir=slides_dir,
+                                         concurrency=image_concurrency, timeout=image_timeout,
+                                         generator=image_generator)
+
+        if workers > 1 and len(dirty) > 1:
+            print(f"  [parallel] {workers} workers")
+            with TRACER.span("render_parallel", slides=len(dirty)):
+                rendered = dict(zip(dirty, render_slides_parallel(outline, template_id, slides_dir,
+                                                                  workers, only=dirty,
+                                                                  prefetched=prefetched,
+                                                                  image_dpi=image_dpi)))
+            with TRACER.span("merge_payloads"):
+                for i, slide_data in indexed:
+                    payload = cached.get(i) or rendered[i]
+                    add_slide_payload(prs, payload)
+                    if manifest is not None and (
+                            i in cached or _images_complete(slide_data, config, slides_dir, prefetched)):
+                        manifest.record(keys[i], payload, reused=i in cached)
+        else:
+            for i, slide_data in indexed:
+                slide_type = slide_data.get("type", "content")
+                if i in cached:
+                    with TRACER.span("slide", index=i + 1, type=slide_type, reused=True):
+                        add_slide_payload(prs, cached[i])
+                        manifest.record(keys[i], cached[i], reused=True)
+                    continue
+                print(f"  [{i+1}/{len(outline)}] {slide_type}: {slide_data.get('title', '')[:30]}")
+                with TRACER.span("slide", index=i + 1, type=slide_type):
+                    slide = add_slide(prs, slide_data, config=config, slides_dir=slides_dir,
+                                      prefetched=prefetched, image_dpi=image_dpi)
+                    if manifest is not None and _images_complete(slide_data, config, slides_dir, prefetched):
+                        layout_index = config.layout.get(slide_type, config.layout["content"])
+                        manifest.record(keys[i], slide_to_payload(slide, layout_index))
+        output_path = Path(output_path)
+        with TRACER.span("save", pruned=prune_unused_layouts):
+            if prune_unused_layouts:
+                _save_pruned(prs, output_path)
+            else:
+                prs.save(str(output_path))
+        if manifest is not None:
+            with TRACER.span("manifest_save"):
+                manifest.save()
+        IMAGE_CACHE.report(since=cache_stats)
 
-    if export_png:
-        export_thumbnails(output_path)
+        if export_png:
+            with TRACER.span("export_thumbnails"):
+                export_thumbnails(output_path)
 
     return output_path
@@ -0,0 +1,201 @@
+"""
+response_cache.py
+モデル呼び出しの応答キャッシュ（ディスク保存・TTL・サイズ上限）
+
+同じ説明文で generate_pptx.py を再実行するたびに Anthropic API を呼ぶと、後段（テンプレート・
+画像・結合）を調整している間ずっと待ち時間と料金がかかる。応答を呼び出しの種類（kind）と
+パラメーター（説明文・システムプロンプトのハッシュ・モデル・max_tokens など）のハッシュで保存し、
+同じ呼び出しには保存済みの応答を返す。
+
+  value = RESPONSE_CACHE.call("outline", {"description": ..., "system_sha256": ..., "model": ..., "max_tokens": ...},
+                              lambda: request_to_model(...))
+
+値は JSON にできるものなら何でもよく、呼び出し側の関数が例外を出した場合は保存しない。
+画像は image_cache.py（バイト列・LRU）で扱い、こちらはテキスト・JSON の応答用。
+
+  <cache_dir>/
+  ├── index.json          # {"entries": key -> {kind, size, created, last_access}, "stats": kind -> {hit, miss}}
+  ├── .lock               # プロセス間ロック（image_cache と同じ cache_store.py の方式）
+  └── ab/abcdef....json   # 応答本体（キー先頭2文字でシャーディング）
+
+created から ttl_seconds を過ぎたエントリは期限切れとして扱い（取得時に削除）、
+合計サイズが max_bytes を超えたら last_access の古い順に削除する。
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+from cache_store import IndexTransaction, atomic_write
+
+DEFAULT_CACHE_DIR = Path(os.getenv("RESPONSE_CACHE_DIR", Path(__file__).parent / ".cache" / "responses"))
+DEFAULT_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 << 20))       # 64 MiB
+DEFAULT_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", 7 * 24 * 3600))     # 7日
+
+
+def text_sha256(text: str) -> str:
+    """システムプロンプト等の長い文字列をキーに含めるためのハッシュ"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    モデル応答のディスクキャッシュ。スレッドセーフかつプロセス間で安全。
+    hits / misses / expired / evictions はこのインスタンスでの回数、
+    index.json の "stats" には kind ごとの累計 hit / miss を記録する。
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    # ── キーとパス ──
+    @staticmethod
+    def key(kind: str, params: dict) -> str:
+        raw = json.dumps([kind, params], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    # ── 取得・保存 ──
+    def get(self, kind: str, params: dict):
+        """保存済みで期限内なら値を返し、なければ None（期限切れのエントリは削除する）"""
+        key = self.key(kind, params)
+        path = self._path(key)
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            record = None
+        now = time.time()
+        with self._locked() as index:
+            entries, stats = _entries(index), _stats(index, kind)
+            if record is not None and now - record["created"] > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                entries.pop(key, None)
+                self.expired += 1
+                record = None
+            if record is None:
+                stats["miss"] += 1
+                self.misses += 1
+                return None
+            entry = entries.setdefault(key, {"kind": kind, "size": path.stat().st_size,
+                                             "created": record["created"]})
+            entry["last_access"] = now
+            stats["hit"] += 1
+            self.hits += 1
+        return record["value"]
+
+    def put(self, kind: str, params: dict, value):
+        """値を保存し、上限を超えていれば古いものから削除する"""
+        key = self.key(kind, params)
+        now = time.time()
+        data = json.dumps({"kind": kind, "params": params, "created": now, "value": value},
+                          ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, data)
+        with self._locked() as index:
+            entries = _entries(index)
+            entries[key] = {"kind": kind, "size": len(data), "created": now, "last_access": now}
+            self._evict(entries, keep=key)
+
+    def call(self, kind: str, params: dict, fn, use_cache: bool = True, refresh: bool = False):
+        """
+        保存済みの応答があれば返し、なければ fn() を呼んで保存する。
+        use_cache=False: 読みも書きもしない（--no-cache）
+        refresh=True: 保存済みを無視して fn() を呼び、結果で上書きする（--refresh）
+        """
+        if not use_cache:
+            return fn()
+        if not refresh:
+            value = self.get(kind, params)
+            if value is not None:
+                print(f"  [response-cache] {kind}: キャッシュを使用（--refresh で再取得）")
+                return value
+        value = fn()
+        self.put(kind, params, value)
+        return value
+
+    def clear(self):
+        with self._locked() as index:
+            for key in list(_entries(index)):
+                self._path(key).unlink(missing_ok=True)
+            index["entries"] = {}
+
+    # ── 統計 ──
+    def summary(self) -> dict:
+        """{"entries", "bytes", "stats": kind -> {hit, miss}}（累計）"""
+        with self._locked() as index:
+            entries = _entries(index)
+            return {"entries": len(entries), "bytes": sum(e["size"] for e in entries.values()),
+                    "stats": {kind: dict(s) for kind, s in index.get("stats", {}).items()}}
+
+    def report(self):
+        """このインスタンスでのヒット数表示"""
+        if self.hits or self.misses:
+            extra = "".join(f" / {name} {n}" for name, n in
+                            (("expired", self.expired), ("evict", self.evictions)) if n)
+            print(f"  [response-cache] hit {self.hits} / miss {self.misses}{extra}")
+
+    # ── 内部処理 ──
+    def _evict(self, entries: dict, keep: str):
+        total = sum(e["size"] for e in entries.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(entries, key=lambda k: entries[k].get("last_access", 0)):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._path(key).unlink(missing_ok=True)
+            total -= entries.pop(key)["size"]
+            self.evictions += 1
+
+    def _locked(self):
+        return IndexTransaction(self.cache_dir, self._lock)
+
+
+def _entries(index: dict) -> dict:
+    return index.setdefault("entries", {})
+
+
+def _stats(index: dict, kind: str) -> dict:
+    return index.setdefault("stats", {}).setdefault(kind, {"hit": 0, "miss": 0})
+
+
+# モジュール共通のキャッシュ（generate_pptx 等から使う）
+RESPONSE_CACHE = ResponseCache()
+
+
+# ─── CLI ──────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    import argparse
+    parser = argparse.ArgumentParser(description="モデル応答キャッシュの統計表示・削除")
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args(argv)
+    if args.command == "clear":
+        RESPONSE_CACHE.clear()
+        print(f"削除しました: {RESPONSE_CACHE.cache_dir}")
+        return
+    summary = RESPONSE_CACHE.summary()
+    print(f"{RESPONSE_CACHE.cache_dir}: {summary['entries']}件 / {summary['bytes'] / 1024:.1f} KiB"
+          f"（TTL {RESPONSE_CACHE.ttl_seconds / 3600:.0f}時間）")
+    for kind, s in sorted(summary["stats"].items()):
+        total = s["hit"] + s["miss"]
+        print(f"  {kind:<16} hit {s['hit']:>5} / miss {s['miss']:>5}"
+              f"  ({s['hit'] / total * 100 if total else 0:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
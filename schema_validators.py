@@ -0,0 +1,33 @@
+"""
+schema_validators.py
+schemas/<name>.schema.json の JSON Schema バリデーター（プロセス内でコンパイル済みのものを使い回す）
+
+  from schema_validators import get_validator
+  for error in get_validator("tier2").iter_errors(slide): ...
+
+build_server（ワーカーの事前コンパイル・スキーマ警告）と tier2_expander（モデル応答の検証）が使う。
+jsonschema は get_validator() の中で import する（import するだけのモジュールを重くしないため）。
+jsonschema がなければ ImportError。
+"""
+
+import json
+import threading
+from pathlib import Path
+
+SCHEMAS_DIR = Path(__file__).parent / "schemas"
+
+_VALIDATORS: dict = {}
+_LOCK = threading.Lock()
+
+
+def get_validator(name: str):
+    """schemas/<name>.schema.json のバリデーター。スキーマ自体の誤りは SchemaError"""
+    with _LOCK:
+        validator = _VALIDATORS.get(name)
+        if validator is None:
+            import jsonschema
+            schema = json.loads((SCHEMAS_DIR / f"{name}.schema.json").read_text(encoding="utf-8"))
+            cls = jsonschema.validators.validator_for(schema)
+            cls.check_schema(schema)
+            validator = _VALIDATORS[name] = cls(schema)
+        return validator
@@ -12,9 +12,6 @@ import shutil
 import argparse
 from pathlib import Path
 
-from pptx import Presentation
-from pptx.util import Emu
-
 TEMPLATES_DIR = Path(__file__).parent / "templates"
 
 
@@ -25,6 +22,7 @@ def emu_to_inches(emu_val) -> float:
 
 def analyze_template(pptx_path: Path) -> dict:
     """pptx ファイルを解析し、ドラフト profile データを返す"""
+    from pptx import Presentation   # list コマンドでは python-pptx を読み込まない
     prs = Presentation(str(pptx_path))
 
     slide_width = emu_to_inches(prs.slide_width)
@@ -172,6 +170,10 @@ def register_template(pptx_path: Path, template_id: str, template_name: str) ->
     )
     print(f"  Created: {profile_path}")
 
+    # サンプルスライドを除去したコンパイル済みテンプレートを事前に書き出す
+    from pptx_engine import compile_template
+    compile_template(dest_pptx)
+
     # design_guide.md スケルトン生成
     guide_path = template_dir / "design_guide.md"
     if not guide_path.exists():
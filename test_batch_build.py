@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_batch_build.py
+batch_build のユニットテスト（python -m pytest test_batch_build.py）
+"""
+
+import json
+
+from pptx import Presentation
+
+import batch_build
+
+
+def _project(root, dirname, slides, template=None):
+    project_dir = root / dirname
+    (project_dir / "slides").mkdir(parents=True)
+    for i, slide in enumerate(slides):
+        (project_dir / "slides" / f"{i:02d}_{slide['type']}.json").write_text(
+            json.dumps(slide, ensure_ascii=False), encoding="utf-8")
+    if template:
+        (project_dir / "outline.json").write_text(json.dumps({"template": template}), encoding="utf-8")
+    return project_dir
+
+
+def test_discover_projects_uses_latest_dir_and_outline_template(tmp_path):
+    deck = [{"type": "title", "title": "A"}, {"type": "end"}]
+    _project(tmp_path, "20260101_alpha", deck)
+    _project(tmp_path, "20260301_alpha", deck, template="jr_east")
+    _project(tmp_path, "20260201_beta", deck + [{"type": "content", "title": "B"}])
+    (tmp_path / "20260201_empty" / "slides").mkdir(parents=True)
+
+    projects = batch_build.discover_projects(tmp_path)
+    assert [(p["name"], p["dir"].name, p["template_id"], p["slides"]) for p in projects] == [
+        ("alpha", "20260301_alpha", "jr_east", 2),
+        ("beta", "20260201_beta", None, 3),
+    ]
+    assert [p["name"] for p in batch_build.discover_projects(tmp_path, filters=["bet"])] == ["beta"]
+
+
+def test_broken_project_does_not_abort_batch(tmp_path, capsys):
+    deck = [{"type": "title", "title": "表紙"}, {"type": "content", "title": "本文"}, {"type": "end"}]
+    _project(tmp_path, "20260101_sx", deck)
+    _project(tmp_path, "20260101_jr", deck, template="jr_east")
+    _project(tmp_path, "20260101_broken", deck, template="no_such_template")
+
+    results = batch_build.run_batch(batch_build.discover_projects(tmp_path), workers=2,
+                                    options={"incremental": False}, output_name="out.pptx")
+    by_name = {r["name"]: r for r in results}
+    assert [r["name"] for r in results] == ["broken", "jr", "sx"]
+    assert not by_name["broken"]["ok"] and "no_such_template" in by_name["broken"]["error"]
+    for name in ("sx", "jr"):
+        assert by_name[name]["ok"], by_name[name]
+        assert len(Presentation(by_name[name]["path"]).slides) == 3
+    assert by_name["jr"]["template_id"] == "jr_east"
+
+    batch_build.print_summary(results, 1.0)
+    out = capsys.readouterr().out
+    assert "3件（成功 2 / 失敗 1）" in out and "[失敗] broken" in out
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_build_memprofile.py
+build_memprofile のユニットテスト（python -m pytest test_build_memprofile.py）
+"""
+
+import json
+import tracemalloc
+
+import pptx_engine
+from build_trace import TRACER
+from build_memprofile import MEMORY_PROFILER
+
+
+def _outline(tmp_path):
+    from PIL import Image
+    Image.merge("RGB", [Image.linear_gradient("L").resize((1200, 800)),
+                        Image.effect_noise((1200, 800), 30),
+                        Image.new("L", (1200, 800), 90)]).save(tmp_path / "photo.png")
+    return [
+        {"type": "title", "title": "メモリ", "subtitle": "テスト"},
+        {"type": "content", "title": "画像", "objects": [{"type": "box", "text": "箱"}, {"type": "arrow"}],
+         "images": [{"file": "photo.png", "left": 7.0, "top": 1.5, "width": 5.0, "height": 3.0}]},
+        {"type": "content", "title": "図形のみ", "objects": [{"type": "text", "text": "テキスト"}]},
+        {"type": "end"},
+    ]
+
+
+def test_memprofile_reports_slides_stages_and_sites(tmp_path):
+    report_path = tmp_path / "mem.json"
+    pptx_engine.build_pptx(_outline(tmp_path), tmp_path / "out.pptx", slides_dir=tmp_path,
+                           workers=2, memprofile=report_path)
+    assert not MEMORY_PROFILER.enabled and not TRACER.enabled
+    assert not tracemalloc.is_tracing()
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    slides = {s["index"]: s for s in report["slides"]}
+    assert [(s["type"], s["objects"], s["images"]) for s in report["slides"]] == \
+        [("title", 0, 0), ("content", 2, 1), ("content", 1, 0), ("end", 0, 0)]
+    # 画像のデコード・縮小・再エンコードがあるスライドが一番膨らむ
+    assert slides[2]["peak"] == max(s["peak"] for s in report["slides"])
+    assert report["stages"]["render_image"]["count"] == 1
+    assert report["stages"]["slide"]["count"] == 4
+    assert report["peak_bytes"] >= slides[2]["peak"] > 0
+    assert report["presentation_bytes"] > 0
+    assert "content (objects 2, images 1)" in report["by_kind"]
+    assert report["top_sites"] and all(s["bytes"] > 0 for s in report["top_sites"])
+
+
+def test_memprofile_composes_with_trace(tmp_path):
+    trace = tmp_path / "trace.json"
+    pptx_engine.build_pptx(_outline(tmp_path), tmp_path / "out.pptx", slides_dir=tmp_path,
+                           trace_path=trace, memprofile=True)
+    events = json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]
+    assert sum(1 for e in events if e.get("name") == "slide") == 4
+    assert not MEMORY_PROFILER.enabled and not TRACER.enabled
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_build_server.py
+build_server のユニットテスト（python -m pytest test_build_server.py）
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pptx import Presentation
+
+import build_server
+
+
+@pytest.fixture
+def server(tmp_path):
+    srv = build_server.BuildServer(port=0, workers=2, state_file=tmp_path / "state.json",
+                                   templates=["sx_proposal", "jr_east"])
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(600):
+        if (tmp_path / "state.json").exists():
+            break
+        thread.join(0.05)
+    yield srv
+    srv.shutdown()
+    thread.join(10)
+
+
+def _slides_dir(tmp_path):
+    slides_dir = tmp_path / "slides"
+    slides_dir.mkdir()
+    slides = [{"type": "title", "title": "サーバー", "subtitle": "テスト"},
+              {"type": "content", "title": "本文", "body": "・一\n・二", "objects": [{"type": "box", "text": "箱"}]},
+              {"type": "end"}]
+    for i, slide in enumerate(slides):
+        (slides_dir / f"{i:02d}_{slide['type']}.json").write_text(json.dumps(slide, ensure_ascii=False),
+                                                                   encoding="utf-8")
+    return slides_dir
+
+
+def test_forward_returns_none_without_server(tmp_path):
+    assert build_server.forward("build", {}, state_file=tmp_path / "missing.json") is None
+    # 状態ファイルが残っていてもサーバーが応答しなければ None
+    (tmp_path / "stale.json").write_text(json.dumps({"port": 9, "pid": 1, "token": "t"}), encoding="utf-8")
+    assert build_server.forward("build", {}, state_file=tmp_path / "stale.json") is None
+
+
+def test_server_builds_assembles_and_previews(server, tmp_path):
+    state = tmp_path / "state.json"
+    slides_dir = _slides_dir(tmp_path)
+
+    result = build_server.forward("assemble", {"slides_dir": str(slides_dir), "template_id": "jr_east",
+                                               "output_path": str(tmp_path / "assembled.pptx"),
+                                               "options": {"incremental": False}}, state_file=state)
+    assert result["ok"], result
+    assert len(Presentation(result["path"]).slides) == 3
+    assert "Template:" in result["log"]
+
+    slide = json.loads((slides_dir / "01_content.json").read_text(encoding="utf-8"))
+    slide["objects"] = "not a list"
+    result = build_server.forward("preview", {"slide": slide, "template_id": "sx_proposal",
+                                              "output_path": str(tmp_path / "preview.pptx")}, state_file=state)
+    assert result["ok"], result
+    assert len(Presentation(result["path"]).slides) == 1
+    assert result["warnings"]  # スキーマ違反は警告として返る
+
+    result = build_server.forward("build", {"outline": [{"type": "title", "title": "x"}],
+                                            "template_id": "no_such_template",
+                                            "output_path": str(tmp_path / "bad.pptx")}, state_file=state)
+    assert not result["ok"] and "FileNotFoundError" in result["error"]
+    assert server.status()["served"] == 3 and server.status()["failed"] == 1
+
+
+def test_server_handles_concurrent_requests(server, tmp_path):
+    state = tmp_path / "state.json"
+    outline = [{"type": "title", "title": "並行"}, {"type": "content", "title": "本文"}, {"type": "end"}]
+
+    def build(i):
+        return build_server.forward("build", {"outline": outline, "template_id": None,
+                                              "output_path": str(tmp_path / f"deck{i}.pptx")}, state_file=state)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(build, range(4)))
+    assert all(r["ok"] for r in results)
+    assert all(len(Presentation(r["path"]).slides) == 3 for r in results)
+
+
+def _raw_post(url, body: bytes, headers: dict) -> int:
+    import urllib.error
+    import urllib.request
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=body, headers=headers), timeout=5) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_server_requires_token_and_json(server, tmp_path):
+    state = tmp_path / "state.json"
+    assert state.stat().st_mode & 0o777 == 0o600
+    url, token = build_server.server_state(state)
+    body = json.dumps({"outline": [], "output_path": str(tmp_path / "x.pptx")}).encode("utf-8")
+
+    assert _raw_post(f"{url}/build", body, {"Content-Type": "application/json"}) == 403
+    assert _raw_post(f"{url}/build", body, {"Content-Type": "application/json",
+                                            build_server.TOKEN_HEADER: "wrong"}) == 403
+    assert _raw_post(f"{url}/shutdown", b"{}", {"Content-Type": "text/plain",
+                                                build_server.TOKEN_HEADER: token}) == 415
+    assert server.status()["served"] == 0
+    assert build_server.forward("build", {"outline": [{"type": "end"}], "output_path": str(tmp_path / "ok.pptx")},
+                                state_file=state)["ok"]
+
+
+def test_forward_does_not_fall_back_after_the_job_is_sent(server, tmp_path, monkeypatch):
+    import time
+    calls = []
+    monkeypatch.setattr(server, "submit", lambda op, params: calls.append(op) or time.sleep(1.0) or {"ok": True})
+    result = build_server.forward("build", {"outline": [], "output_path": str(tmp_path / "slow.pptx")},
+                                  state_file=tmp_path / "state.json", timeout=0.2)
+    # サーバーはビルドを受け付けているので、None（プロセス内ビルド）ではなくエラーを返す
+    assert result is not None and not result["ok"]
+    assert "結果を受け取れません" in result["error"]
+    assert calls == ["build"]
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_build_trace.py
+build_trace のユニットテスト（python -m pytest test_build_trace.py）
+"""
+
+import os
+import json
+
+import pptx_engine
+from build_trace import TRACER, BuildTracer, _NULL_SPAN
+
+
+def _outline(tmp_path):
+    from PIL import Image
+    Image.new("RGB", (640, 400), (200, 30, 30)).save(tmp_path / "red.png")
+    return [
+        {"type": "title", "title": "トレース", "subtitle": "テスト"},
+        {"type": "content", "title": "本文", "objects": [{"type": "box", "text": "箱"}, {"type": "arrow"}],
+         "images": [{"file": "red.png", "left": 7.0, "top": 1.5, "width": 5.0, "height": 3.0}]},
+        {"type": "content", "title": "本文2", "objects": [{"type": "text", "text": "テキスト"}]},
+        {"type": "end"},
+    ]
+
+
+def _spans(path):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return [e for e in data["traceEvents"] if e["ph"] == "X"]
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = BuildTracer()
+    assert tracer.span("x", a=1) is _NULL_SPAN
+    with tracer.session(None):
+        with tracer.span("y"):
+            pass
+    assert not tracer.enabled
+    assert tracer.stop() == []
+
+
+def test_build_trace_has_nested_stages_with_slide_args(tmp_path):
+    trace = tmp_path / "trace.json"
+    pptx_engine.build_pptx(_outline(tmp_path), tmp_path / "out.pptx", slides_dir=tmp_path, trace_path=trace)
+    assert not TRACER.enabled
+
+    spans = _spans(trace)
+    names = [e["name"] for e in spans]
+    for name in ("build_pptx", "template_load", "prefetch_images", "slide", "fill_placeholders",
+                 "add_objects", "add_images", "render_image", "crop_resize", "encode", "save"):
+        assert name in names, name
+    slides = [e["args"] for e in spans if e["name"] == "slide"]
+    assert [(a["index"], a["type"]) for a in slides] == [(1, "title"), (2, "content"), (3, "content"), (4, "end")]
+
+    # 各区間は build_pptx の区間の内側に収まる
+    root = next(e for e in spans if e["name"] == "build_pptx")
+    for e in spans:
+        assert root["ts"] <= e["ts"] and e["ts"] + e["dur"] <= root["ts"] + root["dur"] + 1, e["name"]
+
+
+def test_parallel_build_trace_includes_worker_events(tmp_path):
+    trace = tmp_path / "trace.json"
+    pptx_engine.build_pptx(_outline(tmp_path), tmp_path / "out.pptx", slides_dir=tmp_path,
+                           workers=2, trace_path=trace)
+    spans = _spans(trace)
+    worker_pids = {e["pid"] for e in spans if e["name"] == "slide"}
+    assert os.getpid() not in worker_pids
+    assert len(worker_pids) == 2
+    assert {e["name"] for e in spans if e["pid"] == os.getpid()} >= {"build_pptx", "render_parallel", "merge_payloads"}
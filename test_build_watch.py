@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_build_watch.py
+build_watch のユニットテスト（python -m pytest test_build_watch.py）
+"""
+
+import os
+import json
+import time
+import threading
+
+from pptx import Presentation
+
+from build_watch import ProjectWatcher
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def _project(tmp_path):
+    from PIL import Image
+    slides_dir = tmp_path / "slides"
+    slides_dir.mkdir()
+    Image.new("RGB", (320, 200), (200, 30, 30)).save(slides_dir / "red.png")
+    _write(slides_dir / "00_title.json", {"type": "title", "title": "ウォッチ", "subtitle": "テスト"})
+    _write(slides_dir / "01_content.json", {"type": "content", "title": "本文",
+                                            "objects": [{"type": "box", "text": "箱"}]})
+    _write(slides_dir / "02_content.json", {"type": "content", "title": "画像", "images": [
+        {"file": "red.png", "left": 7.0, "top": 1.5, "width": 5.0, "height": 3.0}]})
+    _write(slides_dir / "03_end.json", {"type": "end"})
+    return slides_dir
+
+
+def _bump(path):
+    """mtime の分解能が粗いファイルシステムでも変更として検出されるように時刻を進める"""
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+
+
+def test_snapshot_tracks_slides_images_and_template(tmp_path):
+    slides_dir = _project(tmp_path)
+    watcher = ProjectWatcher(slides_dir, tmp_path / "out.pptx", "sx_proposal")
+    state = watcher.snapshot()
+    names = {p.name for p in state}
+    assert {"00_title.json", "01_content.json", "02_content.json", "03_end.json", "red.png", "profile.json"} <= names
+    assert any(p.suffix == ".pptx" for p in state)
+
+    (slides_dir / "red.png").write_bytes((slides_dir / "red.png").read_bytes() + b"\0")
+    _bump(slides_dir / "red.png")
+    (slides_dir / "03_end.json").unlink()
+    assert {p.name for p in watcher.diff(state, watcher.snapshot())} == {"red.png", "03_end.json"}
+
+
+def test_rebuild_rerenders_only_changed_slide(tmp_path, capsys):
+    slides_dir = _project(tmp_path)
+    out = tmp_path / "deck.pptx"
+    watcher = ProjectWatcher(slides_dir, out, "sx_proposal")
+    assert watcher.build()
+    capsys.readouterr()
+
+    changed = slides_dir / "01_content.json"
+    _write(changed, {"type": "content", "title": "本文（修正）", "objects": [{"type": "box", "text": "箱"}]})
+    assert watcher.build({changed}, edited_at=time.time())
+    log = capsys.readouterr().out
+    assert "再利用 3枚 / 再レンダリング 1枚" in log
+    assert "保存から更新まで" in log
+    assert Presentation(str(out)).slides[1].shapes.title.text == "本文（修正）"
+    assert not list(tmp_path.glob(".*.watch.pptx"))
+
+
+def test_failed_build_keeps_previous_output(tmp_path, capsys):
+    slides_dir = _project(tmp_path)
+    out = tmp_path / "deck.pptx"
+    watcher = ProjectWatcher(slides_dir, out, "sx_proposal")
+    assert watcher.build()
+    before = out.read_bytes()
+
+    watcher.template_id = "no_such_template"
+    assert not watcher.build({slides_dir / "00_title.json"})
+    assert "ビルド失敗" in capsys.readouterr().out
+    assert out.read_bytes() == before
+
+
+def test_burst_of_edits_is_debounced_into_one_rebuild(tmp_path):
+    slides_dir = _project(tmp_path)
+    watcher = ProjectWatcher(slides_dir, tmp_path / "deck.pptx", "sx_proposal", interval=0.02, debounce=0.3)
+    watcher.build()
+    thread = threading.Thread(target=watcher.run, kwargs={"max_rebuilds": 1, "initial_build": False})
+    thread.start()
+    time.sleep(0.1)
+    for i in range(3):
+        _write(slides_dir / "01_content.json", {"type": "content", "title": f"本文{i}"})
+        _bump(slides_dir / "01_content.json")
+        time.sleep(0.05)
+    thread.join(30)
+    assert not thread.is_alive()
+    assert len(watcher.rebuilds) == 2   # 初回 + デバウンスされた1回
+    assert [os.path.basename(p) for p in watcher.rebuilds[1]["changed"]] == ["01_content.json"]
+    assert watcher.rebuilds[1]["latency_seconds"] < 5
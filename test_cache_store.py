@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_cache_store.py
+cache_store のユニットテスト（python -m pytest test_cache_store.py）
+"""
+
+import os
+import json
+import time
+import threading
+
+import pytest
+
+import cache_store
+from cache_store import IndexTransaction
+
+
+def test_transaction_writes_back_only_on_success(tmp_path):
+    lock = threading.Lock()
+    with IndexTransaction(tmp_path, lock) as index:
+        index["a"] = 1
+    with pytest.raises(RuntimeError):
+        with IndexTransaction(tmp_path, lock) as index:
+            index["b"] = 2
+            raise RuntimeError("途中で失敗")
+
+    assert json.loads((tmp_path / "index.json").read_text(encoding="utf-8")) == {"a": 1}
+    assert not (tmp_path / ".lock").exists() and not lock.locked()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_stale_lock_file_is_taken_over(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_store, "LOCK_STALE_SECONDS", 1.0)
+    lock_path = tmp_path / ".lock"
+    lock_path.write_text("12345")   # 異常終了したプロセスの残骸
+    old = time.time() - 5
+    os.utime(lock_path, (old, old))
+
+    with IndexTransaction(tmp_path, threading.Lock()) as index:
+        index["ok"] = True
+    assert json.loads((tmp_path / "index.json").read_text(encoding="utf-8")) == {"ok": True}
+
+
+def test_file_sha256_reads_in_chunks(tmp_path):
+    import hashlib
+    data = os.urandom((1 << 20) + 123)   # チャンク境界をまたぐ
+    path = tmp_path / "blob.bin"
+    path.write_bytes(data)
+    assert cache_store.file_sha256(path) == hashlib.sha256(data).hexdigest()
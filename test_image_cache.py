@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_image_cache.py
+image_cache のユニットテスト（python -m pytest test_image_cache.py）
+"""
+
+import json
+import threading
+
+from image_cache import ImageCache
+
+
+def test_prompts_with_same_prefix_do_not_collide(tmp_path):
+    cache = ImageCache(tmp_path)
+    prefix = "製造業のDX推進を表すビジネスイラスト、シンプルでミニマルなスタイル"
+    cache.put(prefix + "（工場）", "m", b"factory")
+    cache.put(prefix + "（オフィス）", "m", b"office")
+
+    assert cache.get(prefix + "（工場）", "m") == b"factory"
+    assert cache.get(prefix + "（オフィス）", "m") == b"office"
+    assert cache.get(prefix, "m") is None
+    assert cache.get_rendition("0" * 40, (5.0, 3.0), 150, "auto") is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_lru_eviction_under_byte_budget(tmp_path):
+    cache = ImageCache(tmp_path, max_bytes=250)
+    cache.put("a", "m", b"a" * 100)
+    cache.put("b", "m", b"b" * 100)
+    cache.get("a", "m")  # a を最近使ったことにする → 追い出されるのは b
+    cache.put("c", "m", b"c" * 100)
+
+    assert cache.contains("a", "m") and cache.contains("c", "m")
+    assert not cache.contains("b", "m")
+    assert cache.total_bytes() == 200
+    assert cache.evictions == 1
+    index = json.loads((tmp_path / "index.json").read_text(encoding="utf-8"))
+    assert len(index) == 2
+
+
+def test_concurrent_writers_keep_index_consistent(tmp_path):
+    # 別インスタンス = 別プロセスのビルド相当（プロセス間ロックファイルで直列化される）
+    caches = [ImageCache(tmp_path) for _ in range(4)]
+
+    def writer(n: int):
+        for i in range(25):
+            caches[n].put(f"prompt {n}-{i}", "m", bytes([n]) * (i + 1))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    index = json.loads((tmp_path / "index.json").read_text(encoding="utf-8"))
+    assert len(index) == 100
+    assert not (tmp_path / ".lock").exists()
+    assert not list(tmp_path.rglob("*.tmp"))
+    assert ImageCache(tmp_path).get("prompt 3-24", "m") == bytes([3]) * 25
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_image_client.py
+image_client のユニットテスト（python -m pytest test_image_client.py）
+ローカルのスタブ画像生成サーバーを HttpImageBackend で呼ぶ。
+"""
+
+import io
+import os
+import json
+import time
+import zipfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+import pptx_engine
+import image_client
+from image_client import CircuitBreaker, HttpImageBackend, ImageClient, is_placeholder
+
+
+def _png(color=(30, 60, 200)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 40), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class StubImageServer:
+    """
+    POST /generate に応答するスタブ。script の先頭から1つずつ取り出して応答する
+    （int: そのステータスで失敗 / float: その秒数待ってから画像 / None: 画像）。尽きたら画像を返す。
+    """
+
+    def __init__(self, script=None):
+        self.script = list(script or [])
+        self.requests: list[dict] = []
+        self.peers: set = set()
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests.append(body)
+                    stub.peers.add(self.client_address)
+                    step = stub.script.pop(0) if stub.script else None
+                if isinstance(step, float):
+                    time.sleep(step)
+                status, data = (step, b"unavailable") if isinstance(step, int) else (200, _png())
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubImageServer()
+    yield server
+    server.close()
+
+
+def _client(url, **kwargs):
+    kwargs.setdefault("base_delay", 0.001)
+    return ImageClient(HttpImageBackend(url), **kwargs)
+
+
+def test_connection_is_reused_across_calls(stub):
+    client = _client(stub.url)
+    for i in range(5):
+        assert client.generate(f"prompt {i}", "m") == _png()
+    assert len(stub.requests) == 5
+    assert len(stub.peers) == 1   # 同じ接続（送信元ポート）を使い回している
+
+
+def test_transient_errors_and_timeouts_are_retried(stub):
+    stub.script = [503, 0.5, None]
+    client = _client(stub.url, timeout=0.2, attempts=3)
+    blob = client.generate("retry", "m")
+
+    assert blob == _png() and not is_placeholder(blob)
+    assert client.calls == 3 and client.failures == 0
+    assert client.breaker.state == "closed"
+
+
+def test_client_errors_are_not_retried(stub):
+    stub.script = [400]
+    client = _client(stub.url, attempts=3)
+    assert client.generate("bad request", "m") is None
+    assert len(stub.requests) == 1
+    assert client.breaker.failures == 0
+
+
+def test_circuit_breaker_serves_placeholders_then_recovers(stub):
+    stub.script = [503] * 4
+    client = _client(stub.url, attempts=2, breaker=CircuitBreaker(threshold=2, reset_seconds=0.2))
+
+    assert is_placeholder(client.generate("a", "m"))
+    assert is_placeholder(client.generate("b", "m"))
+    assert client.breaker.state == "open" and len(stub.requests) == 4
+    # 開いている間はサーバーを呼ばずにプレースホルダーを返す
+    assert is_placeholder(client.generate("c", "m"))
+    assert len(stub.requests) == 4 and client.placeholders == 3
+
+    time.sleep(0.25)
+    assert client.generate("d", "m") == _png()     # 半開で1件試して成功 → 閉じる
+    assert client.breaker.state == "closed"
+
+
+def test_get_image_client_is_created_once_per_process(monkeypatch, stub):
+    monkeypatch.setenv("IMAGE_BACKEND_URL", stub.url)
+    monkeypatch.setattr(image_client, "_CLIENTS", {})
+    first = image_client.get_image_client()
+    assert image_client.get_image_client() is first
+    assert isinstance(first.backend, HttpImageBackend)
+
+    # 別プロセス（fork 後）では作り直す
+    pid = os.getpid()
+    monkeypatch.setattr(image_client.os, "getpid", lambda: pid + 1)
+    assert image_client.get_image_client() is not first
+
+
+def test_failed_images_become_placeholders_that_are_not_cached(monkeypatch, tmp_path, stub):
+    stub.script = [503] * 10
+    monkeypatch.setitem(image_client._CLIENTS, os.getpid(), _client(stub.url, attempts=2))
+    outline = [{"type": "content", "title": "画像", "images": [{"prompt": "down", "left": 7.0, "top": 1.5, "width": 5.0}]}]
+
+    path = pptx_engine.build_pptx(outline, tmp_path / "out.pptx")
+
+    with zipfile.ZipFile(path) as z:
+        assert any(n.startswith("ppt/media/") for n in z.namelist())
+    assert not pptx_engine.IMAGE_CACHE.contains("down", "gemini-3-pro-image-preview")
+    assert len(stub.requests) == 2
+
+
+def _picture_colors(path) -> list[tuple]:
+    from pptx import Presentation
+    return [Image.open(io.BytesIO(sh.image.blob)).convert("RGB").getpixel((8, 8))
+            for slide in Presentation(str(path)).slides for sh in slide.shapes if sh.shape_type == 13]
+
+
+def test_placeholder_slides_are_rebuilt_when_backend_recovers(monkeypatch, tmp_path, stub):
+    outline = [{"type": "content", "title": "画像", "images": [{"prompt": "recover", "left": 7.0, "top": 1.5, "width": 5.0}]}]
+    out = tmp_path / "deck.pptx"
+
+    def build():
+        manifest = pptx_engine._manifest_for(out, None, None, pptx_engine.IMAGE_RENDITION_DPI)
+        return pptx_engine.build_pptx(outline, out, manifest=manifest)
+
+    broken = _client(stub.url, breaker=CircuitBreaker(threshold=1, reset_seconds=60))
+    broken.breaker.record_failure()   # ブレーカーが開いている
+    monkeypatch.setitem(image_client._CLIENTS, os.getpid(), broken)
+    assert _picture_colors(build()) == [(217, 217, 217)]
+    assert broken.placeholders == 1 and not stub.requests
+
+    monkeypatch.setitem(image_client._CLIENTS, os.getpid(), _client(stub.url))
+    assert _picture_colors(build()) == [(30, 60, 200)]
+    assert len(stub.requests) == 1
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_import_budget.py
+CLI の起動時 import のテスト（python -m pytest test_import_budget.py）
+
+python -X importtime で各コマンドを実行し、
+  - 読み込んではいけない重いモジュール（python-pptx・Pillow・lxml・jsonschema・dotenv 等）が
+    import されていないこと
+  - トップレベルの import の累計時間が予算内であること
+を確認する。予算は計測値の約3倍（遅い CI でも落ちない程度）にしてあり、
+重い依存をうっかりトップレベルに戻したときに気づくためのもの。
+"""
+
+import sys
+import subprocess
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent
+SAMPLE_TIER2 = next((ROOT / "slides").glob("*/slides/*.json"), None)
+
+HEAVY = ("pptx", "PIL", "lxml", "jsonschema", "dotenv", "anthropic", "google")
+
+# (id, コマンド引数, 予算 [ms], import してはいけないモジュール)
+CASES = [
+    ("generate_help", ["generate_pptx.py", "--help"], 150, HEAVY),
+    ("template_list", ["template_analyzer.py", "list"], 150, HEAVY),
+    ("server_status", ["build_server.py", "status"], 150, HEAVY),
+    ("validate_design", ["dev_tools.py", "validate-design", str(SAMPLE_TIER2)], 150, HEAVY),
+    # 結合は python-pptx が必須。API クライアント・スキーマ検証・dotenv は読み込まない
+    ("engine", ["-c", "import pptx_engine"], 900, ("jsonschema", "dotenv", "anthropic", "google")),
+]
+
+
+def import_times(args: list[str]) -> tuple[dict[str, float], set[str]]:
+    """-X importtime の出力から（{トップレベルの import: 累計 ms}, 読み込まれた全モジュール名）を返す"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT,
+                          capture_output=True, text=True, encoding="utf-8", errors="replace")
+    times, modules = {}, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if name.startswith(" ") and not name.startswith("  "):
+            times[name.strip()] = int(cumulative) / 1000
+    return times, modules
+
+
+@pytest.mark.parametrize("args,budget_ms,forbidden", [c[1:] for c in CASES], ids=[c[0] for c in CASES])
+def test_cli_import_budget(args, budget_ms, forbidden):
+    times, modules = import_times(args)
+    assert times, "importtime の出力がない"
+
+    loaded = sorted(name for name in modules if name.split(".")[0] in forbidden)
+    assert not loaded, f"起動時に重いモジュールを import している: {loaded}"
+
+    total = sum(ms for name, ms in times.items() if name not in ("site", "encodings"))
+    slowest = sorted(times.items(), key=lambda kv: -kv[1])[:5]
+    assert total <= budget_ms, f"import 合計 {total:.0f} ms > 予算 {budget_ms} ms（上位: {slowest}）"
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_outline_stream.py
+outline_stream のユニットテスト（python -m pytest test_outline_stream.py）
+"""
+
+import json
+import time
+import random
+import zipfile
+
+import pytest
+
+import pptx_engine
+from outline_stream import JsonArrayParser, StreamingOutlineBuild, claude_text_stream, iter_outline_slides
+
+# Claude の応答を記録したもの（フェンス付き・文字列中に括弧やエスケープを含む）
+RECORDED_SLIDES = [
+    {"type": "title", "title": "生成AIによる提案書作成の自動化", "subtitle": "2026年10月　{株式会社サンプル} 御中"},
+    {"type": "agenda", "title": "目次", "body": "1. 背景と課題\n2. 提案内容\n3. 期待効果"},
+    {"type": "chapter", "title": "1. 背景と課題"},
+] + [
+    {"type": "content", "title": f"課題{i}: \"手作業\" による [資料] 作成",
+     "subtitle": "キーメッセージ", "body": "・箇条書き1\n・箇条書き2",
+     "objects": [{"type": "box", "text": "現状", "left": 0.5, "top": 4.5, "width": 2.5, "height": 0.9},
+                 {"type": "arrow", "left": 3.1, "top": 4.7, "width": 0.6, "height": 0.5}],
+     "images": [{"prompt": f"business illustration {i}", "model": "gemini-3-pro-image-preview",
+                 "left": 7.5, "top": 1.5, "width": 5.3}]}
+    for i in range(6)
+] + [{"type": "end"}]
+RECORDED_RESPONSE = "```json\n" + json.dumps(RECORDED_SLIDES, ensure_ascii=False, indent=2) + "\n```"
+
+
+class _FakeStream:
+    def __init__(self, text: str, chunk_size: int, delay: float):
+        self.text = text
+        self.chunk_size = chunk_size
+        self.delay = delay
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        for i in range(0, len(self.text), self.chunk_size):
+            time.sleep(self.delay)
+            yield self.text[i:i + self.chunk_size]
+
+
+class FakeStreamingClient:
+    """anthropic.Anthropic の messages.stream() を真似て、記録済みの応答を遅延付きで再生する"""
+
+    def __init__(self, text: str, chunk_size: int = 40, delay: float = 0.0):
+        self.messages = self
+        self.text = text
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.requests: list[dict] = []
+
+    def stream(self, **kwargs):
+        self.requests.append(kwargs)
+        return _FakeStream(self.text, self.chunk_size, self.delay)
+
+
+class _RecordingGenerator:
+    def __init__(self):
+        self.started: list[float] = []
+
+    def __call__(self, prompt: str, model: str) -> bytes:
+        import io
+        from PIL import Image
+        self.started.append(time.perf_counter())
+        time.sleep(0.05)
+        buf = io.BytesIO()
+        Image.new("RGB", (64, 40), (30, 60, 200)).save(buf, format="PNG")
+        return buf.getvalue()
+
+
+def test_parser_matches_json_loads_for_any_chunking():
+    rng = random.Random(0)
+    for _ in range(50):
+        parser, slides, pos = JsonArrayParser(), [], 0
+        while pos < len(RECORDED_RESPONSE):
+            n = rng.randint(1, 12)
+            slides += parser.feed(RECORDED_RESPONSE[pos:pos + n])
+            pos += n
+        parser.close()
+        assert slides == RECORDED_SLIDES
+
+
+def test_parser_emits_each_slide_when_its_closing_brace_arrives():
+    parser = JsonArrayParser()
+    assert parser.feed('[{"type": "title", "title": "a}"') == []
+    assert parser.feed('}, {"type": "end"') == [{"type": "title", "title": "a}"}]
+    assert parser.feed("}]") == [{"type": "end"}]
+
+
+def test_parser_rejects_non_object_elements():
+    parser = JsonArrayParser()
+    assert parser.feed('[{"type": "end"}, ') == [{"type": "end"}]
+    with pytest.raises(ValueError, match="オブジェクトである必要"):
+        parser.feed('[{"type": "title"}]]')
+
+
+def test_truncated_stream_raises():
+    with pytest.raises(ValueError, match="途中で終わって"):
+        list(iter_outline_slides([RECORDED_RESPONSE[:len(RECORDED_RESPONSE) // 2]], validate=False))
+
+
+def test_claude_text_stream_sends_prompt_to_client():
+    client = FakeStreamingClient(RECORDED_RESPONSE)
+    slides = list(iter_outline_slides(claude_text_stream("提案書", system="SYS", client=client), validate=False))
+    assert slides == RECORDED_SLIDES
+    assert client.requests[0]["system"] == "SYS"
+    assert client.requests[0]["messages"] == [{"role": "user", "content": "提案書"}]
+
+
+def test_streaming_build_renders_first_slide_before_stream_ends(tmp_path):
+    # 約 1.2 秒かけて応答が届く（40文字ごとに 12ms）
+    client = FakeStreamingClient(RECORDED_RESPONSE, chunk_size=40, delay=0.012)
+    generator = _RecordingGenerator()
+    build = StreamingOutlineBuild(claude_text_stream("提案書", system="SYS", client=client),
+                                  tmp_path / "streamed.pptx", image_generator=generator)
+    t0 = time.perf_counter()
+    path = build.run()
+
+    assert build.outline == RECORDED_SLIDES
+    assert len(build.rendered_at) == len(RECORDED_SLIDES)
+    # 1枚目は応答全体が届くよりずっと前にレンダリングされ、画像生成も受信中に始まっている
+    assert build.first_slide_seconds < build.stream_seconds / 4
+    assert min(generator.started) - t0 < build.stream_seconds
+    assert len(generator.started) == 6
+
+    # 結果は受信完了後にまとめてビルドした場合と同じ
+    normal = pptx_engine.build_pptx(RECORDED_SLIDES, tmp_path / "normal.pptx")
+    with zipfile.ZipFile(path) as a, zipfile.ZipFile(normal) as b:
+        slides_a = {n: a.read(n) for n in a.namelist() if n.startswith(("ppt/slides/", "ppt/media/"))}
+        slides_b = {n: b.read(n) for n in b.namelist() if n.startswith(("ppt/slides/", "ppt/media/"))}
+    assert slides_a == slides_b
+
+
+def test_hung_image_generator_does_not_block_exit(tmp_path):
+    import os
+    import sys
+    import subprocess
+    from pathlib import Path
+    code = ("import json, sys, time, outline_stream\n"
+            "slides = [{'type': 'content', 'title': 'x', 'images': [{'prompt': 'hang'}]}]\n"
+            "build = outline_stream.StreamingOutlineBuild([json.dumps(slides)], sys.argv[1], image_timeout=0.2,\n"
+            "                                             image_generator=lambda p, m: time.sleep(60))\n"
+            "build.run()\n"
+            "assert build.prefetched == {('hang', 'gemini-3-pro-image-preview'): None}\n")
+    env = dict(os.environ, IMAGE_CACHE_DIR=str(tmp_path / "cache"))
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code, str(tmp_path / "out.pptx")], cwd=Path(pptx_engine.__file__).parent,
+                   env=env, check=True, timeout=30, capture_output=True)
+    assert time.perf_counter() - t0 < 20   # 応答しない生成を待たずに終了する
+
+
+def test_streaming_build_reports_parse_errors(tmp_path):
+    client = FakeStreamingClient('[{"type": "title", "title": "x"}, 42]')
+    build = StreamingOutlineBuild(claude_text_stream("x", system="SYS", client=client), tmp_path / "bad.pptx",
+                                  validate=False)
+    with pytest.raises(ValueError, match="オブジェクト"):
+        build.run()
+    assert not (tmp_path / "bad.pptx").exists()
+
+
+def test_invalid_slides_are_reported_and_skipped(capsys):
+    text = json.dumps([{"type": "title", "title": "ok"}, {"type": "content", "title": "x", "objects": "box"},
+                       {"type": "content", "title": "z", "images": ["cat.png"]}, {"type": "unknown", "title": "y"}])
+    slides = list(iter_outline_slides([text]))
+    assert slides == [{"type": "title", "title": "ok"}, {"type": "unknown", "title": "y"}]
+    out = capsys.readouterr().out
+    assert "スライド 2 をスキップ" in out and "スライド 3 をスキップ" in out and "未知の type" in out
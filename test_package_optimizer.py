@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_package_optimizer.py
+package_optimizer のユニットテスト（python -m pytest test_package_optimizer.py）
+"""
+
+import io
+import zipfile
+from pathlib import Path
+
+from lxml import etree
+from pptx import Presentation
+
+import pptx_engine
+from package_optimizer import optimize_package, RT_THUMBNAIL, RT_CUSTOM_XML
+
+PR_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+def _png(size, color) -> bytes:
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _add_rel(rels_xml: bytes, rId: str, reltype: str, target: str) -> bytes:
+    root = etree.fromstring(rels_xml)
+    etree.SubElement(root, f"{{{PR_NS}}}Relationship", Id=rId, Type=reltype, Target=target)
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def _bloated_deck(tmp_path: Path) -> Path:
+    """
+    画像付きの2枚デッキを作り、ZIP を直接書き換えて
+    サムネイル・customXml・重複メディア・巨大画像・孤立パーツを仕込む
+    """
+    (tmp_path / "small.png").write_bytes(_png((400, 300), (200, 60, 60)))
+    outline = [{"type": "content", "title": f"スライド{i}",
+                "images": [{"file": "small.png", "left": 7.0, "top": 1.5, "width": 4.0, "height": 3.0}]}
+               for i in range(2)]
+    built = pptx_engine.build_pptx(outline, tmp_path / "built.pptx", slides_dir=tmp_path)
+
+    with zipfile.ZipFile(built) as zf:
+        parts = {name: zf.read(name) for name in zf.namelist()}
+    media = sorted(n for n in parts if n.startswith("ppt/media/") and n.endswith(".png"))[0]
+
+    # slide2 の画像を、同じ内容の別パーツ（重複）に向け直す
+    parts["ppt/media/dup_image.png"] = parts[media]
+    rels2 = "ppt/slides/_rels/slide2.xml.rels"
+    parts[rels2] = parts[rels2].replace(f"../media/{Path(media).name}".encode(), b"../media/dup_image.png")
+    # slide1 の画像を巨大な PNG に差し替える
+    parts[media] = _png((4000, 3000), (200, 60, 60))
+    parts["ppt/media/dup_image.png"] = _png((400, 300), (10, 10, 10))
+
+    parts["docProps/thumbnail.jpeg"] = b"\xff\xd8thumbnail"
+    parts["_rels/.rels"] = _add_rel(parts["_rels/.rels"], "rIdThumb", RT_THUMBNAIL, "docProps/thumbnail.jpeg")
+    parts["customXml/item1.xml"] = b"<root/>"
+    pres_rels = "ppt/_rels/presentation.xml.rels"
+    parts[pres_rels] = _add_rel(parts[pres_rels], "rIdCustom", RT_CUSTOM_XML, "../customXml/item1.xml")
+    parts["ppt/media/orphan.png"] = _png((10, 10), (0, 0, 0))
+
+    out = tmp_path / "bloated.pptx"
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, blob in parts.items():
+            zf.writestr(name, blob)
+    return out
+
+
+def test_optimize_package_rewrites_valid_smaller_package(tmp_path):
+    deck = _bloated_deck(tmp_path)
+    result = optimize_package(deck, tmp_path / "optimized.pptx")
+
+    assert result.after_bytes < result.before_bytes
+    assert result.recompressed == 1
+    assert result.removed >= 3  # サムネイル・customXml・孤立パーツ
+    with zipfile.ZipFile(result.path) as zf:
+        names = zf.namelist()
+        assert names[0] == "[Content_Types].xml"
+        assert "docProps/thumbnail.jpeg" not in names
+        assert not any(n.startswith("customXml/") for n in names)
+        assert "ppt/media/orphan.png" not in names
+        for info in zf.infolist():
+            if info.filename.endswith(".xml"):
+                assert info.compress_type == zipfile.ZIP_DEFLATED
+
+    prs = Presentation(str(result.path))
+    pictures = [sh for slide in prs.slides for sh in slide.shapes if sh.shape_type == 13]
+    assert len(pictures) == 2
+    assert max(pictures[0].image.size) == 2400
+
+
+def test_optimize_package_merges_identical_media(tmp_path):
+    deck = _bloated_deck(tmp_path)
+    # 重複パーツを元の画像と同じ内容に戻してから最適化する
+    with zipfile.ZipFile(deck) as zf:
+        parts = {name: zf.read(name) for name in zf.namelist()}
+    original = sorted(n for n in parts if n.startswith("ppt/media/") and n != "ppt/media/dup_image.png"
+                      and n != "ppt/media/orphan.png" and n.endswith(".png"))[0]
+    parts["ppt/media/dup_image.png"] = parts[original]
+    with zipfile.ZipFile(deck, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, blob in parts.items():
+            zf.writestr(name, blob)
+
+    result = optimize_package(deck)
+    assert result.deduplicated == 1
+    prs = Presentation(str(deck))
+    blobs = {sh.image.sha1 for slide in prs.slides for sh in slide.shapes if sh.shape_type == 13}
+    assert len(blobs) == 1
+    with zipfile.ZipFile(deck) as zf:
+        assert "ppt/media/dup_image.png" not in zf.namelist()
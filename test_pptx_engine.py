@@ -0,0 +1,551 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_pptx_engine.py
+pptx_engine のユニットテスト（python -m pytest test_pptx_engine.py）
+"""
+
+import os
+import json
+import shutil
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+import pptx_engine
+from pptx_engine import TemplatePool, get_template_config
+
+
+def _copy_template(tmp_path: Path, template_id: str = "sx_proposal"):
+    """テンプレートを tmp_path にコピーし、コピー側を指す TemplateConfig を返す"""
+    src = pptx_engine.TEMPLATES_DIR / template_id
+    dst = tmp_path / template_id
+    shutil.copytree(src, dst)
+    return pptx_engine.TemplateConfig(dst / "profile.json")
+
+
+def test_template_pool_reuses_entry(tmp_path):
+    config = _copy_template(tmp_path)
+    pool = TemplatePool()
+    prs1 = pool.acquire(config)
+    prs2 = pool.acquire(config)
+    assert (pool.misses, pool.hits) == (1, 1)
+    assert len(prs1.slides) == 0
+    # クローン同士は独立している
+    prs1.slides.add_slide(prs1.slide_layouts[0])
+    assert len(prs2.slides) == 0
+
+
+def test_template_pool_touch_keeps_entry(tmp_path):
+    config = _copy_template(tmp_path)
+    pool = TemplatePool()
+    pool.acquire(config)
+    st = config.template_path.stat()
+    os.utime(config.template_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+    pool.acquire(config)
+    assert (pool.misses, pool.hits) == (1, 1)
+
+
+def test_template_pool_reloads_on_change(tmp_path):
+    config = _copy_template(tmp_path)
+    pool = TemplatePool()
+    pool.acquire(config)
+    other = get_template_config("jr_east").template_path
+    shutil.copy2(other, config.template_path)
+    prs = pool.acquire(config)
+    assert pool.misses == 2
+    assert len(prs.slide_layouts) == len(pptx_engine.load_template(get_template_config("jr_east")).slide_layouts)
+
+
+def test_compile_template_strips_slides(tmp_path):
+    config = _copy_template(tmp_path)
+    compiled = pptx_engine.compile_template(config.template_path)
+    assert compiled.parent.name == pptx_engine.COMPILED_DIR_NAME
+    assert compiled.stat().st_size < config.template_path.stat().st_size
+    prs = pptx_engine.load_template(config)
+    assert len(prs.slides) == 0
+    # 同一ハッシュなら再利用、テンプレートが変われば古い成果物は消える
+    assert pptx_engine.compile_template(config.template_path) == compiled
+    shutil.copy2(get_template_config("jr_east").template_path, config.template_path)
+    recompiled = pptx_engine.compile_template(config.template_path)
+    assert recompiled != compiled and not compiled.exists()
+
+
+def test_template_config_registry_memoizes_and_reloads(tmp_path):
+    shutil.copytree(pptx_engine.TEMPLATES_DIR / "jr_east", tmp_path / "jr_east")
+    registry = pptx_engine.TemplateConfigRegistry(tmp_path)
+    config = registry.get("jr_east")
+    assert registry.get("jr_east") is config
+    # content と agenda は同じレイアウトを共有 → profile.json で先に出た content
+    assert config.layout_type_by_index[3] == "content"
+    assert config.roles_by_ph["content"] == {12: "title", 10: "master_title", 13: "body"}
+    assert config.mapped_placeholders["end"] == frozenset()
+
+    profile = tmp_path / "jr_east" / "profile.json"
+    st = profile.stat()
+    os.utime(profile, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert registry.get("jr_east") is not config
+    assert (registry.misses, registry.hits) == (2, 1)
+
+
+def test_template_config_registry_missing():
+    with pytest.raises(FileNotFoundError):
+        get_template_config("no_such_template")
+
+
+# ─── FillPlan ─────────────────────────────────────────
+def _legacy_fill(slide, slide_data: dict, config, has_objects: bool):
+    """FillPlan 導入前の add_slide と同じ手順（プレースホルダーごとにシェイプを走査）"""
+    layout_key = slide_data.get("type", "content")
+    phs = config.placeholders.get(layout_key, {})
+    if slide_data.get("title"):
+        pptx_engine.set_placeholder_text(slide, phs.get("title", 0), slide_data["title"])
+    if slide_data.get("subtitle"):
+        pptx_engine.set_placeholder_text(slide, phs.get("subtitle", 13), slide_data["subtitle"])
+    if phs.get("master_title") is not None:
+        pptx_engine.set_placeholder_text(slide, phs["master_title"], slide_data.get("master_title", ""))
+    if slide_data.get("body"):
+        pptx_engine.set_body_text(slide, slide_data["body"], search_order=config.body_ph_search_order)
+    elif has_objects:
+        for shape in list(slide.shapes):
+            if shape.is_placeholder and shape.placeholder_format.idx in config.body_ph_ids:
+                shape._element.getparent().remove(shape._element)
+                break
+
+
+@pytest.mark.parametrize("template_id", ["sx_proposal", "jr_east"])
+def test_fill_plan_matches_legacy_fill(template_id):
+    from lxml import etree
+
+    config = get_template_config(template_id)
+    prs = pptx_engine.TEMPLATE_POOL.acquire(config)
+    variants = [
+        {"title": "タイトル", "subtitle": "サブ", "body": "・一\n\n・二", "master_title": "章"},
+        {"title": "タイトル", "subtitle": "サブ"},
+        {"title": "", "body": "本文のみ"},
+    ]
+    for layout_key in list(config.layout) + ["unknown_type"]:
+        for data in variants:
+            for has_objects in (False, True):
+                slide_data = dict(data, type=layout_key)
+                layout = prs.slide_layouts[config.layout.get(layout_key, config.layout["content"])]
+                expected = prs.slides.add_slide(layout)
+                _legacy_fill(expected, slide_data, config, has_objects)
+                actual = prs.slides.add_slide(layout)
+                config.fill_plan(layout_key).apply(actual, slide_data, has_objects)
+                assert etree.tostring(actual.shapes._spTree) == etree.tostring(expected.shapes._spTree), \
+                    (layout_key, slide_data, has_objects)
+
+
+# ─── 図形の高速描画 ───────────────────────────────────
+PARITY_OBJECTS = [
+    {"type": "box", "text": "現状\n課題", "left": 0.5, "top": 4.5, "width": 2.5, "height": 0.9,
+     "fill_color": "c00000", "font_color": "FFFFFF", "font_size": 13},
+    {"type": "box", "text": "上寄せ\n\n2行目", "v_align": "top", "font_size": 10.5, "bold": False},
+    {"type": "box", "v_align": "top"},
+    {"type": "box", "text": "", "v_align": "bottom"},
+    {"type": "rect", "text": "A & <B>\x07\vソフト改行", "v_align": "other", "bold": None},
+    {"type": "arrow", "left": 3.1, "top": 4.7, "width": 0.6, "height": 0.5},
+    {"type": "arrow", "fill_color": "4472C4"},
+    {"type": "text", "text": "補足テキスト\n\n  前後の空白  ", "font_size": 11, "font_color": "404040"},
+    {"type": "text", "text": "", "v_align": "middle"},
+    {"type": "text", "text": "下寄せ", "v_align": "bottom", "bold": True},
+    {"type": "circle", "left": 1.0},
+    {"type": "box", "text": "Decimal 座標", "left": Decimal("1.25")},  # API 描画へフォールバック
+    {"type": "text", "text": "フォールバック後の連番", "left": 2},
+]
+
+
+def _objects_xml(objects, renderer):
+    from lxml import etree
+    prs = pptx_engine.TEMPLATE_POOL.acquire(get_template_config())
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    pptx_engine.add_objects_to_slide(slide, objects, renderer=renderer)
+    return etree.tostring(slide.part._element)
+
+
+def test_xml_renderer_matches_api_renderer():
+    assert _objects_xml(PARITY_OBJECTS, "xml") == _objects_xml(PARITY_OBJECTS, "api")
+
+
+def test_xml_renderer_keeps_api_errors():
+    for bad in ({"type": "box", "text": 123}, {"type": "arrow", "fill_color": "XYZ"}):
+        for renderer in ("api", "xml"):
+            with pytest.raises((AttributeError, ValueError)):
+                _objects_xml([bad], renderer)
+
+
+# ─── 並列ビルド ───────────────────────────────────────
+def _fixture_png(path: Path, color: tuple, size=(320, 200)) -> Path:
+    from PIL import Image
+    Image.new("RGB", size, color).save(path)
+    return path
+
+
+def _sample_outline(tmp_path: Path) -> list[dict]:
+    red = _fixture_png(tmp_path / "red.png", (200, 30, 30)).name
+    blue = _fixture_png(tmp_path / "blue.png", (30, 30, 200), size=(200, 320)).name
+    outline = [{"type": "title", "title": "並列ビルド", "subtitle": "テスト"}]
+    for i in range(7):
+        outline.append({
+            "type": "content", "title": f"スライド{i}", "subtitle": "要旨",
+            "objects": [{"type": "box", "text": f"箱{i}"}, {"type": "arrow"}],
+            # 同じ画像を複数スライドで使い、パッケージ内で重複排除されることも確認する
+            "images": [{"file": red if i % 2 else blue, "left": 7.0, "top": 1.5, "width": 5.0, "height": 3.0}],
+        })
+    outline.append("not a slide")
+    outline.append({"type": "end"})
+    return outline
+
+
+def _zip_parts(path: Path) -> dict[str, bytes]:
+    import zipfile
+    with zipfile.ZipFile(path) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def test_parallel_build_matches_serial(tmp_path):
+    outline = _sample_outline(tmp_path)
+    serial = pptx_engine.build_pptx(outline, tmp_path / "serial.pptx", slides_dir=tmp_path)
+    parallel = pptx_engine.build_pptx(outline, tmp_path / "parallel.pptx", slides_dir=tmp_path, workers=3)
+
+    serial_parts, parallel_parts = _zip_parts(serial), _zip_parts(parallel)
+    assert serial_parts.keys() == parallel_parts.keys()
+    for name in serial_parts:
+        assert serial_parts[name] == parallel_parts[name], name
+    assert len([n for n in parallel_parts if n.startswith("ppt/slides/slide")]) == 9
+
+
+def test_render_worker_uses_parent_image_cache(tmp_path, monkeypatch):
+    from image_cache import ImageCache
+    parent = pptx_engine.IMAGE_CACHE
+    slide = _image_outline(1)[0]
+    parent.put("illustration 0", "gemini-3-pro-image-preview", _SleepyGenerator(delay=0)("illustration 0", ""))
+    before = parent.total_bytes()
+    # spawn したワーカーは既定の（親とは別の）キャッシュで起動する
+    monkeypatch.setattr(pptx_engine, "IMAGE_CACHE", ImageCache(tmp_path / "worker_default"))
+    results, _ = pptx_engine._render_slides_worker(None, [(0, slide)], 1, None, cache_dir=parent.cache_dir)
+    assert len(results[0][1].images) == 1
+    assert pptx_engine.IMAGE_CACHE.cache_dir == parent.cache_dir
+    assert parent.total_bytes() > before   # 縮小版も親のキャッシュに保存される
+    assert not (tmp_path / "worker_default").exists()
+
+
+def _write_slides_dir(tmp_path: Path) -> Path:
+    slides_dir = tmp_path / "slides"
+    slides_dir.mkdir()
+    outline = [s for s in _sample_outline(slides_dir) if isinstance(s, dict)]
+    for i, slide_data in enumerate(outline):
+        (slides_dir / f"{i:02d}_{slide_data['type']}.json").write_text(
+            json.dumps(slide_data, ensure_ascii=False), encoding="utf-8")
+    return slides_dir
+
+
+def test_incremental_build_rerenders_only_changed_slides(tmp_path, monkeypatch):
+    slides_dir = _write_slides_dir(tmp_path)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    pptx_engine.build_from_slides_dir(slides_dir, out_dir / "v1.pptx")
+
+    rendered = []
+    add_slide = pptx_engine.add_slide
+    monkeypatch.setattr(pptx_engine, "add_slide",
+                        lambda prs, slide_data, **kw: rendered.append(slide_data["title"]) or add_slide(prs, slide_data, **kw))
+    edited = slides_dir / "03_content.json"
+    slide_data = json.loads(edited.read_text(encoding="utf-8"))
+    slide_data["title"] = "編集後のタイトル"
+    edited.write_text(json.dumps(slide_data, ensure_ascii=False), encoding="utf-8")
+    # 画像ファイルの差し替えも、その画像を参照するスライドだけを汚す
+    _fixture_png(slides_dir / "red.png", (10, 200, 10))
+
+    incremental = pptx_engine.build_from_slides_dir(slides_dir, out_dir / "v2.pptx")
+    assert sorted(rendered) == sorted(["編集後のタイトル", "スライド1", "スライド3", "スライド5"])
+
+    monkeypatch.setattr(pptx_engine, "add_slide", add_slide)
+    full = pptx_engine.build_from_slides_dir(slides_dir, tmp_path / "full.pptx", incremental=False)
+    incremental_parts, full_parts = _zip_parts(incremental), _zip_parts(full)
+    assert incremental_parts.keys() == full_parts.keys()
+    for name in full_parts:
+        assert incremental_parts[name] == full_parts[name], name
+
+
+class _SleepyGenerator:
+    """ネットワーク往復の代わりに sleep してから PNG を返す偽の画像生成器"""
+
+    def __init__(self, delay: float, slow: dict[str, float] | None = None):
+        self.delay = delay
+        self.slow = slow or {}
+        self.calls: list[str] = []
+
+    def __call__(self, prompt: str, model: str) -> bytes:
+        import io
+        import time
+        from PIL import Image
+        self.calls.append(prompt)
+        time.sleep(self.slow.get(prompt, self.delay))
+        buf = io.BytesIO()
+        Image.new("RGB", (160, 100), (len(prompt) * 20 % 256, 90, 90)).save(buf, format="PNG")
+        return buf.getvalue()
+
+
+def _image_outline(n: int) -> list[dict]:
+    return [{"type": "content", "title": f"画像{i}",
+             "images": [{"prompt": f"illustration {i}", "left": 7.0, "top": 1.5, "width": 5.0, "height": 3.0}]}
+            for i in range(n)]
+
+
+def test_prefetch_images_runs_concurrently(tmp_path):
+    import time
+    outline = _image_outline(6)
+    outline.append(dict(outline[0], title="同じ画像"))  # 同じ prompt は1回だけ生成
+    generator = _SleepyGenerator(delay=0.2)
+    t0 = time.perf_counter()
+    out = pptx_engine.build_pptx(outline, tmp_path / "deck.pptx", image_generator=generator,
+                                 image_concurrency=6)
+    elapsed = time.perf_counter() - t0
+
+    assert sorted(generator.calls) == sorted(f"illustration {i}" for i in range(6))
+    assert elapsed < 6 * 0.2 * 0.5  # 逐次なら 1.2 秒以上かかる
+    from pptx import Presentation
+    assert all(any(sh.shape_type == 13 for sh in slide.shapes) for slide in Presentation(str(out)).slides)
+
+
+def test_prefetch_images_timeout_skips_image(tmp_path):
+    (tmp_path / "cached.png").write_bytes(_SleepyGenerator(0)("cached", "m"))
+    outline = _image_outline(2)
+    outline[1]["images"][0]["prompt"] = "slow"
+    outline.append({"type": "content", "title": "キャッシュ済み",
+                    "images": [{"file": "cached.png", "prompt": "cached"}]})
+    generator = _SleepyGenerator(delay=0.0, slow={"slow": 2.0})
+    results = pptx_engine.prefetch_images(outline, slides_dir=tmp_path, timeout=0.3, generator=generator)
+
+    assert results[("slow", "gemini-3-pro-image-preview")] is None
+    assert results[("illustration 0", "gemini-3-pro-image-preview")]
+    assert "cached" not in generator.calls
+
+
+def test_prefetch_timeout_does_not_block_interpreter_exit(tmp_path):
+    import sys
+    import time
+    import subprocess
+    code = ("import time, pptx_engine\n"
+            "outline = [{'type': 'content', 'images': [{'prompt': 'hang'}]}]\n"
+            "r = pptx_engine.prefetch_images(outline, timeout=0.2, generator=lambda p, m: time.sleep(60))\n"
+            "assert r == {('hang', 'gemini-3-pro-image-preview'): None}\n")
+    env = dict(os.environ, IMAGE_CACHE_DIR=str(tmp_path / "cache"))
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=Path(pptx_engine.__file__).parent, env=env,
+                   check=True, timeout=30, capture_output=True)
+    assert time.perf_counter() - t0 < 20   # 応答しない呼び出しを待たずに終了する
+
+
+def _picture_count(path: Path) -> int:
+    from pptx import Presentation
+    return sum(sh.shape_type == 13 for slide in Presentation(str(path)).slides for sh in slide.shapes)
+
+
+def test_incremental_build_retries_slides_with_failed_images(tmp_path):
+    outline = _image_outline(2)
+    out = tmp_path / "deck.pptx"
+
+    def build(generator):
+        manifest = pptx_engine._manifest_for(out, None, None, pptx_engine.IMAGE_RENDITION_DPI)
+        return pptx_engine.build_pptx(outline, out, manifest=manifest, image_generator=generator)
+
+    def flaky(prompt, model):
+        if prompt == "illustration 1":
+            raise TimeoutError("backend down")
+        return _SleepyGenerator(0)(prompt, model)
+
+    assert _picture_count(build(flaky)) == 1
+    # 画像が欠けたスライドは記録されていないので、次のビルドで生成し直す
+    generator = _SleepyGenerator(0)
+    assert _picture_count(build(generator)) == 2
+    assert generator.calls == ["illustration 1"]
+
+
+def test_generated_images_come_from_shared_cache(tmp_path):
+    outline = _image_outline(2)
+    generator = _SleepyGenerator(delay=0.0)
+    pptx_engine.build_pptx(outline, tmp_path / "a.pptx", image_generator=generator)
+    pptx_engine.build_pptx(outline, tmp_path / "b.pptx", image_generator=generator)
+
+    assert len(generator.calls) == 2  # 2回目のビルドは生成もレンディションもキャッシュから
+    cache = pptx_engine.IMAGE_CACHE
+    assert cache.contains("illustration 0", "gemini-3-pro-image-preview")
+    assert cache.hits >= 4
+    assert _zip_parts(tmp_path / "a.pptx") == _zip_parts(tmp_path / "b.pptx")
+
+
+def _photo_like_png(size=(1600, 1000)) -> bytes:
+    """グラデーション＋ノイズで色数の多い（写真調の）PNG を作る"""
+    import io
+    from PIL import Image
+    img = Image.merge("RGB", [Image.linear_gradient("L").resize(size),
+                              Image.effect_noise(size, 60),
+                              Image.radial_gradient("L").resize(size)])
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _fixture_png_bytes(size) -> bytes:
+    import io
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new("RGB", size, (40, 40, 40)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_render_image_downsizes_to_placement_box():
+    import io
+    from PIL import Image
+    photo = pptx_engine.render_image(_photo_like_png(), 4.0, 2.0, dpi=100)
+    img = Image.open(io.BytesIO(photo))
+    assert (img.format, img.size) == ("JPEG", (400, 200))
+
+    flat = io.BytesIO()
+    Image.new("RGB", (1600, 1000), (237, 125, 49)).save(flat, format="PNG")
+    img = Image.open(io.BytesIO(pptx_engine.render_image(flat.getvalue(), 4.0, dpi=100)))
+    assert (img.format, img.size) == ("PNG", (400, 250))
+
+    # 枠より小さい画像は拡大せず、比率も合っていればそのまま埋め込む
+    small = _fixture_png_bytes((200, 125))
+    assert pptx_engine.render_image(small, 4.0, 2.5, dpi=100) == small
+
+
+def test_placement_rendition_is_memoized(monkeypatch):
+    calls = []
+    render = pptx_engine.render_image
+    monkeypatch.setattr(pptx_engine, "render_image", lambda *a, **kw: calls.append(a) or render(*a, **kw))
+    src = _photo_like_png((400, 300))
+    first = pptx_engine.placement_rendition(src, 2.0, 1.0, dpi=100)
+    assert pptx_engine.placement_rendition(src, 2.0, 1.0, dpi=100) == first
+    pptx_engine.placement_rendition(src, 2.0, 1.0, dpi=150)
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("template_id", ["sx_proposal", "jr_east"])
+def test_prune_layouts_keeps_only_used_layouts(tmp_path, template_id):
+    from pptx import Presentation
+    outline = [{"type": "title", "title": "表紙"}, {"type": "content", "title": "本文"}, {"type": "end"}]
+    full = pptx_engine.build_pptx(outline, tmp_path / "full.pptx", template_id=template_id)
+    pruned = pptx_engine.build_pptx(outline, tmp_path / "pruned.pptx", template_id=template_id,
+                                    prune_unused_layouts=True)
+
+    prs = Presentation(str(pruned))
+    used = [slide.slide_layout.name for slide in prs.slides]
+    assert used == [slide.slide_layout.name for slide in Presentation(str(full)).slides]
+    remaining = [layout.name for master in prs.slide_masters for layout in master.slide_layouts]
+    assert sorted(remaining) == sorted(set(used))
+    assert all(len(master.slide_layouts) for master in prs.slide_masters)
+    assert pruned.stat().st_size < full.stat().st_size
+
+
+def test_prune_reports_size_and_open_time(tmp_path, capsys, monkeypatch):
+    from pptx.presentation import Presentation
+    outline = [{"type": "title", "title": "表紙"}, {"type": "end"}]
+    saves = []
+    save = Presentation.save
+    monkeypatch.setattr(Presentation, "save", lambda prs, file: saves.append(file) or save(prs, file))
+
+    pptx_engine.build_pptx(outline, tmp_path / "pruned.pptx", prune_unused_layouts=True)
+    out = capsys.readouterr().out
+    # 削減前はメモリ上に1回だけ保存して比べる
+    assert len(saves) == 2 and "MB →" in out and "ms →" in out
+
+
+@pytest.mark.parametrize("template_id", ["sx_proposal", "jr_east"])
+def test_streaming_build_matches_normal_build(tmp_path, template_id):
+    from pptx import Presentation
+    slides_dir = _write_slides_dir(tmp_path)
+    normal = pptx_engine.build_from_slides_dir(slides_dir, tmp_path / "normal.pptx",
+                                               template_id=template_id, incremental=False)
+    streamed = pptx_engine.build_from_slides_dir(slides_dir, tmp_path / "streamed.pptx",
+                                                 template_id=template_id, streaming=True)
+
+    normal_parts, streamed_parts = _zip_parts(normal), _zip_parts(streamed)
+    assert normal_parts.keys() == streamed_parts.keys()
+    for name in normal_parts:
+        if name.startswith(("ppt/slides/", "ppt/media/", "ppt/slideLayouts/")):
+            assert streamed_parts[name] == normal_parts[name], name
+    prs = Presentation(str(streamed))
+    assert [s.shapes.title.text if s.shapes.title else None for s in prs.slides] == \
+        [s.shapes.title.text if s.shapes.title else None for s in Presentation(str(normal)).slides]
+
+
+def test_streaming_build_consumes_slides_lazily(tmp_path, monkeypatch):
+    rendered = []
+    add_slide = pptx_engine.add_slide
+    monkeypatch.setattr(pptx_engine, "add_slide",
+                        lambda prs, slide_data, **kw: rendered.append(slide_data["title"]) or add_slide(prs, slide_data, **kw))
+    seen = []
+
+    def slides():
+        for i in range(5):
+            # 前のスライドがレンダリング済みになってから次を取り出していること
+            assert rendered == [f"スライド{k}" for k in range(i)]
+            seen.append(i)
+            yield {"type": "content", "title": f"スライド{i}"}
+
+    pptx_engine.build_pptx_streaming(slides(), tmp_path / "lazy.pptx")
+    assert seen == list(range(5))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_multi_template_build_matches_single_builds(tmp_path, workers):
+    from pptx import Presentation
+    outline = _image_outline(2) + [{"type": "end"}]
+    generator = _SleepyGenerator(delay=0.0)
+    paths = pptx_engine.build_pptx_multi(outline, tmp_path / "deck_{template}.pptx", ["sx_proposal", "jr_east"],
+                                         image_generator=generator, workers=workers)
+
+    assert paths == [tmp_path / "deck_sx_proposal.pptx", tmp_path / "deck_jr_east.pptx"]
+    assert sorted(generator.calls) == ["illustration 0", "illustration 1"]  # 画像生成はテンプレート間で1回
+    for path, template_id in zip(paths, ["sx_proposal", "jr_east"]):
+        single = pptx_engine.build_pptx(outline, tmp_path / f"single_{template_id}.pptx",
+                                        template_id=template_id, image_generator=generator)
+        parts, expected = _zip_parts(path), _zip_parts(single)
+        assert parts.keys() == expected.keys()
+        for name in parts:
+            if name.startswith(("ppt/slides/", "ppt/media/")):
+                assert parts[name] == expected[name], (template_id, name)
+        assert len(Presentation(str(path)).slides) == 3
+    assert len(generator.calls) == 2
+
+
+def test_multi_template_build_keeps_placeholders_like_single_builds(tmp_path):
+    from image_client import placeholder_image
+    outline = _image_outline(2)
+    calls = []
+
+    def generator(prompt, model):
+        calls.append(prompt)
+        return placeholder_image() if prompt == "illustration 1" else _SleepyGenerator(0)(prompt, model)
+
+    paths = pptx_engine.build_pptx_multi(outline, tmp_path / "deck_{template}.pptx", ["sx_proposal", "jr_east"],
+                                         image_generator=generator, workers=1)
+    assert sorted(calls) == ["illustration 0", "illustration 1"]   # プレースホルダーも再試行しない
+    for path, template_id in zip(paths, ["sx_proposal", "jr_east"]):
+        single = pptx_engine.build_pptx(outline, tmp_path / f"single_{template_id}.pptx",
+                                        template_id=template_id, image_generator=generator)
+        assert _picture_count(path) == _picture_count(single) == 2
+
+
+def test_multi_template_assembly_keeps_manifest_per_template(tmp_path, capsys):
+    slides_dir = _write_slides_dir(tmp_path)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    paths = pptx_engine.build_from_slides_dir(slides_dir, out_dir / "deck.pptx",
+                                              template_id=["sx_proposal", "jr_east"])
+    assert pptx_engine.build_pptx([{"type": "end"}], out_dir / "one.pptx", template_id=["jr_east"]).exists()
+    assert [p.name for p in paths] == ["deck_sx_proposal.pptx", "deck_jr_east.pptx"]
+    assert (out_dir / ".build" / "sx_proposal" / "manifest.json").exists()
+    assert (out_dir / ".build" / "jr_east" / "manifest.json").exists()
+
+    capsys.readouterr()
+    pptx_engine.build_from_slides_dir(slides_dir, out_dir / "deck.pptx", template_id=["sx_proposal", "jr_east"])
+    out = capsys.readouterr().out
+    n = len(list(slides_dir.glob("*.json")))
+    assert out.count(f"再利用 {n}枚 / 再レンダリング 0枚") == 2
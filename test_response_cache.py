@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_response_cache.py
+response_cache のユニットテスト（python -m pytest test_response_cache.py）
+"""
+
+import sys
+import json
+import types
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+PARAMS = {"description": "DX推進の提案書", "system_sha256": "abc", "model": "m", "max_tokens": 8192}
+
+
+def test_get_put_and_persistent_stats(tmp_path):
+    cache = ResponseCache(tmp_path)
+    assert cache.get("outline", PARAMS) is None
+    cache.put("outline", PARAMS, [{"type": "title", "title": "提案"}])
+
+    assert cache.get("outline", PARAMS) == [{"type": "title", "title": "提案"}]
+    assert cache.get("outline", dict(PARAMS, max_tokens=4096)) is None
+    assert cache.get("expand", PARAMS) is None
+    assert (cache.hits, cache.misses) == (1, 3)
+    # 別プロセス相当の新しいインスタンスからも累計が見える
+    summary = ResponseCache(tmp_path).summary()
+    assert summary["entries"] == 1
+    assert summary["stats"] == {"outline": {"hit": 1, "miss": 2}, "expand": {"hit": 0, "miss": 1}}
+
+
+def test_expired_entries_are_removed(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path, ttl_seconds=60)
+    cache.put("outline", PARAMS, "old")
+    now = response_cache.time.time()
+    monkeypatch.setattr(response_cache.time, "time", lambda: now + 61)
+
+    assert cache.get("outline", PARAMS) is None
+    assert cache.expired == 1
+    assert cache.summary()["entries"] == 0
+    assert not list(tmp_path.rglob("*.json.*")) and len(list(tmp_path.glob("*/*.json"))) == 0
+
+
+def test_size_eviction_drops_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=600)
+    for name in ("a", "b"):
+        cache.put("k", {"n": name}, name * 150)
+    cache.get("k", {"n": "a"})     # a を最近使ったことにする → 追い出されるのは b
+    cache.put("k", {"n": "c"}, "c" * 150)
+
+    assert cache.get("k", {"n": "a"}) == "a" * 150
+    assert cache.get("k", {"n": "b"}) is None
+    assert cache.evictions == 1
+    index = json.loads((tmp_path / "index.json").read_text(encoding="utf-8"))
+    assert len(index["entries"]) == 2
+
+
+def test_call_modes(tmp_path):
+    cache = ResponseCache(tmp_path)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return f"response {len(calls)}"
+
+    assert cache.call("outline", PARAMS, fn) == "response 1"
+    assert cache.call("outline", PARAMS, fn) == "response 1"
+    assert cache.call("outline", PARAMS, fn, use_cache=False) == "response 2"
+    assert cache.call("outline", PARAMS, fn) == "response 1"            # --no-cache は書き込まない
+    assert cache.call("outline", PARAMS, fn, refresh=True) == "response 3"
+    assert cache.call("outline", PARAMS, fn) == "response 3"            # --refresh は上書きする
+    assert len(calls) == 3
+
+    with pytest.raises(ValueError):
+        cache.call("outline", dict(PARAMS, description="x"), lambda: json.loads("not json"))
+    assert cache.get("outline", dict(PARAMS, description="x")) is None
+
+
+def test_generate_outline_with_claude_is_cached(tmp_path, monkeypatch):
+    import generate_pptx
+    requests = []
+
+    class _Messages:
+        def create(self, **kwargs):
+            requests.append(kwargs)
+            text = '```json\n[{"type": "title", "title": "提案"}]\n```'
+            return types.SimpleNamespace(content=[types.SimpleNamespace(text=text)])
+
+    fake = types.ModuleType("anthropic")
+    fake.Anthropic = lambda api_key: types.SimpleNamespace(messages=_Messages())
+    monkeypatch.setitem(sys.modules, "anthropic", fake)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE", ResponseCache(tmp_path))
+
+    first = generate_pptx.generate_outline_with_claude("DX推進の提案書")
+    second = generate_pptx.generate_outline_with_claude("DX推進の提案書")
+    assert first == second == [{"type": "title", "title": "提案"}]
+    assert len(requests) == 1
+
+    # システムプロンプトが変わればキーも変わる
+    monkeypatch.setattr(generate_pptx, "OUTLINE_SYSTEM_PROMPT", generate_pptx.OUTLINE_SYSTEM_PROMPT + "\n- 追加ルール")
+    generate_pptx.generate_outline_with_claude("DX推進の提案書")
+    assert len(requests) == 2
+    generate_pptx.generate_outline_with_claude("DX推進の提案書", refresh=True)
+    generate_pptx.generate_outline_with_claude("DX推進の提案書", use_cache=False)
+    assert len(requests) == 4
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+test_tier2_expander.py
+tier2_expander / model_client のユニットテスト（python -m pytest test_tier2_expander.py）
+"""
+
+import json
+import time
+import threading
+
+import pytest
+
+from model_client import RateLimiter, call_with_retries
+from tier2_expander import Tier2Expander, find_stubs, is_stub, make_stub
+
+
+def _stub_from_prompt(prompt: str) -> dict:
+    return json.loads(prompt.split("展開するスタブ:\n")[1].split("\n\n")[0])
+
+
+def _expanded(stub: dict) -> dict:
+    slide = {"index": stub["index"], "type": stub["type"], "title": stub["title"]}
+    if stub["type"] == "title":
+        slide["subtitle"] = "2026年10月　株式会社サンプル御中"
+    elif stub["type"] == "agenda":
+        slide["body"] = "1. 背景\n2. 提案"
+    else:
+        slide.update(subtitle="キーメッセージ", body="・要点1\n・要点2",
+                     objects=[{"type": "box", "text": "現状", "left": 0.5, "top": 4.5, "width": 2.5, "height": 0.9,
+                               "fill_color": "4472C4", "font_size": 12}])
+    return slide
+
+
+class FakeModelClient:
+    """応答時間を真似て待ってから、スタブを展開した JSON を返す偽クライアント"""
+
+    model = "fake"
+
+    def __init__(self, delay: float = 0.0, responses: dict | None = None):
+        self.delay = delay
+        self.responses = responses or {}   # index -> 応答（文字列 / 例外）のリスト。尽きたら正常な応答
+        self.prompts: list[str] = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def complete(self, system: str, prompt: str) -> str:
+        stub = _stub_from_prompt(prompt)
+        with self.lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            scripted = self.responses.get(stub["index"], [])
+            response = scripted.pop(0) if scripted else None
+        try:
+            time.sleep(self.delay)
+            if isinstance(response, Exception):
+                raise response
+            return response if response is not None else "```json\n" + json.dumps(_expanded(stub), ensure_ascii=False) + "\n```"
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _write_stubs(slides_dir, n_content: int):
+    slides_dir.mkdir(parents=True)
+    (slides_dir.parent / "outline.json").write_text(json.dumps({"title": "提案書", "description": "テスト"}),
+                                                    encoding="utf-8")
+    types = ["title", "agenda", "chapter"] + ["content"] * n_content + ["end"]
+    for i, stype in enumerate(types):
+        stub = make_stub({"index": i, "type": stype, "title": f"スライド{i}", "note": f"{stype} の内容"})
+        (slides_dir / f"{i:02d}_{stype}.json").write_text(json.dumps(stub, ensure_ascii=False), encoding="utf-8")
+    return types
+
+
+def test_stubs_expand_concurrently_and_pass_schema(tmp_path):
+    slides_dir = tmp_path / "project" / "slides"
+    types = _write_stubs(slides_dir, 12)
+    client = FakeModelClient(delay=0.2)
+    expander = Tier2Expander(slides_dir, client=client, workers=16)
+
+    t0 = time.perf_counter()
+    results = expander.run()
+    wall = time.perf_counter() - t0
+
+    assert all(r["ok"] for r in results) and len(results) == len(types)
+    # chapter / end はモデルを呼ばない
+    assert len(client.prompts) == len(types) - 2
+    assert client.max_active == len(types) - 2
+    # 14枚の依頼が一番遅い1枚分程度で終わる（順番なら 2.8 秒）
+    assert wall < 0.2 * 3
+    assert find_stubs(slides_dir) == []
+    for path in slides_dir.glob("*.json"):
+        slide = json.loads(path.read_text(encoding="utf-8"))
+        assert expander.schema_errors(slide) == [] and not is_stub(slide)
+    # 各依頼にデッキ全体の流れが入っている
+    assert "スライド一覧:" in client.prompts[0] and "スライド13" in client.prompts[0]
+
+
+def test_schema_failures_are_retried_with_feedback(tmp_path):
+    slides_dir = tmp_path / "project" / "slides"
+    _write_stubs(slides_dir, 2)
+    mixed = json.dumps({"index": 3, "type": "content", "title": "x", "objects": [], "images": []})
+    client = FakeModelClient(responses={3: ["これは JSON ではありません", mixed], 4: [TimeoutError("timeout")]})
+    results = {r["name"]: r for r in Tier2Expander(slides_dir, client=client, base_delay=0.001).run()}
+
+    assert results["03_content.json"]["ok"] and results["03_content.json"]["attempts"] == 3
+    assert results["04_content.json"]["ok"] and results["04_content.json"]["attempts"] == 2
+    retried = [p for p in client.prompts if _stub_from_prompt(p)["index"] == 3]
+    assert "スキーマに合いませんでした" not in retried[0]
+    assert "JSON として解析できません" in retried[1]
+    assert "should not be valid" in retried[2]
+
+
+def test_exhausted_retries_keep_the_stub(tmp_path):
+    slides_dir = tmp_path / "project" / "slides"
+    _write_stubs(slides_dir, 1)
+    before = (slides_dir / "03_content.json").read_text(encoding="utf-8")
+    client = FakeModelClient(responses={3: ['{"title": ""}'] * 3})
+    results = {r["name"]: r for r in Tier2Expander(slides_dir, client=client, base_delay=0.001).run()}
+
+    assert not results["03_content.json"]["ok"]
+    assert "RetryableError" in results["03_content.json"]["error"]
+    assert (slides_dir / "03_content.json").read_text(encoding="utf-8") == before
+    assert find_stubs(slides_dir) == [slides_dir / "03_content.json"]
+
+
+def test_cached_responses_skip_the_model(tmp_path):
+    slides_dir = tmp_path / "project" / "slides"
+    _write_stubs(slides_dir, 2)
+    stubs = {p: p.read_text(encoding="utf-8") for p in slides_dir.glob("*.json")}
+    Tier2Expander(slides_dir, client=FakeModelClient()).run()
+    for path, text in stubs.items():
+        path.write_text(text, encoding="utf-8")
+
+    client = FakeModelClient()
+    results = Tier2Expander(slides_dir, client=client).run()
+    assert all(r["ok"] and r["cached"] for r in results if r["name"] not in ("02_chapter.json", "05_end.json"))
+    assert client.prompts == []
+    Tier2Expander(slides_dir, client=client, refresh=True).run(find_stubs(slides_dir))
+    assert client.prompts == []   # 展開済みなのでスタブは残っていない
+
+
+def test_only_marked_stubs_are_expanded(tmp_path):
+    slides_dir = tmp_path / "project" / "slides"
+    _write_stubs(slides_dir, 1)
+    # 本文のない展開済みスライドはスタブではない
+    (slides_dir / "04_content.json").write_text(json.dumps({"index": 4, "type": "content", "title": "図だけ"}),
+                                                encoding="utf-8")
+    assert slides_dir / "04_content.json" not in find_stubs(slides_dir)
+    assert not is_stub({"index": 1, "type": "agenda", "title": "目次"})
+
+
+def test_non_transient_errors_are_not_retried(tmp_path):
+    slides_dir = tmp_path / "project" / "slides"
+    _write_stubs(slides_dir, 1)
+    client = FakeModelClient(responses={3: [PermissionError("invalid api key")]})
+    results = {r["name"]: r for r in Tier2Expander(slides_dir, client=client, base_delay=0.001).run()}
+
+    assert not results["03_content.json"]["ok"] and results["03_content.json"]["attempts"] == 1
+    assert "PermissionError" in results["03_content.json"]["error"]
+    assert is_stub(json.loads((slides_dir / "03_content.json").read_text(encoding="utf-8")))
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=20, burst=2)
+    t0 = time.perf_counter()
+    for _ in range(6):
+        limiter.acquire()
+    # 最初の2回はすぐ通り、残り4回は 1/20 秒ずつ
+    assert time.perf_counter() - t0 == pytest.approx(0.2, abs=0.06)
+
+
+def test_call_with_retries_raises_last_error():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ConnectionError(f"fail {len(calls)}")
+
+    with pytest.raises(ConnectionError, match="fail 3"):
+        call_with_retries(fn, attempts=3, base_delay=0.001)
+    assert len(calls) == 3
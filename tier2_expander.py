@@ -0,0 +1,328 @@
+"""
+tier2_expander.py
+Tier 2 スタブの並行展開（generate_pptx.py expand）
+
+Tier 1 アウトラインから作られたスタブ（slides/NN_<type>.json、index・type・title・note と "stub": true だけ）を
+モデルに渡して Tier 2 の内容（subtitle・body・objects・images）を書かせる。
+1枚ずつ順に頼むと枚数分の待ち時間が積み上がるため、スライドごとに独立した依頼として
+スレッドプールで同時に投げ、30枚のデッキでも一番遅い1枚分程度の時間で揃える。
+
+  python generate_pptx.py expand --project "提案書タイトル"              # 最新日付のプロジェクト
+  python generate_pptx.py expand --project "提案書タイトル" --workers 8 --rate 2
+
+  - 依頼ごとにレート制限（トークンバケット）を通し、失敗は指数バックオフで再試行する
+  - 応答は schemas/tier2.schema.json で検証し、通ったものだけスタブに上書きする
+    （合わなければエラー内容を添えて再依頼。最後まで合わなければスタブのまま残す）
+  - chapter / end のスタブはモデルを呼ばずに note と "stub" を外すだけで展開する
+  - 応答は response_cache に保存し、同じスタブ・レシピ・プロンプトなら再利用する
+
+model client は complete(system, prompt) -> str を持てばよい（model_client.AnthropicTextClient）。
+テストでは応答を組み立てて返す偽クライアントに差し替える。
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+from cache_store import atomic_write
+from schema_validators import get_validator
+from model_client import RateLimiter, RetryableError, call_with_retries, transient_api_errors
+
+ROOT = Path(__file__).parent
+TEMPLATES_DIR = ROOT / "templates"
+LOCAL_TYPES = ("chapter", "end")    # モデルを呼ばずに展開できる type
+DEFAULT_WORKERS = 8
+DEFAULT_ATTEMPTS = 3
+
+TIER2_SYSTEM_PROMPT = """あなたはプロのプレゼンテーションデザイナーです。
+提案書のスライド1枚分のスタブ（index・type・title・note）を、Tier 2 JSON（テンプレート固有の座標・色・フォントサイズを含む最終形）に展開してください。
+
+出力形式（JSON オブジェクト1つのみ。マークダウン記法・説明文は不要）:
+{"index": 3, "type": "content", "title": "...", "subtitle": "キーメッセージ（40〜70文字）", "body": "・箇条書き1\\n・箇条書き2", "objects": [...]}
+
+ルール:
+- index・type はスタブの値をそのまま使う。title はスタブの意図を保つ（20〜35文字）
+- note は展開の指示であり、出力には含めない
+- type ごとに使えるキー:
+  title: title, subtitle / agenda: title, body, images / chapter: title / end: title
+  content: title, master_title, subtitle, body, objects または images（objects と images は同じスライドで併用しない）
+- objects の要素: {"type": "box"|"rect"|"arrow"|"text", "text", "left", "top", "width", "height", "fill_color", "font_color", "font_size"}
+  色は6桁の16進（例: "4472C4"）、font_size は 6〜48 の整数、座標はインチ
+- images の要素: {"prompt": "英語で具体的に", "left", "top", "width"}
+- 座標系: 幅13.3 × 高さ7.5インチ。コンテンツエリア top:1.5〜7.0
+- デッキ全体の流れ（他のスライドのタイトル）と重複しない内容にする
+- レシピ（設計意図）が与えられた場合はそのパターン・トーン・ラベルに従う
+"""
+
+
+# ─── スタブの作成・検出 ───────────────────────────────
+STUB_MARKER = "stub"        # スタブに true で書く印（展開時に外す）
+STUB_ONLY_KEYS = ("note", STUB_MARKER)
+
+
+def make_stub(entry: dict) -> dict:
+    """Tier 1 のエントリ（index・type・title・note）から未展開のスタブを作る（generate_pptx が書き出す）"""
+    return dict(entry, **{STUB_MARKER: True})
+
+
+def is_stub(slide: dict) -> bool:
+    """
+    make_stub() で作った未展開のスライドか。中身の有無では判定しない
+    （本文なしの content スライドなど、展開済みでも中身が空のことがある）
+    """
+    return slide.get(STUB_MARKER) is True
+
+
+def find_stubs(slides_dir: Path) -> list[Path]:
+    stubs = []
+    for path in sorted(Path(slides_dir).glob("*.json")):
+        try:
+            slide = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            continue
+        if isinstance(slide, dict) and is_stub(slide):
+            stubs.append(path)
+    return stubs
+
+
+def _leaf_errors(errors):
+    """
+    oneOf の「どの型にも合わない」を、type が一致する分岐の具体的なエラーに展開する
+    （再依頼のときにモデルへ何を直せばよいか伝えるため）
+    """
+    for error in errors:
+        branches: dict[int, list] = {}
+        for sub in error.context or []:
+            branches.setdefault(sub.relative_schema_path[0], []).append(sub)
+        matching = [sub for subs in branches.values()
+                    if not any(e.validator == "const" and list(e.path) == ["type"] for e in subs)
+                    for sub in subs]
+        if error.validator == "oneOf" and matching:
+            yield from _leaf_errors(matching)
+        else:
+            yield error
+
+
+def strip_fence(text: str) -> str:
+    """```json ... ``` で囲まれた応答から中身を取り出す"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+    return text.strip()
+
+
+# ─── 展開 ─────────────────────────────────────────────
+class Tier2Expander:
+    """
+    slides_dir のスタブをスレッドプールで同時に展開する。
+    client: complete(system, prompt) -> str を持つモデルクライアント（省略時は AnthropicTextClient）
+    rate: 1秒あたりの依頼数の上限（None なら制限なし）。burst: 待たずに通す連続回数
+    """
+
+    def __init__(self, slides_dir: Path, client=None, template_id: str | None = None,
+                 workers: int = DEFAULT_WORKERS, attempts: int = DEFAULT_ATTEMPTS,
+                 rate: float | None = None, burst: int = 4, base_delay: float = 1.0,
+                 use_cache: bool = True, refresh: bool = False):
+        self.slides_dir = Path(slides_dir)
+        self.project_dir = self.slides_dir.parent
+        if client is None:
+            from model_client import AnthropicTextClient
+            client = AnthropicTextClient()
+        self.client = client
+        self.template_id = template_id
+        self.workers = max(1, workers)
+        self.attempts = max(1, attempts)
+        self.limiter = RateLimiter(rate, burst) if rate else None
+        self.base_delay = base_delay
+        self.use_cache = use_cache
+        self.refresh = refresh
+        self.validator = get_validator("tier2")   # jsonschema がなければここで ImportError
+        self.system = self._system_prompt()
+        self.context = self._deck_context()
+
+    # ── プロンプト ──
+    def _system_prompt(self) -> str:
+        guide = TEMPLATES_DIR / (self.template_id or "sx_proposal") / "design_guide.md"
+        if not guide.exists():
+            return TIER2_SYSTEM_PROMPT
+        return f"{TIER2_SYSTEM_PROMPT}\n--- テンプレートのデザインガイド ---\n{guide.read_text(encoding='utf-8')}"
+
+    def _deck_context(self) -> str:
+        """デッキ全体のタイトル・説明とスライド一覧（各依頼に共通で添える）"""
+        lines = []
+        outline_json = self.project_dir / "outline.json"
+        if outline_json.exists():
+            outline = json.loads(outline_json.read_text(encoding="utf-8"))
+            if isinstance(outline, dict):
+                lines += [f"デッキ: {outline.get('title', '')}", f"説明: {outline.get('description', '')}"]
+        lines.append("スライド一覧:")
+        for path in sorted(self.slides_dir.glob("*.json")):
+            try:
+                slide = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                continue
+            lines.append(f"  {slide.get('index', '?')}. [{slide.get('type', 'content')}] {slide.get('title', '')}")
+        return "\n".join(lines)
+
+    def _recipe(self, path: Path) -> dict | None:
+        recipe = self.project_dir / "recipes" / f"{path.stem}.recipe.json"
+        return json.loads(recipe.read_text(encoding="utf-8")) if recipe.exists() else None
+
+    def prompt(self, stub: dict, recipe: dict | None, feedback: str | None = None) -> str:
+        shown = {k: v for k, v in stub.items() if k != STUB_MARKER}
+        parts = [self.context, "", "展開するスタブ:", json.dumps(shown, ensure_ascii=False, indent=2)]
+        if recipe is not None:
+            parts += ["", "レシピ（設計意図）:", json.dumps(recipe, ensure_ascii=False, indent=2)]
+        if feedback:
+            parts += ["", f"前回の出力はスキーマに合いませんでした。修正してください:\n{feedback}"]
+        return "\n".join(parts)
+
+    # ── 応答の検証 ──
+    def schema_errors(self, slide: dict) -> list[str]:
+        return [f"{error.message} (at {' > '.join(str(p) for p in error.absolute_path) or '(root)'})"
+                for error in _leaf_errors(self.validator.iter_errors(slide))]
+
+    def parse(self, text: str, stub: dict) -> dict:
+        """応答を Tier 2 スライドにする。JSON でない・スキーマに合わない場合は RetryableError"""
+        try:
+            slide = json.loads(strip_fence(text))
+        except ValueError as e:
+            raise RetryableError(f"JSON として解析できません: {e}") from None
+        if not isinstance(slide, dict):
+            raise RetryableError("JSON オブジェクトではありません")
+        for key in STUB_ONLY_KEYS:
+            slide.pop(key, None)
+        slide["index"], slide["type"] = stub.get("index", 0), stub.get("type", "content")
+        errors = self.schema_errors(slide)
+        if errors:
+            raise RetryableError("\n".join(errors[:5]))
+        return slide
+
+    # ── 1枚の展開 ──
+    def _request(self, stub: dict, recipe: dict | None, state: dict) -> dict:
+        def attempt():
+            state["attempts"] += 1
+            text = self.client.complete(self.system, self.prompt(stub, recipe, state.get("feedback")))
+            return self.parse(text, stub)
+
+        def on_retry(n, error):
+            if isinstance(error, RetryableError):
+                state["feedback"] = str(error)
+            print(f"  [expand] {state['name']}: 再試行 {n}/{self.attempts - 1} ({str(error).splitlines()[0][:80]})")
+
+        # スキーマ不合格と一時的な API エラーだけ再依頼する（認証エラー等は繰り返しても同じ）
+        return call_with_retries(attempt, attempts=self.attempts, limiter=self.limiter,
+                                 base_delay=self.base_delay, on_retry=on_retry,
+                                 retry_on=(RetryableError, *transient_api_errors()))
+
+    def expand_one(self, path: Path) -> dict:
+        """
+        スタブ1枚を展開して上書きする。
+        Returns: {"name", "ok", "attempts", "cached", "seconds", "error"}
+        """
+        from response_cache import RESPONSE_CACHE, text_sha256
+        t0 = time.perf_counter()
+        state = {"name": path.name, "attempts": 0}
+        result = {"name": path.name, "ok": False, "attempts": 0, "cached": False, "error": None}
+        try:
+            stub = json.loads(path.read_text(encoding="utf-8"))
+            if stub.get("type", "content") in LOCAL_TYPES:
+                slide = {k: v for k, v in stub.items() if k not in STUB_ONLY_KEYS}
+                errors = self.schema_errors(slide)
+                if errors:
+                    raise ValueError("\n".join(errors))
+            else:
+                recipe = self._recipe(path)
+                params = {"stub": stub, "recipe": recipe, "context_sha256": text_sha256(self.context),
+                          "system_sha256": text_sha256(self.system),
+                          "model": getattr(self.client, "model", type(self.client).__name__)}
+                slide = RESPONSE_CACHE.call("tier2", params, lambda: self._request(stub, recipe, state),
+                                            use_cache=self.use_cache, refresh=self.refresh)
+                result["cached"] = state["attempts"] == 0
+            atomic_write(path, (json.dumps(slide, ensure_ascii=False, indent=2) + "\n").encode("utf-8"))
+            result["ok"] = True
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+        result["attempts"] = state["attempts"]
+        result["seconds"] = time.perf_counter() - t0
+        status = "OK" if result["ok"] else f"失敗（スタブのまま）: {result['error']}"
+        print(f"  [expand] {path.name} ({result['seconds']:.1f}s"
+              f"{', キャッシュ' if result['cached'] else ''}) {status}")
+        return result
+
+    # ── 全体 ──
+    def run(self, paths: list[Path] | None = None) -> list[dict]:
+        """paths（省略時は slides_dir の全スタブ）を同時に展開し、ファイル名順の結果を返す"""
+        from concurrent.futures import ThreadPoolExecutor
+        paths = find_stubs(self.slides_dir) if paths is None else list(paths)
+        if not paths:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(paths))) as pool:
+            return list(pool.map(self.expand_one, paths))
+
+
+def print_summary(results: list[dict], wall_seconds: float):
+    failed = [r for r in results if not r["ok"]]
+    print(f"\n{'=' * 60}")
+    print(f"{'Slide':<24} {'Time':>8} {'Tries':>6}  Result")
+    print("-" * 60)
+    for r in results:
+        print(f"{r['name']:<24} {r['seconds']:>7.1f}s {r['attempts']:>6}"
+              f"  {'OK' if r['ok'] else 'FAILED'}{' (cache)' if r['cached'] else ''}")
+    print("-" * 60)
+    slowest = max((r["seconds"] for r in results), default=0.0)
+    print(f"{len(results)}枚（成功 {len(results) - len(failed)} / 失敗 {len(failed)}）"
+          f"  経過 {wall_seconds:.1f}s（最も遅い1枚 {slowest:.1f}s / 合計 {sum(r['seconds'] for r in results):.1f}s）")
+    print("=" * 60)
+
+
+# ─── CLI ──────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    from batch_build import SLIDES_DIR, project_template
+    parser = argparse.ArgumentParser(prog="generate_pptx.py expand",
+                                     description="Tier 2 スタブをモデルで同時に展開する")
+    parser.add_argument("--project", required=True, help="プロジェクト名（slides/*_<project>/ の最新日付）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"同時に依頼するスライド数（既定: {DEFAULT_WORKERS}）")
+    parser.add_argument("--rate", type=float, help="1秒あたりの依頼数の上限（既定: 制限なし）")
+    parser.add_argument("--attempts", type=int, default=DEFAULT_ATTEMPTS,
+                        help=f"1枚あたりの最大試行回数（既定: {DEFAULT_ATTEMPTS}）")
+    parser.add_argument("--model", help="展開に使う Claude のモデル")
+    parser.add_argument("--no-cache", action="store_true", help="応答キャッシュを読みも書きもしない")
+    parser.add_argument("--refresh", action="store_true", help="応答キャッシュを無視して依頼し直す")
+    parser.add_argument("--dry-run", action="store_true", help="展開対象のスタブを表示するだけ")
+    args = parser.parse_args(argv)
+
+    safe_project = "".join(c for c in args.project if c not in r'\/:*?"<>|')
+    matching = sorted(SLIDES_DIR.glob(f"*_{safe_project}"), reverse=True)
+    if not matching or not (matching[0] / "slides").exists():
+        print(f"エラー: プロジェクトの slides/ フォルダーが見つかりません: *_{safe_project}")
+        sys.exit(1)
+    slides_dir = matching[0] / "slides"
+    stubs = find_stubs(slides_dir)
+    print(f"\nTier 2 展開: {slides_dir}（スタブ {len(stubs)}枚）")
+    if args.dry_run or not stubs:
+        for path in stubs:
+            print(f"  {path.name}")
+        return
+
+    client = None
+    if args.model:
+        from model_client import AnthropicTextClient
+        client = AnthropicTextClient(model=args.model)
+    expander = Tier2Expander(slides_dir, client=client, template_id=project_template(matching[0]),
+                             workers=args.workers, attempts=args.attempts, rate=args.rate,
+                             use_cache=not args.no_cache, refresh=args.refresh)
+    t0 = time.perf_counter()
+    results = expander.run(stubs)
+    print_summary(results, time.perf_counter() - t0)
+    if any(not r["ok"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()